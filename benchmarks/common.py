@@ -0,0 +1,101 @@
+import json
+import platform
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Percentile of a list of samples using linear interpolation."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def save_baseline(name: str, results: Dict[str, dict], parameters: Dict[str, Any]) -> Path:
+    """
+    Stores benchmark results as the new baseline.
+
+    Args:
+        name: Baseline name (file name without extension)
+        results: Metrics per benchmark case
+        parameters: Options the benchmark ran with, checked by compare_to_baseline
+
+    Returns:
+        Path: Path to the baseline file
+    """
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    payload = {
+        "recorded_at": datetime.now().isoformat(),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "parameters": parameters,
+        "results": results
+    }
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=4)
+    return path
+
+
+def compare_to_baseline(name: str,
+                        results: Dict[str, dict],
+                        parameters: Dict[str, Any],
+                        higher_is_better: Sequence[str],
+                        lower_is_better: Sequence[str],
+                        tolerance: float = 0.2) -> List[str]:
+    """
+    Compares results with the stored baseline.
+
+    Args:
+        name: Baseline name (file name without extension)
+        results: Metrics per benchmark case
+        parameters: Options the benchmark ran with, which must match the baseline's
+        higher_is_better: Metrics that regress when they drop
+        lower_is_better: Metrics that regress when they grow
+        tolerance: Allowed relative change before a regression is reported
+
+    Returns:
+        List[str]: One message per regression (empty if none)
+
+    Raises:
+        FileNotFoundError: If no baseline was recorded
+        ValueError: If the baseline was recorded with other parameters
+    """
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        raise FileNotFoundError(f"No baseline recorded at {path}, run with --save-baseline first")
+
+    with path.open(encoding="utf-8") as f:
+        payload = json.load(f)
+
+    # Round trip through JSON so tuples compare equal to the stored lists
+    recorded = payload.get("parameters")
+    if recorded != json.loads(json.dumps(parameters)):
+        raise ValueError(f"Baseline {path} was recorded with {recorded}, not {parameters}: "
+                         f"run with the same options or record a new baseline")
+    baseline = payload["results"]
+
+    regressions = []
+    for case, metrics in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        for metric in higher_is_better:
+            if metric in reference and metrics[metric] < reference[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{case}: {metric} dropped to {metrics[metric]:.2f} (baseline {reference[metric]:.2f})"
+                )
+        for metric in lower_is_better:
+            if metric in reference and metrics[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{case}: {metric} rose to {metrics[metric]:.2f} (baseline {reference[metric]:.2f})"
+                )
+    return regressions
+
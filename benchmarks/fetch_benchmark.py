@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from src.config import APIConfig
+from src.scraper.api_client import EasyJetAPIClient
+from src.scraper.models import FlightFare
+
+from benchmarks.common import compare_to_baseline, percentile, save_baseline
+from benchmarks.mock_server import MockEasyJetServer, MockServerConfig, generate_fares
+
+BASELINE_NAME = "fetch"
+
+
+def build_client(base_url: str, with_logging: bool = False) -> EasyJetAPIClient:
+    """Creates an API client pointed at the mock server, without request delays."""
+    defaults = APIConfig.get_default_config()
+    config = APIConfig(
+        base_url=base_url,
+        headers=defaults.headers,
+        currency="EUR",
+        default_departure="ZRH",
+        default_arrival="FCO",
+        min_delay=0.0,
+        max_delay=0.0
+    )
+    client = EasyJetAPIClient(config)
+    if not with_logging:
+        logging.getLogger("src.scraper.api_client").setLevel(logging.WARNING)
+    return client
+
+
+def run_fetch_case(client: EasyJetAPIClient, concurrency: int, requests_count: int) -> dict:
+    """
+    Fetches requests_count route/dates with the given number of threads.
+
+    Returns:
+        dict: Throughput, latency percentiles and error counts
+    """
+    start_date = datetime(2025, 8, 1)
+    routes = [("ZRH", "FCO"), ("ZRH", "NAP"), ("LGW", "CDG"), ("BSL", "LIS")]
+    jobs = [
+        ((start_date + timedelta(days=i // len(routes))).strftime("%Y-%m-%d"), *routes[i % len(routes)])
+        for i in range(requests_count)
+    ]
+
+    def timed_fetch(job):
+        date, departure, arrival = job
+        started = time.perf_counter()
+        response = client.fetch_fares_for_date(date, departure, arrival)
+        return time.perf_counter() - started, response
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_fetch, jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _ in results]
+    fares = sum(len(response.data) for _, response in results)
+    errors = sum(1 for _, response in results if not response.is_successful)
+    return {
+        "requests": requests_count,
+        "requests_per_sec": requests_count / elapsed,
+        "fares_per_sec": fares / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "errors": errors
+    }
+
+
+def run_parse_case(fares_count: int) -> dict:
+    """
+    Measures JSON decoding plus FlightFare.from_api_response on a large payload.
+
+    Returns:
+        dict: Parse throughput in fares and megabytes per second
+    """
+    config = MockServerConfig(min_fares=4, max_fares=4)
+    payload: List[dict] = []
+    day = datetime(2025, 8, 1)
+    while len(payload) < fares_count:
+        payload.extend(generate_fares("ZRH", "FCO", day.strftime("%Y-%m-%d"), config))
+        day += timedelta(days=1)
+    body = json.dumps(payload[:fares_count])
+
+    started = time.perf_counter()
+    fares = [FlightFare.from_api_response(fare) for fare in json.loads(body)]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "fares": len(fares),
+        "fares_per_sec": len(fares) / elapsed,
+        "mb_per_sec": len(body) / elapsed / 1_000_000
+    }
+
+
+def run_suite(concurrency_levels: List[int],
+              requests_count: int,
+              server_config: MockServerConfig,
+              with_logging: bool = False) -> Dict[str, dict]:
+    """Runs every benchmark case against a fresh mock server."""
+    results = {}
+    with MockEasyJetServer(server_config) as server:
+        client = build_client(server.url, with_logging)
+        # Warm up connections and code paths
+        run_fetch_case(client, 1, 4)
+        for concurrency in concurrency_levels:
+            results[f"fetch_c{concurrency}"] = run_fetch_case(client, concurrency, requests_count)
+    results["parse"] = run_parse_case(50_000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end fetch benchmark against the local mock EasyJet server",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock server base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Mock server extra random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server share of 500 responses")
+    parser.add_argument("--burst-every", type=int, default=0, help="Mock server requests between 429 bursts")
+    parser.add_argument("--burst-length", type=int, default=0, help="Mock server length of 429 bursts")
+    parser.add_argument("--with-logging", action="store_true", help="Keep the client's INFO logging enabled")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Fail if results regress past the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    server_config = MockServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length
+    )
+    levels = [int(level) for level in args.concurrency.split(",")]
+    parameters = {
+        "concurrency": levels,
+        "requests": args.requests,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "burst_every": args.burst_every,
+        "burst_length": args.burst_length,
+        "with_logging": args.with_logging
+    }
+    results = run_suite(levels, args.requests, server_config, args.with_logging)
+
+    print("Case | Requests/s | Fares/s | p50 ms | p99 ms | Errors")
+    print("-" * 80)
+    for case, metrics in results.items():
+        if case == "parse":
+            continue
+        print(f"{case} | {metrics['requests_per_sec']:.1f} | {metrics['fares_per_sec']:.1f} | "
+              f"{metrics['p50_ms']:.1f} | {metrics['p99_ms']:.1f} | {metrics['errors']}")
+    parse = results["parse"]
+    print(f"\nParse: {parse['fares_per_sec']:.0f} fares/s, {parse['mb_per_sec']:.1f} MB/s")
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results, parameters)
+        print(f"\nBaseline saved to {path}")
+
+    if args.check:
+        regressions = compare_to_baseline(
+            BASELINE_NAME, results, parameters,
+            higher_is_better=["requests_per_sec", "fares_per_sec", "mb_per_sec"],
+            lower_is_better=["p50_ms", "p99_ms"],
+            tolerance=args.tolerance
+        )
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
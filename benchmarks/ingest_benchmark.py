@@ -0,0 +1,233 @@
+import argparse
+import itertools
+import logging
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.data_manager import DataManager
+from src.database.connection import Base
+from src.database.ingest import BulkIngestor
+from src.database.models import PriceSnapshot
+from src.query_cache import QueryCache
+from src.scraper.models import APIResponse
+
+from benchmarks.common import compare_to_baseline, percentile, save_baseline
+from benchmarks.synthetic import SyntheticConfig, SyntheticFareGenerator
+
+BASELINE_NAME = "ingest"
+
+
+class _CommitCounter:
+    """Counts the commits of a session."""
+
+    def __init__(self, db: Session):
+        self.commits = 0
+        event.listen(db, "after_commit", self._on_commit)
+
+    def _on_commit(self, session: Session) -> None:
+        self.commits += 1
+
+
+def grow_to(db: Session, responses: Iterator[APIResponse], snapshots: int) -> int:
+    """
+    Bulk-loads responses until price_snapshots holds at least the given
+    number of rows.
+
+    Returns:
+        int: Rows in price_snapshots afterwards
+    """
+    count = db.query(func.count(PriceSnapshot.id)).scalar()
+    added = 0
+    with BulkIngestor(db) as ingestor:
+        for response in responses:
+            if count + added >= snapshots:
+                break
+            ingestor.add(response)
+            added += len(response.data)
+    return db.query(func.count(PriceSnapshot.id)).scalar()
+
+
+def run_save_case(data_manager: DataManager, db: Session, responses: List[APIResponse]) -> dict:
+    """
+    Measures the regular save path (DataManager._save_to_database, which
+    calls APIResponse.save_to_db) one response at a time.
+
+    Returns:
+        dict: Fares per second and commits per fare
+    """
+    counter = _CommitCounter(db)
+    fares = sum(len(response.data) for response in responses)
+    started = time.perf_counter()
+    for response in responses:
+        data_manager._save_to_database(db, response)
+    elapsed = time.perf_counter() - started
+    return {
+        "fares": fares,
+        "fares_per_sec": fares / elapsed,
+        "commits_per_fare": counter.commits / fares
+    }
+
+
+def run_bulk_case(db: Session, responses: List[APIResponse]) -> dict:
+    """
+    Measures BulkIngestor on the same kind of responses.
+
+    Returns:
+        dict: Fares per second and commits per fare
+    """
+    counter = _CommitCounter(db)
+    fares = sum(len(response.data) for response in responses)
+    started = time.perf_counter()
+    with BulkIngestor(db) as ingestor:
+        for response in responses:
+            ingestor.add(response)
+    elapsed = time.perf_counter() - started
+    return {
+        "fares": fares,
+        "fares_per_sec": fares / elapsed,
+        "commits_per_fare": counter.commits / fares
+    }
+
+
+def run_query_case(query: Callable[[], object], repeats: int) -> dict:
+    """
+    Measures the latency of a repeated (hot) query.
+
+    Returns:
+        dict: Latency percentiles in milliseconds
+    """
+    query()  # Warm up caches
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        query()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99)
+    }
+
+
+def run_suite(sizes: List[int],
+              database_url: str,
+              batch_responses: int = 200,
+              query_repeats: int = 50,
+              output_dir: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Grows the database through the given price_snapshots sizes and runs the
+    ingest and query cases at each size.
+
+    Args:
+        sizes: Table sizes (rows in price_snapshots) to measure at, ascending
+        database_url: Empty database to run against
+        batch_responses: Responses ingested per ingest case
+        query_repeats: Executions per query case
+        output_dir: Directory for DataManager files (default: a temporary directory)
+
+    Returns:
+        dict: Metrics per case, e.g. results["save_to_db@100000"]
+    """
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    generator = SyntheticFareGenerator(SyntheticConfig(routes=20, horizon_days=60, history_days=365))
+    responses = generator.responses()
+    route = generator.routes[0]
+    flight_number = route.schedule[0][1]
+    date_from = generator.config.start
+    date_to = date_from + timedelta(days=30)
+
+    output_dir = output_dir or tempfile.mkdtemp(prefix="ingest_benchmark_")
+    # Without result caching, so the query cases measure the database
+    data_manager = DataManager(output_dir, session_factory=session_factory, cache=QueryCache(max_entries=0))
+
+    results = {}
+    db = session_factory()
+    try:
+        for size in sizes:
+            actual = grow_to(db, responses, size)
+            print(f"price_snapshots: {actual} rows")
+
+            results[f"save_to_db@{size}"] = run_save_case(
+                data_manager, db, list(itertools.islice(responses, batch_responses)))
+            results[f"bulk@{size}"] = run_bulk_case(
+                db, list(itertools.islice(responses, batch_responses)))
+            results[f"price_history@{size}"] = run_query_case(
+                lambda: data_manager.get_price_history(flight_number, days=30), query_repeats)
+            results[f"latest_fares@{size}"] = run_query_case(
+                lambda: data_manager.get_latest_fares(route.departure, route.arrival, date_from, date_to),
+                query_repeats)
+    finally:
+        db.close()
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest and query benchmark at increasing table sizes",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--sizes", default="0,50000,200000",
+                        help="Comma separated price_snapshots sizes to measure at")
+    parser.add_argument("--responses", type=int, default=200, help="Responses per ingest case")
+    parser.add_argument("--repeats", type=int, default=50, help="Executions per query case")
+    parser.add_argument("--database-url", default=None,
+                        help="Empty scratch database, e.g. a local Postgres (default: a temporary SQLite file)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Fail if results regress past the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    # The save path logs every response at INFO level
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="ingest_benchmark_") as workdir:
+        database_url = args.database_url or f"sqlite:///{Path(workdir) / 'bench.db'}"
+        sizes = [int(size) for size in args.sizes.split(",")]
+        parameters = {
+            "sizes": sizes,
+            "responses": args.responses,
+            "repeats": args.repeats,
+            "database": make_url(database_url).get_backend_name()
+        }
+        results = run_suite(sizes, database_url, args.responses, args.repeats, workdir)
+
+    print("Case | Fares/s | Commits/fare | p50 ms | p99 ms")
+    print("-" * 80)
+    for case, metrics in results.items():
+        if "fares_per_sec" in metrics:
+            print(f"{case} | {metrics['fares_per_sec']:.0f} | {metrics['commits_per_fare']:.3f} | - | -")
+        else:
+            print(f"{case} | - | - | {metrics['p50_ms']:.2f} | {metrics['p99_ms']:.2f}")
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results, parameters)
+        print(f"\nBaseline saved to {path}")
+
+    if args.check:
+        regressions = compare_to_baseline(
+            BASELINE_NAME, results, parameters,
+            higher_is_better=["fares_per_sec"],
+            lower_is_better=["commits_per_fare", "p50_ms", "p99_ms"],
+            tolerance=args.tolerance
+        )
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
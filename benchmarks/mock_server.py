@@ -0,0 +1,233 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+ENDPOINT = "/api/routepricing/v3/searchfares/GetAllFaresByDate"
+
+
+@dataclass
+class MockServerConfig:
+    """Behaviour of the mock EasyJet server."""
+    # Response latency: uniform in [latency, latency + jitter] seconds
+    latency: float = 0.05
+    jitter: float = 0.02
+
+    # Share of requests delayed by slow_latency extra seconds (tail latency)
+    slow_rate: float = 0.0
+    slow_latency: float = 1.0
+
+    # Share of requests answered with a 500 error
+    error_rate: float = 0.0
+
+    # Every burst_every requests, the next burst_length get a 429
+    burst_every: int = 0
+    burst_length: int = 0
+
+    # Fares returned per route and date
+    min_fares: int = 1
+    max_fares: int = 4
+
+    seed: int = 42
+
+
+def generate_fares(departure: str, arrival: str, date: str,
+                   config: MockServerConfig) -> List[dict]:
+    """
+    Builds a deterministic list of fares shaped like a GetAllFaresByDate response.
+    The same route and date always yield the same schedule and prices.
+    """
+    rng = random.Random(f"{config.seed}:{departure}:{arrival}:{date}")
+    day = datetime.strptime(date, "%Y-%m-%d")
+    duration = timedelta(minutes=rng.randint(60, 180))
+
+    fares = []
+    for _ in range(rng.randint(config.min_fares, config.max_fares)):
+        departure_time = day + timedelta(minutes=5 * rng.randint(72, 270))
+        outbound = round(rng.uniform(25, 250), 2)
+        fares.append({
+            "flightNumber": str(rng.randint(1000, 9999)),
+            "departureAirport": departure,
+            "arrivalAirport": arrival,
+            "arrivalCountry": "ITA",
+            "outboundPrice": outbound,
+            "returnPrice": round(outbound * rng.uniform(0.8, 1.2), 2),
+            "departureDateTime": departure_time.isoformat(),
+            "arrivalDateTime": (departure_time + duration).isoformat()
+        })
+    return sorted(fares, key=lambda fare: fare["departureDateTime"])
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out or hedge close connections early
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockEasyJetServer:
+    """
+    Local stand-in for the GetAllFaresByDate endpoint.
+    Runs a threaded HTTP server in the background, e.g.:
+
+        with MockEasyJetServer(MockServerConfig(latency=0.02)) as server:
+            config.base_url = server.url
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockServerConfig()
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._httpd = _Server((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Full URL of the fares endpoint."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{ENDPOINT}"
+
+    def start(self) -> 'MockEasyJetServer':
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and waits for the background thread."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'MockEasyJetServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _next_status(self) -> int:
+        """Decides the status of the next request (200, 429 or 500)."""
+        config = self.config
+        with self._lock:
+            count = self.requests_served
+            self.requests_served += 1
+            roll = self._rng.random()
+
+        if config.burst_every and config.burst_length:
+            if count % (config.burst_every + config.burst_length) >= config.burst_every:
+                return 429
+        if roll < config.error_rate:
+            return 500
+        return 200
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != ENDPOINT:
+                    self._reply(404, {"error": "not found"})
+                    return
+
+                config = server.config
+                delay = config.latency + server._rng.random() * config.jitter
+                if server._rng.random() < config.slow_rate:
+                    delay += config.slow_latency
+                time.sleep(delay)
+
+                status = server._next_status()
+                if status != 200:
+                    self._reply(status, {"error": "Too Many Requests" if status == 429 else "Internal Server Error"})
+                    return
+
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                try:
+                    # Date ranges return the fares of every date in the range
+                    day = datetime.strptime(params["departureDateFrom"], "%Y-%m-%d")
+                    last = datetime.strptime(params.get("departureDateTo", params["departureDateFrom"]), "%Y-%m-%d")
+                    fares = []
+                    while day <= last:
+                        fares.extend(generate_fares(
+                            params["departureAirport"],
+                            params["arrivalAirport"],
+                            day.strftime("%Y-%m-%d"),
+                            config
+                        ))
+                        day += timedelta(days=1)
+                except (KeyError, ValueError) as e:
+                    self._reply(400, {"error": f"invalid query: {str(e)}"})
+                    return
+                self._reply(200, fares)
+
+            def _reply(self, status: int, payload) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep benchmark output clean
+                pass
+
+        return Handler
+
+
+def main():
+    """Runs the mock server in the foreground."""
+    parser = argparse.ArgumentParser(
+        description="Local mock of the EasyJet GetAllFaresByDate endpoint",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests with extra latency")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra latency of slow requests in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--burst-every", type=int, default=0, help="Requests between 429 bursts")
+    parser.add_argument("--burst-length", type=int, default=0, help="Length of each 429 burst")
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length
+    )
+    server = MockEasyJetServer(config, port=args.port)
+    print(f"Serving mock EasyJet API at {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import hashlib
+import math
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from src.database import open_session
+from src.database.ingest import BulkIngestor
+from src.scraper.models import APIResponse, FlightFare
+
+from benchmarks.common import percentile
+
+# Airports used to build synthetic routes, with their country codes
+AIRPORTS = [
+    ("ZRH", "CHE"), ("GVA", "CHE"), ("BSL", "CHE"), ("FCO", "ITA"), ("MXP", "ITA"),
+    ("NAP", "ITA"), ("VCE", "ITA"), ("CTA", "ITA"), ("LGW", "GBR"), ("LTN", "GBR"),
+    ("MAN", "GBR"), ("BRS", "GBR"), ("EDI", "GBR"), ("CDG", "FRA"), ("ORY", "FRA"),
+    ("NCE", "FRA"), ("LYS", "FRA"), ("BCN", "ESP"), ("MAD", "ESP"), ("PMI", "ESP"),
+    ("AGP", "ESP"), ("LIS", "PRT"), ("OPO", "PRT"), ("FAO", "PRT"), ("AMS", "NLD"),
+    ("BER", "DEU"), ("HAM", "DEU"), ("ATH", "GRC"), ("HER", "GRC"), ("SPU", "HRV"),
+]
+
+# Relative price step between EasyJet-style fare buckets
+BUCKET_STEP = math.log(1.08)
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape and volume of the generated fare stream."""
+    seed: int = 1
+    routes: int = 50
+    horizon_days: int = 90      # Departure dates covered by each crawl round
+    history_days: int = 30      # Length of the simulated crawl history
+    polls_per_day: int = 4      # Crawl rounds per day
+    min_flights: int = 1        # Flights per route and day
+    max_flights: int = 4
+    start: datetime = datetime(2025, 1, 1)
+
+    @property
+    def rounds(self) -> int:
+        return self.history_days * self.polls_per_day
+
+    @property
+    def responses(self) -> int:
+        return self.rounds * self.routes * self.horizon_days
+
+
+@dataclass
+class _SyntheticRoute:
+    index: int
+    departure: str
+    arrival: str
+    country: str
+    base_price: float
+    # (departure minute of day, flight number, duration in minutes)
+    schedule: List[Tuple[int, str, int]]
+
+
+class SyntheticFareGenerator:
+    """
+    Deterministic generator of realistic fare streams.
+
+    Each crawl round searches every route for every date in the horizon, like
+    the real crawler. Prices follow a booking curve (cheap far out, rising
+    steeply in the last weeks), weekday effects and per-flight offsets, and
+    move in discrete fare buckets, so most consecutive observations repeat
+    the previous price. The same seed always yields the same stream.
+    """
+
+    def __init__(self, config: Optional[SyntheticConfig] = None):
+        self.config = config or SyntheticConfig()
+        self.routes = self._build_routes()
+
+    def _uniform(self, *key: int) -> float:
+        """
+        Deterministic uniform number in [0, 1) for an integer key. The key is
+        hashed with BLAKE2b rather than hash(), whose values are not
+        guaranteed across Python versions and platforms.
+        """
+        packed = struct.pack(f"<{len(key) + 1}q", self.config.seed, *key)
+        digest = hashlib.blake2b(packed, digest_size=8).digest()
+        return (int.from_bytes(digest, "little") >> 11) / (1 << 53)
+
+    def _build_routes(self) -> List[_SyntheticRoute]:
+        """Picks distinct airport pairs and gives each a base price and schedule."""
+        config = self.config
+        pairs = [(dep, arr) for dep in AIRPORTS for arr in AIRPORTS if dep[0] != arr[0]]
+        step = max(1, len(pairs) // max(config.routes, 1))
+        offset = config.seed % step
+
+        routes = []
+        for index in range(config.routes):
+            (departure, _), (arrival, country) = pairs[(offset + index * step) % len(pairs)]
+            flights = config.min_flights + int(
+                self._uniform(index, 1) * (config.max_flights - config.min_flights + 1)
+            )
+            duration = 60 + int(self._uniform(index, 2) * 150)
+            schedule = sorted(
+                (6 * 60 + int(self._uniform(index, 3, f) * 16 * 12) * 5,
+                 str(1000 + (index * 7 + f * 3) % 9000),
+                 duration)
+                for f in range(flights)
+            )
+            routes.append(_SyntheticRoute(
+                index=index,
+                departure=departure,
+                arrival=arrival,
+                country=country,
+                base_price=30 + self._uniform(index, 4) * 90,
+                schedule=schedule
+            ))
+        return routes
+
+    def price(self, route: _SyntheticRoute, flight: int,
+              departure: datetime, observed: datetime) -> Tuple[float, float]:
+        """
+        Computes outbound and return prices of a flight as seen at a given time.
+
+        Returns:
+            tuple: (outbound price, return price)
+        """
+        days_before = max((departure - observed).total_seconds() / 86400, 0.0)
+        curve = 0.75 + 1.8 * math.exp(-days_before / 18)
+        weekday = 1.2 if departure.weekday() in (4, 6) else 1.0
+        ordinal = departure.toordinal()
+        flight_factor = 0.85 + 0.3 * self._uniform(route.index, flight, ordinal)
+
+        # Occasional demand shocks move the fare one bucket for a day
+        day_index = observed.toordinal()
+        shock = self._uniform(route.index, flight, ordinal, day_index)
+        bucket_shift = -1 if shock < 0.08 else (1 if shock > 0.92 else 0)
+
+        raw = route.base_price * curve * weekday * flight_factor
+        bucket = round(math.log(raw) / BUCKET_STEP) + bucket_shift
+        outbound = math.floor(math.exp(bucket * BUCKET_STEP)) + 0.99
+        ret = math.floor(outbound * (0.9 + 0.2 * self._uniform(route.index, flight, ordinal, 7))) + 0.49
+        return outbound, ret
+
+    def responses(self) -> Iterator[APIResponse]:
+        """Yields one API response per route and departure date, round by round."""
+        config = self.config
+        poll_every = timedelta(hours=24 / config.polls_per_day)
+
+        for round_index in range(config.rounds):
+            observed = config.start + round_index * poll_every
+            first_day = datetime.combine(observed.date() + timedelta(days=1), datetime.min.time())
+
+            for route in self.routes:
+                for day in range(config.horizon_days):
+                    date = first_day + timedelta(days=day)
+                    fares = []
+                    for flight, (minute, number, duration) in enumerate(route.schedule):
+                        departure = date + timedelta(minutes=minute)
+                        outbound, ret = self.price(route, flight, departure, observed)
+                        fares.append(FlightFare(
+                            flight_number=number,
+                            departure_airport=route.departure,
+                            arrival_airport=route.arrival,
+                            arrival_country=route.country,
+                            outbound_price=outbound,
+                            return_price=ret,
+                            departure_datetime=departure,
+                            arrival_datetime=departure + timedelta(minutes=duration)
+                        ))
+                    yield APIResponse(
+                        url=f"synthetic://{route.departure}-{route.arrival}/{date:%Y-%m-%d}",
+                        status_code=200,
+                        data=fares,
+                        departure_airport=route.departure,
+                        arrival_airport=route.arrival,
+                        fetched_at=observed,
+                        currency="EUR"
+                    )
+
+
+def seed_database(generator: SyntheticFareGenerator,
+                  database_url: Optional[str] = None,
+                  batch_size: int = 5000,
+                  limit: Optional[int] = None) -> dict:
+    """
+    Bulk-loads the synthetic stream into a database.
+
+    Args:
+        generator: Source of responses
+        database_url: Target database (defaults to the application database)
+        batch_size: Fares per bulk insert batch
+        limit: Maximum number of responses to load
+
+    Returns:
+        dict: Rows written and throughput
+    """
+    db = open_session(database_url)
+    started = time.perf_counter()
+    try:
+        with BulkIngestor(db, batch_size=batch_size) as ingestor:
+            for count, response in enumerate(generator.responses(), start=1):
+                ingestor.add(response)
+                if count % 10_000 == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"{count} responses, {ingestor.snapshots_written / elapsed:.0f} snapshots/s")
+                if limit and count >= limit:
+                    break
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "responses": ingestor.responses_written,
+        "snapshots": ingestor.snapshots_written,
+        "seconds": elapsed,
+        "snapshots_per_sec": ingestor.snapshots_written / elapsed if elapsed else 0.0
+    }
+
+
+def soak(generator: SyntheticFareGenerator,
+         rate: float,
+         duration: float,
+         database_url: Optional[str] = None,
+         report_every: float = 10.0) -> dict:
+    """
+    Drives APIResponse.save_to_db at a target rate, as a crawler would,
+    and reports achieved throughput and save latency over time.
+
+    Args:
+        generator: Source of responses
+        rate: Target responses per second
+        duration: Length of the soak test in seconds
+        database_url: Target database (defaults to the application database)
+        report_every: Seconds between progress reports
+
+    Returns:
+        dict: Totals and latency percentiles over the whole run
+    """
+    db = open_session(database_url)
+    latencies: List[float] = []
+    window: List[float] = []
+    started = time.perf_counter()
+    next_report = started + report_every
+    saved = 0
+
+    try:
+        for response in generator.responses():
+            # Pace to the target rate
+            due = started + saved / rate
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+            if now - started >= duration:
+                break
+
+            begin = time.perf_counter()
+            response.save_to_db(db)
+            latency = (time.perf_counter() - begin) * 1000
+            latencies.append(latency)
+            window.append(latency)
+            saved += 1
+
+            if time.perf_counter() >= next_report:
+                elapsed = time.perf_counter() - started
+                print(f"{elapsed:.0f}s: {saved / elapsed:.1f} responses/s, "
+                      f"p50 {percentile(window, 50):.1f} ms, p99 {percentile(window, 99):.1f} ms")
+                window = []
+                next_report += report_every
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "responses": saved,
+        "responses_per_sec": saved / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Deterministic synthetic fare generator for scale and soak tests",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("mode", choices=["seed", "soak", "generate"],
+                        help="seed: bulk-load a database, soak: drive save_to_db at a fixed rate, "
+                             "generate: only measure generation speed")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--routes", type=int, default=50, help="Number of routes")
+    parser.add_argument("--horizon-days", type=int, default=90, help="Departure dates per crawl round")
+    parser.add_argument("--history-days", type=int, default=30, help="Days of simulated crawling")
+    parser.add_argument("--polls-per-day", type=int, default=4, help="Crawl rounds per day")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many responses")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Fares per bulk insert batch")
+    parser.add_argument("--rate", type=float, default=20.0, help="Soak: target responses per second")
+    parser.add_argument("--duration", type=float, default=300.0, help="Soak: duration in seconds")
+    parser.add_argument("--database-url", default=None,
+                        help="Target database URL, e.g. sqlite:///synthetic.db (default: .env database)")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        seed=args.seed,
+        routes=args.routes,
+        horizon_days=args.horizon_days,
+        history_days=args.history_days,
+        polls_per_day=args.polls_per_day
+    )
+    generator = SyntheticFareGenerator(config)
+    print(f"Stream: {config.responses} responses over {config.rounds} crawl rounds")
+
+    if args.mode == "seed":
+        result = seed_database(generator, args.database_url, args.batch_size, args.limit)
+    elif args.mode == "soak":
+        result = soak(generator, args.rate, args.duration, args.database_url)
+    else:
+        started = time.perf_counter()
+        fares = 0
+        for count, response in enumerate(generator.responses(), start=1):
+            fares += len(response.data)
+            if args.limit and count >= args.limit:
+                break
+        elapsed = time.perf_counter() - started
+        result = {"fares": fares, "seconds": elapsed, "fares_per_sec": fares / elapsed}
+
+    for key, value in result.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,50 @@
 from pathlib import Path
 
+import argparse
 import logging
 from datetime import timedelta
+from typing import Iterator, List
 
 from src.scraper.api_client import EasyJetAPIClient
+from src.scraper.archive import RawResponseArchive
+from src.scraper.models import APIResponse
 from src.config import APIConfig
 from src.data_manager import DataManager
 from src.cli import parse_arguments, parse_date
+from src.database import get_db
+from src.search import search_anywhere, discover_routes
+from src.scheduler import AdaptivePollScheduler
+from src.profiling import profiler
+
+
+def fetch_responses(api_client: EasyJetAPIClient,
+                    args: argparse.Namespace,
+                    dates: List[str]) -> Iterator[APIResponse]:
+    """
+    Lazily fetches the responses of a run, one date (or fan-out) at a time,
+    so that each response can be saved and released before the next request.
+    """
+    if args.anywhere:
+        db = next(get_db())
+        try:
+            for date in dates:
+                if api_client.deadline_exceeded:
+                    logging.warning(f"Crawl deadline exceeded, skipping dates from {date}")
+                    break
+                result = search_anywhere(api_client, db, args.departure_airport, date,
+                                         max_workers=args.max_workers)
+                print(f"found flight{result.fares}")
+                yield from result.responses
+        finally:
+            db.close()
+    else:
+        for date in dates:
+            if api_client.deadline_exceeded:
+                logging.warning(f"Crawl deadline exceeded, skipping dates from {date}")
+                break
+            response = api_client.fetch_fares_for_date(date)
+            print(f"found flight{response.data}")
+            yield response
 
 
 def main():
@@ -18,41 +56,87 @@ def main():
     config = APIConfig.get_default_config(
         currency=args.currency,
         departure=args.departure_airport,
-        arrival=args.arrival_airport
+        arrival=args.arrival_airport,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        crawl_deadline=args.deadline * 60 if args.deadline else None,
+        hedge_percentile=args.hedge_percentile
     )
 
-    api_client = EasyJetAPIClient(config)
-    data_manager = DataManager()
-
-    # Parse and validate start date
-    try:
-        start = parse_date(args.start_date)
-    except ValueError as e:
-        logging.error(f"Invalid date format: {e}")
-        return
-    except Exception as e:
-        logging.error(f"An error occurred: {str(e)}")
-
-    # Generate dates
-    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d")
-             for i in range(args.days)]
-
-    # Fetch data for all dates
-    responses = []
-    for date in dates:
-        response = api_client.fetch_fares_for_date(date)
-        responses.append(response)
-        print(f"found flight{response.data}")
-
-    # Convert the output_dir string to a Path object
-    output_path = Path(args.output_dir)
-
-    # Create the directory if it doesn't exist
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Save results
-    data_manager.save_results(responses, str(args.output_dir))
-    logging.info(f"Data saved to {args.output_dir}")
+    if args.profile or args.profile_output or args.profile_cpu or args.profile_memory:
+        profiler.start(cpu=args.profile_cpu, memory=args.profile_memory)
+
+    archive = RawResponseArchive(args.archive_dir) if args.archive_dir else None
+    # Closed on exit, so the threads of hedged requests do not outlive the run
+    with EasyJetAPIClient(config, archive=archive) as api_client:
+        data_manager = DataManager()
+        scheduler = AdaptivePollScheduler(fixed_interval=timedelta(hours=args.poll_interval))
+
+        # Parse and validate start date
+        try:
+            start = parse_date(args.start_date)
+        except ValueError as e:
+            logging.error(f"Invalid date format: {e}")
+            return
+        except Exception as e:
+            logging.error(f"An error occurred: {str(e)}")
+
+        # Generate dates
+        dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d")
+                 for i in range(args.days)]
+
+        # Probe unknown destinations once so the route catalog learns them
+        if args.discover:
+            db = next(get_db())
+            try:
+                probe = discover_routes(api_client, db, args.departure_airport, dates[0],
+                                        max_workers=args.max_workers)
+            finally:
+                db.close()
+            data_manager.save_results(probe.responses, "discovery")
+
+        # Only fetch the dates whose adaptive schedule is due
+        if args.adaptive and not args.anywhere:
+            db = next(get_db())
+            try:
+                decisions = scheduler.plan(
+                    db, args.departure_airport, args.arrival_airport,
+                    [parse_date(date).date() for date in dates]
+                )
+            finally:
+                db.close()
+            dates = [decision.departure_date.strftime("%Y-%m-%d")
+                     for decision in decisions if decision.due]
+
+        # Convert the output_dir string to a Path object
+        output_path = Path(args.output_dir)
+
+        # Create the directory if it doesn't exist
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Fetch, parse and save each response as it arrives
+        responses = fetch_responses(api_client, args, dates)
+        data_manager.save_results(responses, str(args.output_dir))
+        logging.info(f"Data saved to {args.output_dir}")
+
+        # Reschedule the polled dates from their updated history
+        if args.adaptive and not args.anywhere:
+            db = next(get_db())
+            try:
+                scheduler.update(db, args.departure_airport, args.arrival_airport,
+                                 [parse_date(date).date() for date in dates])
+                report = scheduler.budget_report(db, args.departure_airport,
+                                                 args.arrival_airport, decisions)
+            finally:
+                db.close()
+            logging.info(report.summary())
+            print(report.summary())
+
+    if profiler.enabled:
+        profiler.stop()
+        print(profiler.summary())
+        if args.profile_output:
+            profiler.save(args.profile_output)
 
 
 if __name__ == "__main__":
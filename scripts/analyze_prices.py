@@ -0,0 +1,42 @@
+from src.analytics import PriceAnalytics
+from src.database import get_db
+
+
+def analyze_prices():
+    """
+    Prints a route comparison and the overall booking curve
+    computed from the stored price history.
+    """
+    db = next(get_db())
+    try:
+        analytics = PriceAnalytics()
+        snapshots = analytics.load(db)
+        print(f"Loaded {len(snapshots)} price snapshots")
+
+        print("\nRoute Comparison:")
+        print("Route | Flights | Observations | Min € | Median € | Max € | Volatility")
+        print("-" * 80)
+        for summary in analytics.compare_routes():
+            print(f"{summary['route']} | "
+                  f"{summary['flights']} | "
+                  f"{summary['observations']} | "
+                  f"€{summary['min']:.2f} | "
+                  f"€{summary['median']:.2f} | "
+                  f"€{summary['max']:.2f} | "
+                  f"{summary['volatility']:.3f}")
+
+        curve = analytics.booking_curve()
+        print("\nBooking Curve (days before departure):")
+        print("Days | Observations | Mean € | Median €")
+        print("-" * 80)
+        for days, count, mean, median in zip(curve["days"], curve["count"], curve["mean"], curve["p50"]):
+            print(f"{days} | {count} | €{mean:.2f} | €{median:.2f}")
+
+    except Exception as e:
+        print(f"Error analyzing prices: {str(e)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    analyze_prices()
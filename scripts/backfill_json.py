@@ -0,0 +1,37 @@
+import argparse
+import logging
+import os
+
+from src.backfill import Backfiller
+
+
+def backfill_json():
+    """
+    Imports JSON result files written by DataManager into the database.
+    Safe to re-run: finished files are skipped and interrupted ones resume.
+    """
+    parser = argparse.ArgumentParser(
+        description="Backfill saved JSON fare files into the database",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("paths", nargs="+", help="JSON files or directories to import")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Fares per bulk insert batch")
+    parser.add_argument("--database-url", default=None,
+                        help="Target database URL (default: .env database)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+    # Per-fare parse messages would drown the progress output
+    logging.getLogger("src.scraper.models").setLevel(logging.WARNING)
+
+    backfiller = Backfiller(args.database_url, workers=args.workers, batch_size=args.batch_size)
+    summary = backfiller.run(args.paths)
+
+    print(f"Files: {summary['files']} total, {summary['done']} imported, "
+          f"{summary['skipped']} already done, {summary['failed']} failed")
+    print(f"Imported {summary['responses']} responses, {summary['snapshots']} snapshots")
+
+
+if __name__ == "__main__":
+    backfill_json()
@@ -0,0 +1,65 @@
+import argparse
+import logging
+from datetime import timedelta
+
+from src.cli import get_default_start_date, parse_date
+from src.config import APIConfig
+from src.database import get_db
+from src.work_queue import CrawlQueue, CrawlWorker
+
+
+def crawl_queue():
+    """
+    Manages the shared crawl queue: enqueue searches, run a worker, show status.
+    Start as many workers as needed, on any host that can reach the database.
+    """
+    parser = argparse.ArgumentParser(
+        description="Distributed crawl through the crawl_work_items queue",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Queue searches for a route and date range")
+    enqueue.add_argument("--departure-airport", default="ZRH", help="Departure airport code")
+    enqueue.add_argument("--arrival-airport", default="FCO", help="Arrival airport code")
+    enqueue.add_argument("--start-date", default=get_default_start_date(), help="First date (YYYY-MM-DD)")
+    enqueue.add_argument("--days", type=int, default=3, help="Number of dates")
+    enqueue.add_argument("--currency", default="EUR", help="Currencies, comma separated")
+
+    work = subparsers.add_parser("work", help="Run a crawl worker")
+    work.add_argument("--worker-id", default=None, help="Worker identifier (default: host:pid)")
+    work.add_argument("--batch-size", type=int, default=10, help="Items claimed at a time")
+    work.add_argument("--lease-minutes", type=float, default=5.0, help="Lease duration in minutes")
+    work.add_argument("--exit-when-empty", action="store_true", help="Stop when the queue is drained")
+
+    subparsers.add_parser("status", help="Show item counts per status")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+
+    db = next(get_db())
+    try:
+        if args.command == "enqueue":
+            queue = CrawlQueue()
+            start = parse_date(args.start_date)
+            dates = [(start + timedelta(days=i)).date() for i in range(args.days)]
+            for currency in args.currency.split(","):
+                count = queue.enqueue(db, args.departure_airport, args.arrival_airport, dates, currency)
+                print(f"Queued {count} searches in {currency}")
+
+        elif args.command == "work":
+            queue = CrawlQueue(lease=timedelta(minutes=args.lease_minutes))
+            worker = CrawlWorker(queue, APIConfig.get_default_config(), args.worker_id, args.batch_size)
+            counts = worker.run(db, exit_when_empty=args.exit_when_empty)
+            print(f"Succeeded: {counts['succeeded']}, failed: {counts['failed']}")
+
+        else:
+            for status, count in sorted(CrawlQueue().status(db).items()):
+                print(f"{status}: {count}")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    crawl_queue()
@@ -0,0 +1,38 @@
+import argparse
+import os
+from datetime import timedelta
+
+from src.database import get_db
+from src.metrics import render_prometheus
+
+
+def export_metrics():
+    """
+    Writes the search telemetry in the Prometheus text format, e.g. for the
+    node_exporter textfile collector when the query service is not running.
+    """
+    parser = argparse.ArgumentParser(description="Export search telemetry as Prometheus metrics")
+    parser.add_argument("--window-minutes", type=float, default=60.0, help="Aggregation window in minutes")
+    parser.add_argument("--output", default=None, help="File to write (default: print to stdout)")
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        text = render_prometheus(db, timedelta(minutes=args.window_minutes))
+        if args.output:
+            # Write atomically so the collector never reads a partial file
+            temporary = f"{args.output}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temporary, args.output)
+        else:
+            print(text, end="")
+
+    except Exception as e:
+        print(f"Error exporting metrics: {str(e)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    export_metrics()
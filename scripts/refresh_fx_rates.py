@@ -0,0 +1,30 @@
+import argparse
+
+from src.database import get_db
+from src.fx import FxRateTable
+
+
+def refresh_fx_rates():
+    """
+    Downloads the ECB reference rates into the local fx_rates table,
+    unless the stored rates are less than a day old.
+    """
+    parser = argparse.ArgumentParser(description="Refresh the cached FX rate table")
+    parser.add_argument("--force", action="store_true", help="Download even if the rates are fresh")
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        table = FxRateTable()
+        stored = table.refresh(db, force=args.force)
+        table.load(db)
+        print(f"Stored {stored} new rates; {len(table.currencies)} currencies available")
+
+    except Exception as e:
+        print(f"Error refreshing FX rates: {str(e)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    refresh_fx_rates()
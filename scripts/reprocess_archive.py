@@ -0,0 +1,132 @@
+import argparse
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database import open_session
+from src.database.models import SearchOperation
+from src.database.ingest import BulkIngestor
+from src.scraper.archive import RawResponseArchive
+from src.scraper.models import APIResponse, FlightFare, parse_fares
+
+FetchKey = Tuple[str, str, date, datetime]
+
+
+def stored_fetches(db: Session,
+                   departure_airport: Optional[str],
+                   arrival_airport: Optional[str],
+                   date_from: Optional[str],
+                   date_to: Optional[str]) -> Set[FetchKey]:
+    """Returns the (route, searched date, fetch time) of the search operations already stored."""
+    query = select(SearchOperation.departure_airport, SearchOperation.arrival_airport,
+                   SearchOperation.departure_date, SearchOperation.timestamp)
+    if departure_airport:
+        query = query.where(SearchOperation.departure_airport == departure_airport)
+    if arrival_airport:
+        query = query.where(SearchOperation.arrival_airport == arrival_airport)
+    if date_from:
+        query = query.where(SearchOperation.departure_date >= datetime.strptime(date_from, "%Y-%m-%d").date())
+    if date_to:
+        query = query.where(SearchOperation.departure_date <= datetime.strptime(date_to, "%Y-%m-%d").date())
+    return {tuple(row) for row in db.execute(query)}
+
+
+def reprocess_archive():
+    """
+    Rebuilds database state from the raw response archive.
+    Every archived fetch becomes a search operation with its original fetch
+    time. Fetches already stored (same route, date and fetch time) are
+    skipped, so the command can be re-run against the same database.
+    Identical bodies are decompressed and parsed once while they stay in a
+    bounded LRU of parsed bodies. Fares that cannot be parsed are
+    quarantined with their search operation, as during scraping.
+    """
+    parser = argparse.ArgumentParser(
+        description="Rebuild flight fares and price snapshots from archived raw responses",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--archive-dir", default="data/archive", help="Archive root directory")
+    parser.add_argument("--departure-airport", default=None, help="Only this departure airport")
+    parser.add_argument("--arrival-airport", default=None, help="Only this arrival airport")
+    parser.add_argument("--date-from", default=None, help="Earliest searched date (YYYY-MM-DD)")
+    parser.add_argument("--date-to", default=None, help="Latest searched date (YYYY-MM-DD)")
+    parser.add_argument("--database-url", default=None,
+                        help="Target database URL (default: .env database)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Fares per bulk insert batch")
+    parser.add_argument("--cached-bodies", type=int, default=1024,
+                        help="Parsed response bodies kept in memory for reuse")
+    parser.add_argument("--dry-run", action="store_true", help="Parse only, do not write to the database")
+    args = parser.parse_args()
+
+    archive = RawResponseArchive(args.archive_dir)
+    # Parsed fares and rejected raw fares by body digest
+    parsed: "OrderedDict[str, Optional[Tuple[List[FlightFare], List[dict]]]]" = OrderedDict()
+    entries = archive.entries(args.departure_airport, args.arrival_airport, args.date_from, args.date_to)
+
+    db = None if args.dry_run else open_session(args.database_url)
+    started = time.perf_counter()
+    count = fares = bodies = skipped = 0
+    try:
+        stored = stored_fetches(db, args.departure_airport, args.arrival_airport,
+                                args.date_from, args.date_to) if db else set()
+        ingestor = BulkIngestor(db, batch_size=args.batch_size) if db else None
+        for entry in entries:
+            departure_date = datetime.strptime(entry.departure_date, "%Y-%m-%d").date()
+            key = (entry.departure_airport, entry.arrival_airport, departure_date, entry.fetched_datetime)
+            if key in stored:
+                skipped += 1
+                continue
+
+            if entry.digest in parsed:
+                parsed.move_to_end(entry.digest)
+                body = parsed[entry.digest]
+            else:
+                bodies += 1
+                try:
+                    rejected = []
+                    body = parse_fares(json.loads(archive.load(entry.digest)), rejected), rejected
+                except (OSError, ValueError) as e:
+                    print(f"Skipping unreadable object {entry.digest}: {str(e)}")
+                    body = None
+                parsed[entry.digest] = body
+                while len(parsed) > args.cached_bodies:
+                    parsed.popitem(last=False)
+            if body is None:
+                continue
+            data, rejected = body
+
+            count += 1
+            fares += len(data)
+            if ingestor:
+                ingestor.add(APIResponse(
+                    url=entry.url,
+                    status_code=entry.status_code,
+                    data=data,
+                    departure_airport=entry.departure_airport,
+                    arrival_airport=entry.arrival_airport,
+                    fetched_at=entry.fetched_datetime,
+                    currency=entry.currency,
+                    departure_date=departure_date,
+                    rejected=list(rejected)
+                ))
+        if ingestor:
+            ingestor.flush()
+
+        elapsed = time.perf_counter() - started
+        print(f"Reprocessed {count} responses ({bodies} bodies parsed, {skipped} already stored), "
+              f"{fares} fares in {elapsed:.1f}s ({fares / elapsed if elapsed else 0:.0f} fares/s)")
+
+    except Exception as e:
+        print(f"Error reprocessing archive: {str(e)}")
+    finally:
+        if db:
+            db.close()
+
+
+if __name__ == "__main__":
+    reprocess_archive()
@@ -0,0 +1,146 @@
+import argparse
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import func, select
+
+from src.database import open_session
+from src.database.models import QuarantinedRecord, SearchOperation
+from src.scraper.models import APIResponse, parse_fares
+
+
+def group_key(record: QuarantinedRecord) -> tuple:
+    """Records of the same fetch: linked by their search operation, otherwise by the fetch itself."""
+    if record.search_id is not None:
+        return ("search", record.search_id)
+    return ("fetch", record.url, record.departure_airport, record.arrival_airport,
+            record.departure_date, record.fetched_at, record.currency)
+
+
+def reprocess_quarantine():
+    """
+    Retries the quarantined fares and responses, oldest first.
+
+    Records of the same fetch are retried together. Their fares are added to
+    the search operation recorded for the fetch, or to a single new one with
+    the original fetch time if none was kept, so a fetch is never counted
+    twice. Records whose fares still fail to parse stay pending with their
+    attempt count and error updated; fares that fail to save again move to
+    new records that carry the attempt count over.
+    """
+    parser = argparse.ArgumentParser(
+        description="Retry saving quarantined fares and responses"
+    )
+    parser.add_argument("--limit", type=int, default=1000,
+                        help="Maximum number of records to retry")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which records would now parse")
+    args = parser.parse_args()
+
+    db = None
+    try:
+        db = open_session()
+        records = db.execute(
+            select(QuarantinedRecord)
+            .where(QuarantinedRecord.reprocessed_at.is_(None))
+            .order_by(QuarantinedRecord.created_at, QuarantinedRecord.id)
+            .limit(args.limit)
+        ).scalars().all()
+
+        groups: "OrderedDict[tuple, List[QuarantinedRecord]]" = OrderedDict()
+        for record in records:
+            groups.setdefault(group_key(record), []).append(record)
+
+        saved = failed = 0
+        for group in groups.values():
+            fares, parsed, invalid = [], [], []
+            for record in group:
+                rejected = []
+                record_fares = parse_fares(json.loads(record.payload), rejected)
+                if rejected:
+                    print(f"Record {record.id}: {len(rejected)} fares still invalid ({rejected[0]['error']})")
+                    invalid.append((record, rejected[0]["error"]))
+                else:
+                    fares.extend(record_fares)
+                    parsed.append(record)
+            failed += len(invalid)
+
+            if args.dry_run:
+                for record in parsed:
+                    print(f"Record {record.id}: {len(json.loads(record.payload))} fares would be saved")
+                saved += len(parsed)
+                continue
+
+            for record, error in invalid:
+                record.attempts += 1
+                record.error_message = error
+            if not parsed:
+                db.commit()
+                continue
+
+            first = group[0]
+            record_ids = [record.id for record in group]
+            parsed_ids = {record.id for record in parsed}
+            attempts = max(record.attempts for record in parsed) + 1
+            response = APIResponse(
+                url=first.url,
+                status_code=200,
+                data=fares,
+                departure_airport=first.departure_airport,
+                arrival_airport=first.arrival_airport,
+                fetched_at=first.fetched_at,
+                currency=first.currency,
+                departure_date=first.departure_date
+            )
+            search_op = db.get(SearchOperation, first.search_id) if first.search_id is not None else None
+            db.commit()
+            last_id = db.execute(select(func.max(QuarantinedRecord.id))).scalar() or 0
+
+            try:
+                search_op = response.save_to_db(db, search_op)
+            except Exception as e:
+                db.rollback()
+                for record_id in parsed_ids:
+                    record = db.get(QuarantinedRecord, record_id)
+                    record.attempts += 1
+                    record.error_message = str(e)
+                db.commit()
+                print(f"Records {record_ids}: {str(e)}")
+                failed += len(parsed)
+                continue
+
+            now = datetime.utcnow()
+            for record_id in record_ids:
+                record = db.get(QuarantinedRecord, record_id)
+                # Link the records still pending to the fetch's search operation
+                record.search_id = search_op.id
+                if record_id in parsed_ids:
+                    record.reprocessed_at = now
+            requarantined = db.execute(
+                select(QuarantinedRecord)
+                .where(QuarantinedRecord.id > last_id, QuarantinedRecord.search_id == search_op.id)
+            ).scalars().all()
+            for record in requarantined:
+                record.attempts = attempts
+            db.commit()
+
+            if requarantined:
+                print(f"Records {sorted(parsed_ids)}: {len(requarantined)} records quarantined again")
+                failed += len(parsed)
+            else:
+                saved += len(parsed)
+
+        action = "would be saved" if args.dry_run else "saved"
+        print(f"Retried {len(records)} quarantined records: {saved} {action}, {failed} failed")
+
+    except Exception as e:
+        print(f"Error reprocessing quarantine: {str(e)}")
+    finally:
+        if db:
+            db.close()
+
+
+if __name__ == "__main__":
+    reprocess_quarantine()
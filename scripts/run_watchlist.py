@@ -0,0 +1,78 @@
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from src.config import APIConfig, DEFAULT_CURRENCY
+from src.data_manager import DataManager
+from src.database import get_db
+from src.fx import FxRateTable
+from src.scraper.models import APIResponse, FlightFare
+from src.watchlist import WatchlistPlanner, load_subscriptions
+
+
+def run_watchlist():
+    """
+    Fetches all watchlist subscriptions with a single merged plan, saves the
+    responses once and writes one file of matching fares per subscriber.
+    """
+    parser = argparse.ArgumentParser(description="Fetch watchlist subscriptions with a deduplicated plan")
+    parser.add_argument("subscriptions", help="JSON file with the subscriptions")
+    parser.add_argument("--max-window-days", type=int, default=7, help="Longest date range fetched per request")
+    parser.add_argument("--output-dir", default="data", help="Directory for output files")
+    parser.add_argument("--no-db", action="store_true", help="Disable database storage")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the fetch plan")
+    args = parser.parse_args()
+    if args.max_window_days < 1:
+        parser.error("--max-window-days must be at least 1")
+
+    subscriptions = load_subscriptions(args.subscriptions)
+    planner = WatchlistPlanner(args.max_window_days)
+    windows = planner.plan(subscriptions)
+
+    print(planner.savings(subscriptions, windows))
+    for window in windows:
+        print(f"  {window.departure_airport}-{window.arrival_airport} "
+              f"{window.date_from} .. {window.date_to} for {', '.join(window.subscribers)}")
+    if args.dry_run:
+        return
+
+    # Fares are fetched once in the default currency and converted per subscriber
+    fx_rates = None
+    if any(subscription.currency != DEFAULT_CURRENCY for subscription in subscriptions):
+        db = next(get_db())
+        try:
+            fx_rates = FxRateTable()
+            fx_rates.refresh(db)
+            fx_rates.load(db)
+        finally:
+            db.close()
+
+    results: Dict[str, List[FlightFare]] = defaultdict(list)
+
+    def fan_out(responses: Iterator[APIResponse]) -> Iterator[APIResponse]:
+        for response in responses:
+            planner.fan_out(subscriptions, response, results, fx_rates)
+            yield response
+
+    data_manager = DataManager(args.output_dir, use_db=not args.no_db)
+    responses = planner.fetch(windows, APIConfig.get_default_config())
+    try:
+        data_manager.save_results(fan_out(responses))
+    finally:
+        # Closes the API client even if saving stopped early
+        responses.close()
+
+    watchlist_dir = Path(args.output_dir) / "watchlist"
+    watchlist_dir.mkdir(parents=True, exist_ok=True)
+    for subscriber in sorted({subscription.subscriber for subscription in subscriptions}):
+        fares = sorted(results[subscriber], key=lambda fare: (fare.departure_datetime, fare.outbound_price))
+        path = watchlist_dir / f"{subscriber}.json"
+        with path.open("w", encoding="utf-8") as f:
+            json.dump([fare.to_dict() for fare in fares], f, indent=2, ensure_ascii=False)
+        print(f"{subscriber}: {len(fares)} fares -> {path}")
+
+
+if __name__ == "__main__":
+    run_watchlist()
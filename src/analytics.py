@@ -0,0 +1,397 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from src.config import DEFAULT_CURRENCY
+from src.database.models import Airport, Flight, PriceSnapshot, Route, SearchOperation
+from src.fx import FxRateTable
+
+logger = logging.getLogger(__name__)
+
+# Column layout of the cached snapshot arrays
+_COLUMNS = {
+    "snapshot_id": np.int64,
+    "flight_id": np.int64,
+    "route_id": np.int64,
+    "observed_at": np.int64,   # Unix seconds
+    "departure": np.int64,     # Unix seconds
+    "outbound_price": np.float64,
+    "return_price": np.float64,
+    "currency": "<U3",
+}
+
+SECONDS_PER_DAY = 86400
+
+
+@dataclass
+class SnapshotArrays:
+    """
+    Column-oriented view of the price history, one array per column.
+    Row i of every array describes the same price snapshot.
+    """
+    snapshot_id: np.ndarray
+    flight_id: np.ndarray
+    route_id: np.ndarray
+    observed_at: np.ndarray
+    departure: np.ndarray
+    outbound_price: np.ndarray
+    return_price: np.ndarray
+    currency: np.ndarray
+
+    @classmethod
+    def empty(cls) -> 'SnapshotArrays':
+        """Creates a set of zero-length arrays."""
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS.items()})
+
+    def __len__(self) -> int:
+        return len(self.snapshot_id)
+
+    @property
+    def days_before_departure(self) -> np.ndarray:
+        """Days between each observation and the flight's departure."""
+        return (self.departure - self.observed_at) / SECONDS_PER_DAY
+
+    def select(self, mask: np.ndarray) -> 'SnapshotArrays':
+        """Returns the rows selected by a boolean mask or index array."""
+        return SnapshotArrays(**{name: getattr(self, name)[mask] for name in _COLUMNS})
+
+    def concat(self, other: 'SnapshotArrays') -> 'SnapshotArrays':
+        """Appends the rows of another set of arrays."""
+        return SnapshotArrays.concat_all([self, other])
+
+    @classmethod
+    def concat_all(cls, parts: Sequence['SnapshotArrays']) -> 'SnapshotArrays':
+        """Joins any number of sets of arrays, copying each column once."""
+        if not parts:
+            return cls.empty()
+        return cls(**{
+            name: np.concatenate([getattr(part, name) for part in parts])
+            for name in _COLUMNS
+        })
+
+
+class PriceAnalytics:
+    """
+    Vectorized analysis of the stored price history.
+
+    Snapshots are loaded in bulk into NumPy arrays and cached on disk, one
+    file per database. Later runs only fetch snapshots committed after the
+    cached ones, in commit sequence order, so late and backfilled snapshots
+    are picked up and the database is read once no matter how many analyses
+    are run. Prices are cached in the
+    currency they were fetched in and converted to one currency on load, at
+    the FX rate of each observation, so all statistics compare like with like.
+    """
+
+    def __init__(self,
+                 cache_dir: str = "data/cache",
+                 chunk_size: int = 100_000,
+                 currency: str = DEFAULT_CURRENCY):
+        """
+        Args:
+            cache_dir: Directory for the cached arrays
+            chunk_size: Rows fetched per database round trip
+            currency: Currency all prices are converted to
+        """
+        self.cache_dir = Path(cache_dir)
+        self.chunk_size = chunk_size
+        self.currency = currency
+        self.arrays = SnapshotArrays.empty()
+        self.route_names: Dict[int, str] = {}
+
+    def load(self, db: Session, use_cache: bool = True) -> SnapshotArrays:
+        """
+        Loads the price history, reusing and extending the on-disk cache.
+
+        Args:
+            db: SQLAlchemy database session
+            use_cache: Whether to read and update the on-disk cache
+
+        Returns:
+            SnapshotArrays: All snapshots, in commit order, with prices
+            converted to the analytics currency
+        """
+        cache_path = self._cache_path(db)
+        arrays, last_commit_seq = self._read_cache(cache_path) if use_cache else (SnapshotArrays.empty(), 0)
+
+        fresh, last_commit_seq = self._fetch_since(db, last_commit_seq)
+        if len(fresh):
+            arrays = arrays.concat(fresh)
+            if use_cache:
+                self._write_cache(cache_path, arrays, last_commit_seq)
+
+        logger.info(f"Loaded {len(arrays)} snapshots ({len(fresh)} new)")
+        self.arrays = self._convert(db, arrays)
+        self.route_names = self._load_route_names(db)
+        return self.arrays
+
+    def _convert(self, db: Session, arrays: SnapshotArrays) -> SnapshotArrays:
+        """Converts prices to the analytics currency at the rate of each observation."""
+        foreign = arrays.currency != self.currency
+        if not foreign.any():
+            return arrays
+
+        fx_rates = FxRateTable().load(db)
+        factors = np.ones(len(arrays))
+        for currency in np.unique(arrays.currency[foreign]):
+            rows = np.flatnonzero(arrays.currency == currency)
+            factors[rows] = fx_rates.rates(str(currency), self.currency, arrays.observed_at[rows])
+
+        converted = SnapshotArrays(**{name: getattr(arrays, name) for name in _COLUMNS})
+        converted.outbound_price = arrays.outbound_price * factors
+        converted.return_price = arrays.return_price * factors
+        converted.currency = np.full(len(arrays), self.currency, dtype=_COLUMNS["currency"])
+        return converted
+
+    def _fetch_since(self, db: Session, last_commit_seq: int) -> Tuple[SnapshotArrays, int]:
+        """
+        Fetches the snapshots committed after last_commit_seq, in chunks.
+        Returns them with the commit sequence to resume from next time.
+        """
+        query = (
+            select(
+                SearchOperation.commit_seq,
+                PriceSnapshot.id,
+                PriceSnapshot.flight_id,
+                Flight.route_id,
+                PriceSnapshot.timestamp,
+                Flight.departure_datetime,
+                PriceSnapshot.outbound_price,
+                PriceSnapshot.return_price,
+                PriceSnapshot.currency
+            )
+            .join(Flight, PriceSnapshot.flight_id == Flight.id)
+            .join(SearchOperation, PriceSnapshot.search_id == SearchOperation.id)
+            .where(SearchOperation.commit_seq > last_commit_seq)
+            .order_by(SearchOperation.commit_seq, PriceSnapshot.id)
+        )
+
+        chunks = []
+        result = db.execute(query.execution_options(yield_per=self.chunk_size))
+        for rows in result.partitions(self.chunk_size):
+            commit_seqs, ids, flights, routes, observed, departures, outbound, returns, currencies = zip(*rows)
+            last_commit_seq = commit_seqs[-1]
+            chunks.append(SnapshotArrays(
+                snapshot_id=np.array(ids, dtype=np.int64),
+                flight_id=np.array(flights, dtype=np.int64),
+                route_id=np.array(routes, dtype=np.int64),
+                observed_at=np.array(observed, dtype="datetime64[s]").astype(np.int64),
+                departure=np.array(departures, dtype="datetime64[s]").astype(np.int64),
+                outbound_price=np.array(outbound, dtype=np.float64),
+                return_price=np.array(returns, dtype=np.float64),
+                currency=np.array(currencies, dtype=_COLUMNS["currency"])
+            ))
+
+        return SnapshotArrays.concat_all(chunks), last_commit_seq
+
+    def _cache_path(self, db: Session) -> Path:
+        """Cache file of the session's database, so databases never share arrays."""
+        url = db.get_bind().engine.url.render_as_string(hide_password=True)
+        return self.cache_dir / f"price_snapshots_{hashlib.sha256(url.encode()).hexdigest()[:16]}.npz"
+
+    def _read_cache(self, path: Path) -> Tuple[SnapshotArrays, int]:
+        """Reads cached arrays and their last commit sequence, falling back to empty arrays if unavailable."""
+        if not path.exists():
+            return SnapshotArrays.empty(), 0
+        try:
+            with np.load(path) as cached:
+                return SnapshotArrays(**{name: cached[name] for name in _COLUMNS}), int(cached["last_commit_seq"])
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable analytics cache: {str(e)}")
+            return SnapshotArrays.empty(), 0
+
+    def _write_cache(self, path: Path, arrays: SnapshotArrays, last_commit_seq: int) -> None:
+        """Writes arrays and the commit sequence they cover to the cache atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, last_commit_seq=np.int64(last_commit_seq),
+                 **{name: getattr(arrays, name) for name in _COLUMNS})
+        tmp_path.replace(path)
+
+    def _load_route_names(self, db: Session) -> Dict[int, str]:
+        """Maps route ids to "DEP-ARR" labels."""
+        dep_airport = aliased(Airport)
+        arr_airport = aliased(Airport)
+        rows = (
+            db.query(Route.id, dep_airport.iata_code, arr_airport.iata_code)
+            .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+            .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+            .all()
+        )
+        return {route_id: f"{dep}-{arr}" for route_id, dep, arr in rows}
+
+    def _subset(self, route_id: Optional[int]) -> SnapshotArrays:
+        """Restricts the loaded arrays to one route, if given."""
+        if route_id is None:
+            return self.arrays
+        return self.arrays.select(self.arrays.route_id == route_id)
+
+    def booking_curve(self,
+                      route_id: Optional[int] = None,
+                      max_days: int = 180,
+                      percentiles: Sequence[float] = (25, 50, 75)) -> Dict[str, np.ndarray]:
+        """
+        Computes outbound price against days before departure.
+
+        Args:
+            route_id: Restrict to one route (default: all routes)
+            max_days: Ignore observations made earlier than this
+            percentiles: Percentiles to compute for each day
+
+        Returns:
+            dict: "days", "count", "mean" arrays, plus one "pXX" array per percentile
+        """
+        data = self._subset(route_id)
+        days = np.floor(data.days_before_departure).astype(np.int64)
+        mask = (days >= 0) & (days <= max_days)
+        days, prices = days[mask], data.outbound_price[mask]
+
+        counts = np.bincount(days, minlength=max_days + 1)
+        sums = np.bincount(days, weights=prices, minlength=max_days + 1)
+        present = counts > 0
+
+        curve = {
+            "days": np.arange(max_days + 1)[present],
+            "count": counts[present],
+            "mean": sums[present] / counts[present],
+        }
+        grouped = _grouped_percentiles(days, prices, percentiles)
+        for q, values in zip(percentiles, grouped):
+            curve[f"p{q:g}"] = values
+        return curve
+
+    def volatility(self, route_id: Optional[int] = None, min_points: int = 3) -> Dict[str, np.ndarray]:
+        """
+        Computes per-flight volatility as the standard deviation of log price
+        changes between consecutive observations.
+
+        Args:
+            route_id: Restrict to one route (default: all routes)
+            min_points: Minimum number of observations for a flight to be included
+
+        Returns:
+            dict: "flight_id", "observations", "volatility" and "change_rate" arrays,
+            where change_rate is the share of observations where the price moved
+        """
+        data = self._subset(route_id)
+        order = np.lexsort((data.observed_at, data.flight_id))
+        flights = data.flight_id[order]
+        log_prices = np.log(np.maximum(data.outbound_price[order], 0.01))
+
+        same_flight = flights[1:] == flights[:-1]
+        changes = np.diff(log_prices)[same_flight]
+        change_flights = flights[1:][same_flight]
+
+        ids, observations = np.unique(flights, return_counts=True)
+        index = np.searchsorted(ids, change_flights)
+        n = np.bincount(index, minlength=len(ids))
+        total = np.bincount(index, weights=changes, minlength=len(ids))
+        squares = np.bincount(index, weights=changes ** 2, minlength=len(ids))
+        moved = np.bincount(index, weights=(changes != 0), minlength=len(ids))
+
+        keep = observations >= min_points
+        n_safe = np.maximum(n, 1)
+        variance = np.maximum(squares / n_safe - (total / n_safe) ** 2, 0.0)
+        return {
+            "flight_id": ids[keep],
+            "observations": observations[keep],
+            "volatility": np.sqrt(variance)[keep],
+            "change_rate": (moved / n_safe)[keep],
+        }
+
+    def percentiles(self,
+                    route_id: Optional[int] = None,
+                    q: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict[str, float]:
+        """
+        Computes outbound price percentiles.
+
+        Args:
+            route_id: Restrict to one route (default: all routes)
+            q: Percentiles to compute
+
+        Returns:
+            dict: Percentile label ("pXX") to price
+        """
+        prices = self._subset(route_id).outbound_price
+        if not len(prices):
+            return {}
+        values = np.percentile(prices, q)
+        return {f"p{p:g}": float(v) for p, v in zip(q, values)}
+
+    def compare_routes(self) -> List[dict]:
+        """
+        Summarizes each route: observations, flights, price statistics and
+        average per-flight volatility.
+
+        Returns:
+            List[dict]: One summary per route, cheapest median first
+        """
+        data = self.arrays
+        if not len(data):
+            return []
+
+        order = np.lexsort((data.outbound_price, data.route_id))
+        routes = data.route_id[order]
+        prices = data.outbound_price[order]
+        route_ids, starts, counts = np.unique(routes, return_index=True, return_counts=True)
+        medians = _sorted_group_percentile(prices, starts, counts, 50)
+
+        # Each flight belongs to exactly one route
+        flight_ids, first_rows = np.unique(data.flight_id, return_index=True)
+        flight_routes = np.searchsorted(route_ids, data.route_id[first_rows])
+        flights_per_route = np.bincount(flight_routes, minlength=len(route_ids))
+
+        vol = self.volatility(min_points=2)
+        vol_index = flight_routes[np.searchsorted(flight_ids, vol["flight_id"])]
+        vol_sum = np.bincount(vol_index, weights=vol["volatility"], minlength=len(route_ids))
+        vol_n = np.bincount(vol_index, minlength=len(route_ids))
+
+        summaries = [
+            {
+                "route_id": int(route_id),
+                "route": self.route_names.get(int(route_id), str(route_id)),
+                "observations": int(count),
+                "flights": int(flights),
+                "min": float(prices[start]),
+                "median": float(median),
+                "mean": float(prices[start:start + count].mean()),
+                "max": float(prices[start + count - 1]),
+                "volatility": float(v_sum / v_n) if v_n else 0.0,
+            }
+            for route_id, start, count, median, flights, v_sum, v_n in zip(
+                route_ids, starts, counts, medians, flights_per_route, vol_sum, vol_n
+            )
+        ]
+        return sorted(summaries, key=lambda summary: summary["median"])
+
+
+def _sorted_group_percentile(values: np.ndarray,
+                             starts: np.ndarray,
+                             counts: np.ndarray,
+                             q: float) -> np.ndarray:
+    """
+    Percentile of each group in an array sorted by (group, value),
+    using linear interpolation like np.percentile.
+    """
+    position = starts + (counts - 1) * (q / 100.0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, starts + counts - 1)
+    fraction = position - lower
+    return values[lower] * (1 - fraction) + values[upper] * fraction
+
+
+def _grouped_percentiles(groups: np.ndarray,
+                         values: np.ndarray,
+                         percentiles: Sequence[float]) -> List[np.ndarray]:
+    """Percentiles of values for each distinct group, groups in ascending order."""
+    if not len(values):
+        return [np.empty(0) for _ in percentiles]
+    order = np.lexsort((values, groups))
+    _, starts, counts = np.unique(groups[order], return_index=True, return_counts=True)
+    return [_sorted_group_percentile(values[order], starts, counts, q) for q in percentiles]
@@ -0,0 +1,247 @@
+import logging
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, insert, select, tuple_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from src.database.connection import dialect_insert
+from src.database.models import Flight, PriceAnomaly, PriceStat
+
+logger = logging.getLogger(__name__)
+
+# (scope, subject id, currency) of a statistics entry
+StatKey = Tuple[str, int, str]
+
+
+@dataclass
+class OnlineStats:
+    """
+    Exponentially weighted mean and variance, updated in O(1) per value.
+
+    The weight of a new value is max(1 / count, alpha): the first 1 / alpha
+    values are averaged equally (Welford's algorithm), later ones decay
+    exponentially, so the baseline follows the usual drift of fares towards
+    departure.
+    """
+    count: int = 0
+    mean: float = 0.0
+    variance: float = 0.0
+
+    def update(self, value: float, alpha: float) -> None:
+        self.count += 1
+        weight = max(1.0 / self.count, alpha)
+        delta = value - self.mean
+        self.mean += weight * delta
+        self.variance = (1.0 - weight) * (self.variance + weight * delta * delta)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class AnomalyDetector:
+    """
+    Flags unusual price drops and spikes as snapshots are ingested.
+
+    Statistics of the outbound price are kept in price_stats per flight and
+    per route (and currency), so no price history is queried. Each batch
+    locks the statistics it touches inside the ingest transaction, applies
+    its snapshots to the stored values and writes them back, so concurrent
+    ingest processes merge their updates instead of overwriting each other.
+    Each snapshot is compared with its flight's statistics, or with the
+    route's while the flight has fewer than min_samples observations, before
+    being added to both.
+
+    A detector belongs to one database: use detector_for() to get the one of
+    a session's engine. Only the routes of at most max_entries flights are
+    kept in memory, least recently used first out; they are dropped when the
+    session rolls back, as the flights may have been rolled back with it.
+    """
+
+    def __init__(self,
+                 alpha: float = 0.1,
+                 threshold: float = 3.0,
+                 min_samples: int = 5,
+                 min_change: float = 0.05,
+                 max_entries: int = 100000):
+        """
+        Args:
+            alpha: Weight of a new price once warmed up (1 / alpha observations)
+            threshold: Z-score from which a price is an anomaly
+            min_samples: Observations needed before a baseline is used
+            min_change: Minimum relative difference from the expected price,
+                so tiny changes of long flat series are not flagged
+            max_entries: Maximum number of flight routes kept in memory
+                between batches
+        """
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.min_change = min_change
+        self.max_entries = max_entries
+        self.anomalies_found = 0
+
+        self._flight_routes: "OrderedDict[int, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Drops the cached flight routes; they are reloaded on demand."""
+        with self._lock:
+            self._flight_routes.clear()
+
+    def _on_rollback(self, session: Session) -> None:
+        self.reset()
+
+    def observe(self, db: Session, snapshots: List[dict]) -> int:
+        """
+        Updates the statistics with a batch of snapshots and records
+        anomalies. Must run in the transaction that inserts the snapshots;
+        the touched statistics stay locked until the caller commits.
+
+        Args:
+            db: SQLAlchemy database session
+            snapshots: Snapshot rows (flight_id, search_id, timestamp,
+                outbound_price, currency)
+
+        Returns:
+            int: Number of anomalies recorded
+        """
+        if not snapshots:
+            return 0
+        if not event.contains(db, "after_rollback", self._on_rollback):
+            event.listen(db, "after_rollback", self._on_rollback)
+
+        routes = self._routes(db, {s["flight_id"] for s in snapshots})
+        keys = set()
+        for snapshot in snapshots:
+            keys.add(("flight", snapshot["flight_id"], snapshot["currency"]))
+            keys.add(("route", routes[snapshot["flight_id"]], snapshot["currency"]))
+        stats = self._lock_stats(db, keys)
+
+        anomalies = []
+        for snapshot in sorted(snapshots, key=lambda s: s["timestamp"]):
+            flight_key = ("flight", snapshot["flight_id"], snapshot["currency"])
+            route_key = ("route", routes[snapshot["flight_id"]], snapshot["currency"])
+            price = snapshot["outbound_price"]
+
+            anomaly = self._check(price, stats[flight_key][1], stats[route_key][1])
+            if anomaly is not None:
+                anomalies.append({
+                    "flight_id": snapshot["flight_id"],
+                    "search_id": snapshot["search_id"],
+                    "observed_at": snapshot["timestamp"],
+                    "price": price,
+                    "currency": snapshot["currency"],
+                    **anomaly
+                })
+
+            for key in (flight_key, route_key):
+                stats[key][1].update(price, self.alpha)
+
+        if anomalies:
+            db.execute(insert(PriceAnomaly), anomalies)
+            self.anomalies_found += len(anomalies)
+            logger.info(f"Recorded {len(anomalies)} price anomalies")
+        self._checkpoint(db, stats)
+        return len(anomalies)
+
+    def _check(self, price: float, flight_stats: OnlineStats, route_stats: OnlineStats) -> Optional[dict]:
+        """Compares a price with the flight's (or else the route's) statistics."""
+        for baseline, stats in (("flight", flight_stats), ("route", route_stats)):
+            if stats.count < self.min_samples:
+                continue
+
+            difference = price - stats.mean
+            if abs(difference) < self.min_change * abs(stats.mean):
+                return None
+            stddev = stats.stddev
+            z_score = difference / stddev if stddev > 0 else math.copysign(math.inf, difference)
+            if abs(z_score) < self.threshold:
+                return None
+            return {
+                "kind": "drop" if difference < 0 else "spike",
+                "baseline": baseline,
+                "expected_price": stats.mean,
+                "stddev": stddev,
+                # Flat series have no deviation: store the relative change instead
+                "z_score": z_score if math.isfinite(z_score) else difference / stats.mean
+            }
+        return None
+
+    def _routes(self, db: Session, flights: set) -> Dict[int, int]:
+        """Returns the route of each flight, loading those not in memory in one query."""
+        with self._lock:
+            missing = flights - self._flight_routes.keys()
+            if missing:
+                self._flight_routes.update(db.execute(
+                    select(Flight.id, Flight.route_id).where(Flight.id.in_(missing))
+                ).all())
+            for flight_id in flights:
+                self._flight_routes.move_to_end(flight_id)
+            routes = {flight_id: self._flight_routes[flight_id] for flight_id in flights}
+            while len(self._flight_routes) > self.max_entries:
+                self._flight_routes.popitem(last=False)
+        return routes
+
+    def _lock_stats(self, db: Session, keys: set) -> Dict[StatKey, Tuple[int, OnlineStats]]:
+        """
+        Creates the missing statistics rows of the given keys, then reads and
+        locks all of them (in key order, so concurrent batches cannot
+        deadlock), returning their ids and stored values.
+        """
+        ordered = sorted(keys)
+        now = datetime.utcnow()
+        db.execute(
+            dialect_insert(db, PriceStat).on_conflict_do_nothing(
+                index_elements=[PriceStat.scope, PriceStat.subject_id, PriceStat.currency]
+            ),
+            [
+                {"scope": scope, "subject_id": subject_id, "currency": currency,
+                 "count": 0, "mean": 0.0, "variance": 0.0, "updated_at": now}
+                for scope, subject_id, currency in ordered
+            ]
+        )
+        rows = db.execute(
+            select(PriceStat.id, PriceStat.scope, PriceStat.subject_id, PriceStat.currency,
+                   PriceStat.count, PriceStat.mean, PriceStat.variance)
+            .where(tuple_(PriceStat.scope, PriceStat.subject_id, PriceStat.currency).in_(ordered))
+            .order_by(PriceStat.scope, PriceStat.subject_id, PriceStat.currency)
+            .with_for_update()
+        )
+        return {
+            (scope, subject_id, currency): (stat_id, OnlineStats(count, mean, variance))
+            for stat_id, scope, subject_id, currency, count, mean, variance in rows
+        }
+
+    def _checkpoint(self, db: Session, stats: Dict[StatKey, Tuple[int, OnlineStats]]) -> None:
+        """Writes the merged statistics back to their (locked) price_stats rows."""
+        now = datetime.utcnow()
+        db.execute(update(PriceStat), [
+            {"id": stat_id, "count": values.count, "mean": values.mean,
+             "variance": values.variance, "updated_at": now}
+            for stat_id, values in stats.values()
+        ])
+
+
+# One detector per database, so statistics of different engines never mix
+_detectors: "weakref.WeakKeyDictionary[Engine, AnomalyDetector]" = weakref.WeakKeyDictionary()
+_detectors_lock = threading.Lock()
+
+
+def detector_for(db: Session) -> AnomalyDetector:
+    """Returns the anomaly detector of the session's engine, creating it on first use."""
+    engine = db.get_bind()
+    if not isinstance(engine, Engine):
+        engine = engine.engine
+    with _detectors_lock:
+        detector = _detectors.get(engine)
+        if detector is None:
+            detector = _detectors[engine] = AnomalyDetector()
+        return detector
@@ -0,0 +1,293 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.database import connection, open_session
+from src.database.ingest import BulkIngestor
+from src.database.models import BackfillFile
+from src.scraper.models import APIResponse, parse_fares
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(f: IO[str], chunk_size: int = 1 << 20) -> Iterator[object]:
+    """
+    Yields the elements of a top-level JSON array one at a time,
+    reading the file in chunks instead of loading it whole.
+
+    Args:
+        f: Text file positioned at the start of the array
+        chunk_size: Characters read per chunk
+
+    Yields:
+        Decoded array elements
+    """
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        if position >= len(buffer):
+            if started:
+                raise ValueError("Unexpected end of file inside JSON array")
+            return
+
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("File does not contain a JSON array")
+            started = True
+            position += 1
+            continue
+
+        if buffer[position] == "]":
+            return
+
+        try:
+            element, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Element spans past the buffer: read more and retry
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        yield element
+        position = end
+        if position > chunk_size:
+            buffer, position = buffer[position:], 0
+
+
+def response_from_saved(record: dict) -> APIResponse:
+    """
+    Rebuilds an APIResponse from a record written by DataManager._save_to_file.
+    The route is taken from the request URL and the fetch time from the
+    metadata (fetched_at when present, otherwise saved_at).
+    """
+    query = parse_qs(urlparse(record.get("url") or "").query)
+    metadata = record.get("metadata") or {}
+    timestamp = metadata.get("fetched_at") or metadata.get("saved_at")
+    rejected = []
+
+    return APIResponse(
+        url=record.get("url"),
+        status_code=record.get("status_code"),
+        data=parse_fares(record.get("data") or [], rejected),
+        error=record.get("error"),
+        departure_airport=query.get("departureAirport", [None])[0],
+        arrival_airport=query.get("arrivalAirport", [None])[0],
+        fetched_at=datetime.fromisoformat(timestamp) if timestamp else None,
+        currency=query.get("currency", [None])[0],
+        rejected=rejected
+    )
+
+
+def _init_worker() -> None:
+    """Drops database connections inherited from the parent process."""
+    connection.engine.dispose(close=False)
+
+
+# Session factories of other database URLs, so a worker process creates each engine once
+_session_factories: Dict[str, sessionmaker] = {}
+
+
+def _open_session(database_url: Optional[str] = None) -> Session:
+    """Opens a session like open_session, reusing the engine of other database URLs."""
+    if database_url is None:
+        return open_session()
+    if database_url not in _session_factories:
+        _session_factories[database_url] = sessionmaker(autocommit=False, autoflush=False,
+                                                        bind=open_session(database_url).get_bind())
+    return _session_factories[database_url]()
+
+
+def backfill_file(path: str,
+                  database_url: Optional[str] = None,
+                  batch_size: int = 5000) -> Tuple[str, int, int]:
+    """
+    Imports one saved result file, resuming after the responses already imported.
+    Progress is written in the same transaction as each batch.
+
+    Args:
+        path: Path of the JSON file
+        database_url: Target database (defaults to the application database)
+        batch_size: Fares per bulk insert batch
+
+    Returns:
+        tuple: (path, responses imported in this call, snapshots imported in this call)
+    """
+    db = _open_session(database_url)
+    try:
+        record = db.query(BackfillFile).filter(BackfillFile.path == path).one()
+        file_id, skip = record.id, record.responses_done
+        imported = {"responses": 0, "snapshots": 0}
+
+        def record_progress(session: Session, responses: List[APIResponse]) -> None:
+            snapshots = sum(len(response.data) for response in responses if response.is_successful)
+            imported["responses"] += len(responses)
+            imported["snapshots"] += snapshots
+            session.query(BackfillFile).filter(BackfillFile.id == file_id).update({
+                BackfillFile.responses_done: BackfillFile.responses_done + len(responses),
+                BackfillFile.snapshots_done: BackfillFile.snapshots_done + snapshots,
+                BackfillFile.updated_at: datetime.utcnow()
+            })
+
+        with open(path, encoding="utf-8") as f:
+            with BulkIngestor(db, batch_size=batch_size, on_flush=record_progress) as ingestor:
+                for index, element in enumerate(iter_json_array(f)):
+                    if index < skip:
+                        continue
+                    ingestor.add(response_from_saved(element))
+
+        db.query(BackfillFile).filter(BackfillFile.id == file_id).update({
+            BackfillFile.completed: True,
+            BackfillFile.error_message: None,
+            BackfillFile.updated_at: datetime.utcnow()
+        })
+        db.commit()
+        return path, imported["responses"], imported["snapshots"]
+
+    except Exception as e:
+        db.rollback()
+        db.query(BackfillFile).filter(BackfillFile.path == path).update({
+            BackfillFile.error_message: str(e)[:1000],
+            BackfillFile.updated_at: datetime.utcnow()
+        })
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+
+class Backfiller:
+    """
+    Imports saved JSON result files into the database in parallel.
+
+    Each file is streamed and ingested by a worker process with its own
+    connection. The backfill_files table records per-file progress, so the
+    command can be re-run safely: completed files are skipped and
+    interrupted files resume. Files that changed on disk after part of them
+    was imported are flagged and skipped, since importing them again would
+    duplicate the snapshots already saved.
+    """
+
+    def __init__(self,
+                 database_url: Optional[str] = None,
+                 workers: int = os.cpu_count() or 1,
+                 batch_size: int = 5000):
+        """
+        Args:
+            database_url: Target database (defaults to the application database)
+            workers: Number of worker processes
+            batch_size: Fares per bulk insert batch
+        """
+        self.database_url = database_url
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def discover(self, paths: List[str], pattern: str = "*.json") -> List[str]:
+        """Expands directories into the JSON files they contain, sorted."""
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(str(p.resolve()) for p in path.rglob(pattern))
+            elif path.is_file():
+                files.append(str(path.resolve()))
+        return sorted(set(files))
+
+    def pending(self, db: Session, files: List[str]) -> List[str]:
+        """
+        Registers files in the tracking table and returns those still to import.
+        A file whose size or modification time changed is imported from the
+        start if nothing of it was imported yet, and otherwise flagged with an
+        error and skipped.
+        """
+        known = {
+            record.path: record
+            for record in db.query(BackfillFile).filter(BackfillFile.path.in_(files)).all()
+        }
+
+        todo = []
+        for path in files:
+            stat = os.stat(path)
+            modified_at = datetime.fromtimestamp(stat.st_mtime)
+            record = known.get(path)
+            if record is None:
+                db.add(BackfillFile(path=path, size=stat.st_size, modified_at=modified_at,
+                                    responses_done=0, snapshots_done=0, completed=False))
+            elif record.size != stat.st_size or record.modified_at != modified_at:
+                if record.responses_done > 0:
+                    record.error_message = (f"Changed on disk after {record.responses_done} responses were "
+                                            f"imported; delete its data and this row to import it again")
+                    logger.warning(f"{path} changed since it was imported, skipping it")
+                    continue
+                record.size, record.modified_at = stat.st_size, modified_at
+                record.completed = False
+            elif record.completed:
+                continue
+            todo.append(path)
+
+        db.commit()
+        return todo
+
+    def run(self, paths: List[str]) -> dict:
+        """
+        Imports every pending file under the given paths.
+
+        Args:
+            paths: Files or directories to import
+
+        Returns:
+            dict: Counts of files done, failed and skipped, responses and snapshots
+        """
+        files = self.discover(paths)
+        db = open_session(self.database_url)
+        try:
+            todo = self.pending(db, files)
+        finally:
+            db.close()
+
+        summary = {"files": len(files), "skipped": len(files) - len(todo),
+                   "done": 0, "failed": 0, "responses": 0, "snapshots": 0}
+        logger.info(f"Backfilling {len(todo)} of {len(files)} files with {self.workers} workers")
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(backfill_file, path, self.database_url, self.batch_size): path
+                for path in todo
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    _, responses, snapshots = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    logger.error(f"Failed to backfill {path}: {str(e)}")
+                    continue
+                summary["done"] += 1
+                summary["responses"] += responses
+                summary["snapshots"] += snapshots
+                logger.info(f"Backfilled {path}: {responses} responses, {snapshots} snapshots")
+
+        return summary
@@ -62,6 +62,86 @@ def parse_arguments() -> argparse.Namespace:
         default="EUR",
         help="Currency for fare prices"
     )
+    # Route catalog: search every known destination instead of a single route
+    parser.add_argument(
+        "--anywhere",
+        action="store_true",
+        help="Search all destinations with known service from the departure airport"
+    )
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help="Probe known airports not yet in the route catalog before searching"
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Maximum concurrent requests for --anywhere and --discover"
+    )
+    # Adaptive polling: skip dates whose prices rarely move
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Only fetch dates that are due according to their price volatility"
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=6.0,
+        help="Fixed polling cadence in hours, used for new dates and as the budget reference"
+    )
+    # Timeouts and hedging: keep slow or hung requests from stalling the crawl
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds to establish a connection to the API"
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to wait for data from the API"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Time budget of the whole crawl in minutes; remaining searches are skipped"
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        help="Send a duplicate request when one is slower than this latency percentile (e.g. 95)"
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=None,
+        help="Store compressed raw responses in this directory for later reprocessing"
+    )
+    # Profiling: per-stage timings printed at the end of the run
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each stage of the run and print a report at the end"
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="Also write the profile report as JSON to this file (implies --profile)"
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        action="store_true",
+        help="Include cProfile hotspots in the profile report (implies --profile)"
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="Trace allocations to report peak memory per stage (implies --profile)"
+    )
     parser.add_argument(
         "--output-dir",
         default="data",
@@ -5,6 +5,10 @@ from dataclasses import dataclass
 from typing import Optional, Dict
 from datetime import datetime, timedelta
 
+# Currency used when none is given; also assumed for snapshots saved before
+# the currency was recorded
+DEFAULT_CURRENCY = "EUR"
+
 
 @dataclass
 class APIConfig:
@@ -22,6 +26,16 @@ class APIConfig:
     min_delay: float = 0.1  # 100ms minimum delay between requests
     max_delay: float = 0.3  # 300ms maximum delay
 
+    # Timeouts: a hung connection must not stall the crawl
+    connect_timeout: float = 5.0  # seconds to establish the connection
+    read_timeout: float = 30.0  # seconds between bytes of the response
+    crawl_deadline: Optional[float] = None  # seconds for the whole crawl, None for no limit
+
+    # Hedged requests: duplicate a request that is slower than this
+    # percentile of recent latencies, and keep the first answer
+    hedge_percentile: Optional[float] = None  # e.g. 95, None to disable
+    hedge_min_samples: int = 20  # latencies observed before hedging starts
+
     # Data storage settings
     output_directory: str = "data"
 
@@ -33,7 +47,11 @@ class APIConfig:
             arrival: Optional[str] = None,
             min_delay: Optional[float] = None,
             max_delay: Optional[float] = None,
-            output_dir: Optional[str] = None
+            output_dir: Optional[str] = None,
+            connect_timeout: Optional[float] = None,
+            read_timeout: Optional[float] = None,
+            crawl_deadline: Optional[float] = None,
+            hedge_percentile: Optional[float] = None
     ) -> 'APIConfig':
         """
         Creates a configuration with default values that can be overridden.
@@ -45,6 +63,11 @@ class APIConfig:
             min_delay: Optional minimum delay between requests (default: 0.1)
             max_delay: Optional maximum delay between requests (default: 0.3)
             output_dir: Optional output directory path (default: "data")
+            connect_timeout: Optional connect timeout in seconds (default: 5)
+            read_timeout: Optional read timeout in seconds (default: 30)
+            crawl_deadline: Optional time budget of the whole crawl in seconds (default: none)
+            hedge_percentile: Optional latency percentile after which a request
+                is hedged with a duplicate (default: no hedging)
 
         Returns:
             APIConfig: Configuration object with all settings
@@ -56,10 +79,14 @@ class APIConfig:
                 "Accept": "application/json",
                 "Accept-Language": "en-US,en;q=0.9"
             },
-            currency=currency or "EUR",
+            currency=currency or DEFAULT_CURRENCY,
             default_departure=departure or "ZRH",
             default_arrival=arrival or "FCO",
             min_delay=min_delay or 0.1,
             max_delay=max_delay or 0.3,
-            output_directory=output_dir or "data"
+            output_directory=output_dir or "data",
+            connect_timeout=connect_timeout or 5.0,
+            read_timeout=read_timeout or 30.0,
+            crawl_deadline=crawl_deadline,
+            hedge_percentile=hedge_percentile
         )
@@ -1,12 +1,55 @@
 import json
 import logging
-from typing import List, Optional
-from datetime import datetime
+import textwrap
+from contextlib import contextmanager
+from typing import IO, Callable, Iterable, Iterator, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
+from sqlalchemy.orm import Session, aliased
+
+from src.config import DEFAULT_CURRENCY
 from src.database import get_db
+from src.database.ingest import quarantine_response
 from src.scraper.models import APIResponse
-from src.database.models import Flight, PriceSnapshot
+from src.database.models import Airport, Flight, IngestStat, LatestPrice, PriceAnomaly, PriceSnapshot, Route
+from src.feed import FeedCursor, read_changes
+from src.fx import FxRateTable
+from src.profiling import profiler
+from src.query_cache import QueryCache, flight_tag, query_cache, route_tag
+from src.series import PriceSeries
+from src.search.connections import ConnectionSearch, Itinerary
+from src.search.roundtrip import RoundTrip, load_latest_fares, search_round_trips
+
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array one element at a time.
+    The output is identical to json.dump of the whole list.
+    """
+
+    def __init__(self, f: IO[str], pretty_print: bool = True):
+        self.f = f
+        self.indent = 4 if pretty_print else None
+        self.count = 0
+
+    def write(self, element: dict) -> None:
+        """Appends one element to the array."""
+        text = json.dumps(element, indent=self.indent, ensure_ascii=False)
+        if self.indent:
+            prefix = "[\n" if self.count == 0 else ",\n"
+            text = textwrap.indent(text, " " * self.indent)
+        else:
+            prefix = "[" if self.count == 0 else ", "
+        self.f.write(prefix + text)
+        self.count += 1
+
+    def close(self) -> None:
+        """Terminates the array."""
+        if self.count == 0:
+            self.f.write("[]")
+        else:
+            self.f.write("\n]" if self.indent else "]")
 
 
 class DataManager:
@@ -15,16 +58,33 @@ class DataManager:
     Supports both file-based storage and database storage.
     """
 
-    def __init__(self, output_dir: str = "data", use_db: bool = True):
+    def __init__(self,
+                 output_dir: str = "data",
+                 use_db: bool = True,
+                 session_factory: Optional[Callable[[], Session]] = None,
+                 cache: Optional[QueryCache] = None,
+                 raise_errors: bool = False):
         """
         Initialize the DataManager with specified storage options.
 
         Args:
             output_dir: Directory path for file storage
             use_db: Whether to use database storage (defaults to True)
+            session_factory: Creates database sessions (defaults to the
+                application session factory), e.g. a read-only pool
+            cache: Cache of history and latest-price reads (defaults to the
+                process-wide cache invalidated by every save)
+            raise_errors: Re-raise query errors instead of returning empty
+                results, for callers that must not mistake them for no data
         """
         self.output_dir = Path(output_dir)
         self.use_db = use_db
+        self.session_factory = session_factory
+        self.fx_rates = FxRateTable()
+        self.price_series = PriceSeries()
+        self.connection_search = ConnectionSearch()
+        self.query_cache = cache if cache is not None else query_cache
+        self.raise_errors = raise_errors
         self._ensure_output_directory()
         self.logger = logging.getLogger(__name__)
 
@@ -36,6 +96,12 @@ class DataManager:
             self.logger.error(f"Failed to create output directory: {str(e)}")
             raise
 
+    def _open_session(self) -> Session:
+        """Opens a database session from the configured factory."""
+        if self.session_factory is not None:
+            return self.session_factory()
+        return next(get_db())
+
     def _generate_filename(self, base_name: Optional[str] = None) -> str:
         """Generates a structured filename with timestamp."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -43,140 +109,177 @@ class DataManager:
         return f"{prefix}fares_{timestamp}.json"
 
     def save_results(self,
-                     responses: List[APIResponse],
+                     responses: Iterable[APIResponse],
                      filename: Optional[str] = None,
                      pretty_print: bool = True) -> Path:
         """
         Saves API responses to storage. If use_db is True, saves to both
         database and file. Otherwise, saves only to file.
 
+        Responses are consumed one at a time: each is written to the database
+        and appended to the file as it arrives, then released, so a generator
+        of responses is saved with constant memory.
+
         Args:
-            responses: List of API responses to save
+            responses: API responses to save (a list or any iterable)
             filename: Optional filename for file storage
             pretty_print: Whether to format JSON output
 
         Returns:
             Path: Path to the saved file
         """
-        # Save to database if enabled
-        if self.use_db:
-            self._save_to_database(responses)
+        db = self._open_session() if self.use_db else None
+        try:
+            with self._open_output_file(filename, pretty_print) as (output_path, writer):
+                for response in responses:
+                    # Save to database if enabled
+                    if db is not None:
+                        with profiler.phase("db_write"):
+                            self._save_to_database(db, response)
+
+                    # Always save to file for backup and compatibility
+                    self.logger.info(f"Processing response for file storage")
+                    with profiler.phase("file_write"):
+                        writer.write(self._response_to_dict(response))
 
-        # Always save to file for backup and compatibility
-        return self._save_to_file(responses, filename, pretty_print)
+            self.logger.info(f"Successfully saved data to {output_path}")
+            return output_path
 
-    def _save_to_database(self, responses: List[APIResponse]) -> None:
+        finally:
+            if db is not None:
+                db.close()
+
+    def _save_to_database(self, db: Session, response: APIResponse) -> None:
         """
-        Saves API responses to the database.
+        Saves one API response to the database.
         Creates all necessary related records.
 
+        A response that cannot be saved is rolled back and quarantined with
+        its fares, so the rest of the run is kept.
+
         Args:
-            responses: List of API responses to save
+            db: Database session shared by the whole run
+            response: API response to save
         """
-        try:
-            # Get database session using context manager
-            db = next(get_db())
+        self.logger.info(f"Saving response to database: {response.url}")
 
-            for response in responses:
-                self.logger.info(f"Saving response to database: {response.url}")
-
-                try:
-                    # Save response and get search operation record
-                    search_op = response.save_to_db(db)
-                    self.logger.info(
-                        f"Successfully saved search operation {search_op.id}"
-                    )
-
-                except Exception as e:
-                    self.logger.error(f"Error saving response to database: {str(e)}")
-                    # Roll back transaction on error
-                    db.rollback()
-                    raise
+        try:
+            # Save response and get search operation record
+            search_op = response.save_to_db(db)
+            self.logger.info(
+                f"Successfully saved search operation {search_op.id}"
+            )
+            # Drop the saved objects so the session does not grow with the run
+            db.expunge_all()
 
         except Exception as e:
-            self.logger.error(f"Database operation failed: {str(e)}")
-            raise
-        finally:
-            db.close()
-
-    def _save_to_file(self,
-                      responses: List[APIResponse],
-                      filename: Optional[str] = None,
-                      pretty_print: bool = True) -> Path:
+            self.logger.error(f"Error saving response to database: {str(e)}")
+            # Roll back transaction on error
+            db.rollback()
+            db.expunge_all()
+            try:
+                quarantine_response(db, response, str(e))
+                db.commit()
+            except Exception:
+                # The database itself is failing: stop the run
+                db.rollback()
+                raise
+
+    @contextmanager
+    def _open_output_file(self,
+                          filename: Optional[str] = None,
+                          pretty_print: bool = True) -> Iterator[Tuple[Path, JsonArrayWriter]]:
         """
-        Saves API responses to a JSON file.
-        Maintains the original file storage functionality.
+        Opens the JSON output file for writing, as an array writer.
+
+        The array is written to a temporary file that replaces the output
+        file once it is terminated, also when saving stops part-way: the file
+        then holds the responses saved so far, and is never left truncated.
+        After a write error the temporary file is left as it is.
 
         Args:
-            responses: List of API responses to save
             filename: Optional filename for the JSON file
-            pretty_print: Whether to format the JSON output
+            pretty_print: Whether to format JSON output
 
-        Returns:
-            Path: Path to the saved file
+        Yields:
+            tuple: (output path, array writer)
         """
+        # Generate or process filename
+        if filename:
+            if not filename.endswith('.json'):
+                filename = f"{filename}.json"
+        else:
+            filename = self._generate_filename()
+
+        output_path = self.output_dir / filename
+        tmp_path = output_path.with_name(f"{output_path.name}.tmp")
         try:
-            # Generate or process filename
-            if filename:
-                if not filename.endswith('.json'):
-                    filename = f"{filename}.json"
-            else:
-                filename = self._generate_filename()
-
-            output_path = self.output_dir / filename
-
-            # Prepare data for serialization
-            serializable_data = []
-            for response in responses:
-                self.logger.info(f"Processing response for file storage")
-
-                response_dict = {
-                    "url": response.url,
-                    "status_code": response.status_code,
-                    "error": response.error,
-                    "data": [],
-                    "metadata": {
-                        "saved_at": datetime.now().isoformat(),
-                        "successful": response.is_successful
-                    }
-                }
-
-                # Convert flight fares to dictionaries
-                for fare in response.data:
-                    fare_dict = {
-                        "flightNumber": fare.flight_number,
-                        "departureAirport": fare.departure_airport,
-                        "arrivalAirport": fare.arrival_airport,
-                        "arrivalCountry": fare.arrival_country,
-                        "outboundPrice": fare.outbound_price,
-                        "returnPrice": fare.return_price,
-                        "departureDateTime": fare.departure_datetime.isoformat(),
-                        "arrivalDateTime": fare.arrival_datetime.isoformat(),
-                        "flightDuration": round(fare.calculate_flight_duration(), 2)
-                    }
-                    response_dict["data"].append(fare_dict)
-
-                serializable_data.append(response_dict)
-
-            # Write to file with proper formatting
-            with output_path.open("w", encoding='utf-8') as f:
-                indent = 4 if pretty_print else None
-                json.dump(serializable_data, f, indent=indent, ensure_ascii=False)
-
-            self.logger.info(f"Successfully saved data to {output_path}")
-            return output_path
+            with tmp_path.open("w", encoding='utf-8') as f:
+                writer = JsonArrayWriter(f, pretty_print)
+                write_failed = False
+                try:
+                    yield output_path, writer
+                except OSError:
+                    write_failed = True
+                    raise
+                finally:
+                    if not write_failed:
+                        writer.close()
+                        f.close()
+                        tmp_path.replace(output_path)
 
         except (IOError, ValueError) as e:
             self.logger.error(f"Failed to save results to file: {str(e)}")
             raise
 
-    def get_price_history(self, flight_number: str, days: int = 30) -> List[dict]:
+    def _response_to_dict(self, response: APIResponse) -> dict:
+        """
+        Converts an API response to its JSON file representation.
+
+        Args:
+            response: API response to convert
+
+        Returns:
+            dict: Serializable representation of the response
+        """
+        response_dict = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "error": response.error,
+            "data": [],
+            "metadata": {
+                "saved_at": datetime.now().isoformat(),
+                "fetched_at": response.fetched_at.isoformat() if response.fetched_at else None,
+                "successful": response.is_successful
+            }
+        }
+
+        # Convert flight fares to dictionaries
+        for fare in response.data:
+            response_dict["data"].append(fare.to_dict())
+
+        return response_dict
+
+    def _get_fx_rates(self, db: Session) -> FxRateTable:
+        """Returns the FX rate table, reloading it from the database once it is stale."""
+        if self.fx_rates.loaded_at is None or \
+                datetime.utcnow() - self.fx_rates.loaded_at > self.fx_rates.max_age:
+            self.fx_rates.load(db)
+        return self.fx_rates
+
+    def get_price_history(self,
+                          flight_number: str,
+                          days: int = 30,
+                          currency: Optional[str] = None) -> List[dict]:
         """
         Retrieves price history for a specific flight from the database.
+        Results are cached until new snapshots of the flight number are saved.
 
         Args:
             flight_number: The flight number to look up
             days: Number of days of history to retrieve
+            currency: Convert prices to this currency at the rate of each
+                snapshot's time (default: keep the currency they were fetched in)
 
         Returns:
             List[dict]: List of price records with timestamps
@@ -185,8 +288,15 @@ class DataManager:
             self.logger.warning("Database access not enabled")
             return []
 
+        key = ("price_history", flight_number, days, currency)
+        tags = [flight_tag(flight_number)]
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        token = self.query_cache.token(tags)
+
         try:
-            db = next(get_db())
+            db = self._open_session()
 
             # Query price history
             price_history = (
@@ -198,18 +308,464 @@ class DataManager:
                 .all()
             )
 
+            fx_rates = self._get_fx_rates(db) if currency else None
+
             # Convert to dictionary format
-            return [
-                {
+            history = []
+            for snapshot in price_history:
+                record = {
                     "timestamp": snapshot.timestamp,
                     "outbound_price": snapshot.outbound_price,
-                    "return_price": snapshot.return_price
+                    "return_price": snapshot.return_price,
+                    "currency": snapshot.currency
                 }
-                for snapshot in price_history
-            ]
+                if fx_rates is not None and snapshot.currency != currency:
+                    record["outbound_price"] = fx_rates.convert(
+                        snapshot.outbound_price, snapshot.currency, currency, snapshot.timestamp)
+                    record["return_price"] = fx_rates.convert(
+                        snapshot.return_price, snapshot.currency, currency, snapshot.timestamp)
+                    record["currency"] = currency
+                history.append(record)
+
+            self.query_cache.put(key, history, tags, token)
+            return history
 
         except Exception as e:
             self.logger.error(f"Failed to retrieve price history: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def get_cache_stats(self) -> dict:
+        """
+        Returns the size and hit rate of the history and latest-price cache.
+
+        Returns:
+            dict: entries, hits, misses, hit_rate and invalidations
+        """
+        return self.query_cache.stats()
+
+    def get_price_series(self,
+                         flight_number: str,
+                         departure_date: Optional[date] = None,
+                         days: int = 90,
+                         points: int = 200,
+                         method: str = "lttb",
+                         currency: Optional[str] = None) -> List[dict]:
+        """
+        Retrieves a downsampled price series for charting: at most `points`
+        points per flight and price, however long the window.
+
+        Args:
+            flight_number: The flight number to look up
+            departure_date: Departure day, to pick one flight of a recurring number
+            days: Number of days of history to cover
+            points: Maximum points per series
+            method: "lttb" (shape-preserving) or "minmax" (keeps every extreme)
+            currency: Convert prices to this currency at the rate of each
+                snapshot's time (default: DEFAULT_CURRENCY, so a series never mixes currencies)
+
+        Returns:
+            List[dict]: One series per flight, see PriceSeries.get
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            return self.price_series.get(db, flight_number, departure_date, days, points, method,
+                                         currency or DEFAULT_CURRENCY, self._get_fx_rates(db))
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve price series: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def find_round_trips(self,
+                         origin: str,
+                         destinations: List[str],
+                         date_from: datetime,
+                         date_to: datetime,
+                         k: int = 10,
+                         min_stay: timedelta = timedelta(days=1),
+                         max_stay: timedelta = timedelta(days=14),
+                         currency: Optional[str] = None) -> List[RoundTrip]:
+        """
+        Finds the k cheapest stored round trips from origin to any destination.
+
+        Args:
+            origin: Departure airport code
+            destinations: Destination airport codes to consider
+            date_from: Earliest outbound departure
+            date_to: Latest outbound departure
+            k: Maximum number of combinations to return
+            min_stay: Minimum stay at destination
+            max_stay: Maximum stay at destination
+            currency: Compare and return prices in this currency (default: as fetched)
+
+        Returns:
+            List[RoundTrip]: Cheapest combinations first
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            return search_round_trips(
+                db, origin, destinations, date_from, date_to,
+                k=k, min_stay=min_stay, max_stay=max_stay,
+                currency=currency or DEFAULT_CURRENCY, fx_rates=self._get_fx_rates(db)
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to search round trips: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def find_connections(self,
+                         origin: str,
+                         destination: str,
+                         date_from: datetime,
+                         date_to: datetime,
+                         k: int = 10,
+                         max_legs: int = 3,
+                         min_connection: timedelta = timedelta(hours=2),
+                         max_connection: timedelta = timedelta(hours=24),
+                         max_duration: timedelta = timedelta(days=2),
+                         currency: Optional[str] = None) -> List[Itinerary]:
+        """
+        Finds the k cheapest stored itineraries from origin to destination,
+        including self-transfers through other airports.
+
+        Args:
+            origin: Departure airport code
+            destination: Arrival airport code
+            date_from: Earliest first departure
+            date_to: Latest first departure
+            k: Maximum number of itineraries to return
+            max_legs: Maximum number of flights per itinerary
+            min_connection: Minimum connection time
+            max_connection: Maximum connection time
+            max_duration: Maximum time from first departure to last arrival
+            currency: Compare and return prices in this currency (default: DEFAULT_CURRENCY)
+
+        Returns:
+            List[Itinerary]: Cheapest itineraries first
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            return self.connection_search.find(
+                db, origin, destination, date_from, date_to,
+                k=k, max_legs=max_legs, min_connection=min_connection,
+                max_connection=max_connection, max_duration=max_duration,
+                currency=currency or DEFAULT_CURRENCY, fx_rates=self._get_fx_rates(db)
+            )
+
+        except Exception as e:
+            self.logger.error(f"Failed to search connections: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def get_latest_fares(self,
+                         departure: str,
+                         arrival: str,
+                         date_from: datetime,
+                         date_to: datetime,
+                         currency: Optional[str] = None) -> List[dict]:
+        """
+        Retrieves the latest known price of every flight on a route.
+        Results are cached until new fares on the route are saved.
+
+        Args:
+            departure: Departure airport code
+            arrival: Arrival airport code
+            date_from: Earliest departure (inclusive)
+            date_to: Latest departure (exclusive)
+            currency: Convert prices to this currency at the latest rate
+
+        Returns:
+            List[dict]: One record per flight, ordered by departure
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        key = ("latest_fares", departure, arrival, date_from, date_to, currency)
+        tags = [route_tag(departure, arrival)]
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        token = self.query_cache.token(tags)
+
+        try:
+            db = self._open_session()
+            fares = load_latest_fares(
+                db, departure, arrival, date_from, date_to,
+                currency=currency or DEFAULT_CURRENCY, fx_rates=self._get_fx_rates(db)
+            )
+            latest = [
+                {
+                    "flight_number": fare.flight_number,
+                    "departure_airport": fare.departure_airport,
+                    "arrival_airport": fare.arrival_airport,
+                    "departure_datetime": fare.departure_datetime,
+                    "arrival_datetime": fare.arrival_datetime,
+                    "outbound_price": fare.outbound_price,
+                    "return_price": fare.return_price
+                }
+                for fare in sorted(fares, key=lambda fare: fare.departure_datetime)
+            ]
+
+            self.query_cache.put(key, latest, tags, token)
+            return latest
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve latest fares: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def get_routes(self, departure: Optional[str] = None) -> List[dict]:
+        """
+        Lists routes with known service, as learned by the route catalog.
+
+        Args:
+            departure: Only routes from this airport code
+
+        Returns:
+            List[dict]: Routes with their catalog timestamps
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            dep_airport = aliased(Airport)
+            arr_airport = aliased(Airport)
+
+            query = (
+                db.query(dep_airport.iata_code, arr_airport.iata_code,
+                         Route.last_served_at, Route.last_checked_at)
+                .select_from(Route)
+                .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+                .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+                .filter(Route.is_served.is_(True))
+                .order_by(dep_airport.iata_code, arr_airport.iata_code)
+            )
+            if departure:
+                query = query.filter(dep_airport.iata_code == departure)
+
+            return [
+                {
+                    "departure_airport": dep,
+                    "arrival_airport": arr,
+                    "last_served_at": last_served_at,
+                    "last_checked_at": last_checked_at
+                }
+                for dep, arr, last_served_at, last_checked_at in query.all()
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve routes: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def get_price_changes(self, since: datetime) -> List[dict]:
+        """
+        Retrieves the flights whose price changed since a point in time,
+        e.g. the start of the last run.
+
+        Args:
+            since: Only changes observed at or after this time
+
+        Returns:
+            List[dict]: Current and previous prices, latest changes first
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            rows = (
+                db.query(Flight.flight_number, Flight.departure_datetime, LatestPrice)
+                .join(LatestPrice, LatestPrice.flight_id == Flight.id)
+                .filter(LatestPrice.changed_at >= since)
+                .order_by(LatestPrice.changed_at.desc())
+                .all()
+            )
+            return [
+                {
+                    "flight_number": flight_number,
+                    "departure_datetime": departure_datetime,
+                    "changed_at": latest.changed_at,
+                    "outbound_price": latest.outbound_price,
+                    "return_price": latest.return_price,
+                    "previous_outbound_price": latest.previous_outbound_price,
+                    "previous_return_price": latest.previous_return_price,
+                    "outbound_delta": latest.outbound_delta,
+                    "return_delta": latest.return_delta,
+                    "currency": latest.currency
+                }
+                for flight_number, departure_datetime, latest in rows
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve price changes: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
+
+    def get_price_anomalies(self, since: datetime, kind: Optional[str] = None) -> List[dict]:
+        """
+        Retrieves the price anomalies detected during ingest.
+
+        Args:
+            since: Only anomalies observed at or after this time
+            kind: Optional filter, "drop" or "spike"
+
+        Returns:
+            List[dict]: Anomalies with their expected price, latest first
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            query = (
+                db.query(Flight.flight_number, Flight.departure_datetime, PriceAnomaly)
+                .join(PriceAnomaly, PriceAnomaly.flight_id == Flight.id)
+                .filter(PriceAnomaly.observed_at >= since)
+            )
+            if kind is not None:
+                query = query.filter(PriceAnomaly.kind == kind)
+            return [
+                {
+                    "flight_number": flight_number,
+                    "departure_datetime": departure_datetime,
+                    "observed_at": anomaly.observed_at,
+                    "kind": anomaly.kind,
+                    "price": anomaly.price,
+                    "expected_price": anomaly.expected_price,
+                    "z_score": anomaly.z_score,
+                    "baseline": anomaly.baseline,
+                    "currency": anomaly.currency
+                }
+                for flight_number, departure_datetime, anomaly
+                in query.order_by(PriceAnomaly.observed_at.desc()).all()
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve price anomalies: {str(e)}")
+            if self.raise_errors:
+                raise
             return []
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+    def get_changes(self, cursor: Optional[str] = None, limit: int = 1000) -> dict:
+        """
+        Reads the next page of the change feed, for consumers that sync
+        incrementally instead of re-reading price_snapshots.
+
+        Args:
+            cursor: Cursor returned with the previous page (None to start over)
+            limit: Maximum snapshots and maximum price changes per page
+
+        Returns:
+            dict: New snapshots, price changes, the next cursor and has_more,
+                see read_changes. On errors the page is empty and the cursor
+                unchanged, so the consumer simply retries.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        position = FeedCursor.decode(cursor)
+        empty_page = {"snapshots": [], "price_changes": [], "cursor": position.encode(), "has_more": False}
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return empty_page
+
+        try:
+            db = self._open_session()
+            return read_changes(db, position, limit)
+
+        except Exception as e:
+            self.logger.error(f"Failed to read changes: {str(e)}")
+            if self.raise_errors:
+                raise
+            return empty_page
+        finally:
+            db.close()
+
+    def get_ingest_stats(self, days: int = 7) -> List[dict]:
+        """
+        Retrieves the ingest counters per route and day.
+
+        Args:
+            days: Number of most recent days to include
+
+        Returns:
+            List[dict]: Searches, successes, snapshots, distinct flights and
+                flights seen for the first time per route and day, most recent first
+        """
+        if not self.use_db:
+            self.logger.warning("Database access not enabled")
+            return []
+
+        try:
+            db = self._open_session()
+            since = (datetime.utcnow() - timedelta(days=days)).date()
+            rows = (
+                db.query(IngestStat)
+                .filter(IngestStat.day > since)
+                .order_by(IngestStat.day.desc(), IngestStat.departure_airport, IngestStat.arrival_airport)
+                .all()
+            )
+            return [
+                {
+                    "day": row.day,
+                    "departure_airport": row.departure_airport,
+                    "arrival_airport": row.arrival_airport,
+                    "searches": row.searches,
+                    "successful_searches": row.successful_searches,
+                    "snapshots": row.snapshots,
+                    "flights": row.flights,
+                    "new_flights": row.new_flights
+                }
+                for row in rows
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to retrieve ingest stats: {str(e)}")
+            if self.raise_errors:
+                raise
+            return []
+        finally:
+            db.close()
@@ -1,5 +1,5 @@
-from .connection import Base, DATABASE_URL, get_db
+from .connection import Base, DATABASE_URL, get_db, open_session
 from .models import *
 
 # This makes all these items available when someone imports from database
-__all__ = ['Base', 'DATABASE_URL', 'get_db']
\ No newline at end of file
+__all__ = ['Base', 'DATABASE_URL', 'get_db', 'open_session']
\ No newline at end of file
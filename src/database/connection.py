@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -17,6 +19,9 @@ DB_NAME = os.getenv("DB_NAME")
 # Construct database URL
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Optional read replica for query services (defaults to the main database)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", DATABASE_URL)
+
 # Create SQLAlchemy engine
 engine = create_engine(DATABASE_URL)
 
@@ -35,4 +40,40 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def dialect_insert(db, model):
+    """
+    Returns an INSERT construct for the session's dialect that supports
+    ON CONFLICT clauses (PostgreSQL in production, SQLite for local runs).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return postgresql_insert(model)
+
+def open_session(database_url=None):
+    """
+    Opens a session on the configured database, or on another database URL.
+    Tables are created on other URLs, so an embedded engine such as
+    sqlite:///bench.db works without running the migrations.
+    """
+    if database_url is None:
+        return SessionLocal()
+
+    other_engine = create_engine(database_url)
+    Base.metadata.create_all(other_engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=other_engine)()
+
+def make_read_sessionmaker(pool_size: int = 10, max_overflow: int = 5) -> sessionmaker:
+    """
+    Creates a session factory on a dedicated pool of read-only connections,
+    for services that only query data.
+    """
+    read_engine = create_engine(
+        READ_DATABASE_URL,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        execution_options={"postgresql_readonly": True}
+    )
+    return sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
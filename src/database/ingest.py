@@ -0,0 +1,634 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, insert, or_, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+
+from src.anomalies import detector_for
+from src.config import DEFAULT_CURRENCY
+from src.profiling import profiler
+from src.query_cache import query_cache
+from .connection import dialect_insert
+from .models import (Airline, Airport, CommitSequence, Flight, FlightDay, IngestStat, LatestPrice,
+                     PriceSnapshot, QuarantinedRecord, Route, SearchOperation)
+
+logger = logging.getLogger(__name__)
+
+FlightKey = Tuple[int, str, datetime]
+
+
+def search_operation_values(response, fetched_at: datetime) -> dict:
+    """
+    Builds the search_operations row of a response, including its telemetry.
+
+    Args:
+        response: APIResponse being saved
+        fetched_at: Time of the search
+
+    Returns:
+        dict: Column values of the search operation
+    """
+    return {
+        "timestamp": fetched_at,
+        "successful": response.is_successful,
+        "error_message": response.error,
+        "departure_airport": response.departure_airport,
+        "arrival_airport": response.arrival_airport,
+        "departure_date": response.departure_date,
+        "currency": response.currency,
+        "status_code": response.status_code,
+        "latency_ms": response.latency_ms,
+        "response_bytes": response.response_bytes,
+        "fare_count": len(response.data),
+        "retries": response.retries,
+        "parse_ms": response.parse_ms
+    }
+
+
+def _ensure_id(db: Session, model, key: dict, values: dict) -> int:
+    """
+    Returns the id of the row with a unique key, inserting it if missing.
+    The insert ignores conflicts and the row is read back, so concurrent
+    writers creating the same row neither duplicate it nor fail.
+    """
+    conditions = [getattr(model, name) == value for name, value in key.items()]
+    row_id = db.execute(select(model.id).where(*conditions)).scalar()
+    if row_id is None:
+        db.execute(
+            dialect_insert(db, model).values(**key, **values).on_conflict_do_nothing(index_elements=list(key))
+        )
+        row_id = db.execute(select(model.id).where(*conditions)).scalar_one()
+    return row_id
+
+
+def ensure_airline_id(db: Session) -> int:
+    """Returns the id of the EasyJet airline record, creating it if needed."""
+    return _ensure_id(db, Airline, {"code": "EZY"}, {"name": "EasyJet"})
+
+
+def ensure_airport_id(db: Session, iata_code: str) -> int:
+    """Returns the id of an airport, creating a placeholder if needed."""
+    return _ensure_id(db, Airport, {"iata_code": iata_code},
+                      {"city": f"{iata_code} City", "country": f"{iata_code} Country"})
+
+
+def ensure_route_id(db: Session,
+                    airline_id: int,
+                    departure_airport_id: int,
+                    arrival_airport_id: int,
+                    **values) -> int:
+    """Returns the id of a route, creating it with the given column values if needed."""
+    key = {
+        "airline_id": airline_id,
+        "departure_airport_id": departure_airport_id,
+        "arrival_airport_id": arrival_airport_id
+    }
+    return _ensure_id(db, Route, key, values)
+
+
+def ensure_flight_id(db: Session,
+                     route_id: int,
+                     flight_number: str,
+                     departure_datetime: datetime,
+                     arrival_datetime: datetime) -> int:
+    """Returns the id of a flight, creating it if needed."""
+    key = {"route_id": route_id, "flight_number": flight_number, "departure_datetime": departure_datetime}
+    return _ensure_id(db, Flight, key, {"arrival_datetime": arrival_datetime})
+
+
+def ensure_flight_ids(db: Session, arrivals: Dict[FlightKey, datetime]) -> Dict[FlightKey, int]:
+    """
+    Returns the ids of flights, creating the missing ones in bulk. Inserts
+    ignore conflicts and the new rows are read back, so concurrent writers
+    creating the same flights neither duplicate them nor fail.
+
+    Args:
+        db: SQLAlchemy database session
+        arrivals: Arrival time of each flight, by (route id, flight number, departure)
+
+    Returns:
+        dict: Flight id by key
+    """
+    def select_ids(keys):
+        rows = db.execute(
+            select(Flight.id, Flight.route_id, Flight.flight_number, Flight.departure_datetime)
+            .where(tuple_(Flight.route_id, Flight.flight_number, Flight.departure_datetime).in_(keys))
+        )
+        return {(route_id, flight_number, departure): flight_id
+                for flight_id, route_id, flight_number, departure in rows}
+
+    ids = select_ids(list(arrivals))
+    missing = [key for key in arrivals if key not in ids]
+    if missing:
+        db.execute(
+            dialect_insert(db, Flight).on_conflict_do_nothing(
+                index_elements=["route_id", "flight_number", "departure_datetime"]
+            ),
+            [
+                {
+                    "route_id": key[0],
+                    "flight_number": key[1],
+                    "departure_datetime": key[2],
+                    "arrival_datetime": arrivals[key]
+                }
+                for key in missing
+            ]
+        )
+        ids.update(select_ids(missing))
+    return ids
+
+
+def stamp_commit_sequence(db: Session, search_ids: List[int]) -> None:
+    """
+    Stamps the search operations of a transaction with the next commit
+    sequence number, which the change feed pages by. Must be the last write
+    before the commit: the counter row stays locked until then, so other
+    writers take their numbers after this transaction is visible.
+
+    Args:
+        db: SQLAlchemy database session
+        search_ids: Search operations saved in the transaction
+    """
+    if not search_ids:
+        return
+    # A plain UPDATE is compiled once; dialect inserts are compiled on every call
+    commit_seq = db.execute(
+        update(CommitSequence)
+        .where(CommitSequence.id == 1)
+        .values(value=CommitSequence.value + 1)
+        .returning(CommitSequence.value)
+    ).scalar()
+    if commit_seq is None:
+        # First commit of the database: concurrent first writers increment the row instead
+        stmt = dialect_insert(db, CommitSequence).values(id=1, value=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CommitSequence.id],
+            set_={"value": CommitSequence.value + 1}
+        ).returning(CommitSequence.value)
+        commit_seq = db.execute(stmt).scalar()
+    db.execute(update(SearchOperation).where(SearchOperation.id.in_(search_ids)).values(commit_seq=commit_seq))
+
+
+def upsert_latest_prices(db: Session, snapshots: List[dict]) -> None:
+    """
+    Upserts the latest_prices rows of the flights in a snapshot batch.
+    Must run in the transaction that inserts the snapshots.
+
+    When the price (or currency) differs from the stored one, the stored price
+    becomes the previous price and changed_at and changed_search_id move to
+    the observation.
+    Observations older than the stored one are ignored, so out-of-order
+    backfills do not overwrite newer prices.
+
+    Args:
+        db: SQLAlchemy database session
+        snapshots: Snapshot rows (flight_id, search_id, timestamp,
+            outbound_price, return_price, currency)
+    """
+    # One row per flight: a statement may not update the same row twice
+    latest = {}
+    for snapshot in snapshots:
+        current = latest.get(snapshot["flight_id"])
+        if current is None or snapshot["timestamp"] >= current["timestamp"]:
+            latest[snapshot["flight_id"]] = snapshot
+    if not latest:
+        return
+
+    # One executemany statement: its compiled form is reused whatever the batch size
+    stmt = dialect_insert(db, LatestPrice)
+    new = stmt.excluded
+    changed = or_(
+        new.outbound_price != LatestPrice.outbound_price,
+        new.return_price != LatestPrice.return_price,
+        new.currency != LatestPrice.currency
+    )
+    same_currency = new.currency == LatestPrice.currency
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LatestPrice.flight_id],
+        set_={
+            "search_id": new.search_id,
+            "observed_at": new.observed_at,
+            "outbound_price": new.outbound_price,
+            "return_price": new.return_price,
+            "currency": new.currency,
+            "previous_outbound_price": case(
+                (changed, LatestPrice.outbound_price), else_=LatestPrice.previous_outbound_price),
+            "previous_return_price": case(
+                (changed, LatestPrice.return_price), else_=LatestPrice.previous_return_price),
+            "outbound_delta": case(
+                (and_(changed, same_currency), new.outbound_price - LatestPrice.outbound_price),
+                (changed, None),
+                else_=LatestPrice.outbound_delta),
+            "return_delta": case(
+                (and_(changed, same_currency), new.return_price - LatestPrice.return_price),
+                (changed, None),
+                else_=LatestPrice.return_delta),
+            "changed_at": case((changed, new.observed_at), else_=LatestPrice.changed_at),
+            "changed_search_id": case((changed, new.search_id), else_=LatestPrice.changed_search_id)
+        },
+        where=new.observed_at >= LatestPrice.observed_at
+    )
+    db.execute(stmt, [
+        {
+            "flight_id": snapshot["flight_id"],
+            "search_id": snapshot["search_id"],
+            "observed_at": snapshot["timestamp"],
+            "outbound_price": snapshot["outbound_price"],
+            "return_price": snapshot["return_price"],
+            "currency": snapshot["currency"],
+            "changed_at": snapshot["timestamp"],
+            "changed_search_id": snapshot["search_id"]
+        }
+        for snapshot in latest.values()
+    ])
+
+
+def _response_pair(response) -> Tuple[str, str]:
+    """Returns the searched airport pair of a response ("" when unknown)."""
+    if response.departure_airport and response.arrival_airport:
+        return response.departure_airport, response.arrival_airport
+    if response.data:
+        return response.data[0].departure_airport, response.data[0].arrival_airport
+    return "", ""
+
+
+def record_ingest_stats(db: Session, responses: List, snapshots: List[dict]) -> None:
+    """
+    Adds a batch of responses and their snapshots to the ingest_stats counters.
+    Must run in the transaction that inserts the snapshots. A flight counts
+    once per day: the (flight, day) pairs are recorded in flight_days, and
+    only the pairs inserted by this batch are counted, whatever the order in
+    which the days arrive. A flight also counts once as new, on the first day
+    ingested for it, which is stored as its first_seen.
+
+    Args:
+        db: SQLAlchemy database session
+        responses: Ingested API responses
+        snapshots: Their snapshot rows (flight_id, timestamp, ...)
+    """
+    counters: Dict[Tuple[str, str, date], Dict[str, int]] = {}
+
+    def counter(key: Tuple[str, str, date]) -> Dict[str, int]:
+        if key not in counters:
+            counters[key] = {"searches": 0, "successful_searches": 0, "snapshots": 0, "flights": 0,
+                            "new_flights": 0}
+        return counters[key]
+
+    now = datetime.utcnow()
+    for response in responses:
+        entry = counter(_response_pair(response) + ((response.fetched_at or now).date(),))
+        entry["searches"] += 1
+        entry["successful_searches"] += int(response.is_successful)
+
+    if snapshots:
+        flight_ids = {snapshot["flight_id"] for snapshot in snapshots}
+        dep_airport = aliased(Airport)
+        arr_airport = aliased(Airport)
+        rows = db.execute(
+            select(Flight.id, dep_airport.iata_code, arr_airport.iata_code)
+            .join(Route, Flight.route_id == Route.id)
+            .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+            .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+            .where(Flight.id.in_(flight_ids))
+        )
+        pairs = {flight_id: (dep, arr) for flight_id, dep, arr in rows}
+
+        for snapshot in snapshots:
+            counter(pairs[snapshot["flight_id"]] + (snapshot["timestamp"].date(),))["snapshots"] += 1
+
+        flight_days = {(snapshot["flight_id"], snapshot["timestamp"].date()) for snapshot in snapshots}
+        stmt = (
+            dialect_insert(db, FlightDay)
+            .on_conflict_do_nothing(index_elements=[FlightDay.flight_id, FlightDay.day])
+            .returning(FlightDay.flight_id, FlightDay.day)
+        )
+        inserted = db.execute(stmt, [{"flight_id": flight_id, "day": day} for flight_id, day in flight_days])
+        first_days: Dict[int, date] = {}
+        for flight_id, day in inserted:
+            counter(pairs[flight_id] + (day,))["flights"] += 1
+            first_days[flight_id] = min(day, first_days.get(flight_id, day))
+
+        if first_days:
+            # Only flights with a new day can be new. They are locked in id
+            # order, and one first seen by a concurrent batch drops out once
+            # that batch commits, so each flight is counted once.
+            new_flights = db.execute(
+                select(Flight.id)
+                .where(Flight.id.in_(first_days), Flight.first_seen.is_(None))
+                .order_by(Flight.id)
+                .with_for_update(key_share=True)
+            ).scalars().all()
+            if new_flights:
+                db.execute(update(Flight), [
+                    {"id": flight_id, "first_seen": first_days[flight_id]} for flight_id in new_flights
+                ])
+                for flight_id in new_flights:
+                    counter(pairs[flight_id] + (first_days[flight_id],))["new_flights"] += 1
+
+    if not counters:
+        return
+
+    stmt = dialect_insert(db, IngestStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IngestStat.departure_airport, IngestStat.arrival_airport, IngestStat.day],
+        set_={
+            name: getattr(IngestStat, name) + getattr(stmt.excluded, name)
+            for name in ("searches", "successful_searches", "snapshots", "flights", "new_flights")
+        }
+    )
+    db.execute(stmt, [
+        {"departure_airport": dep, "arrival_airport": arr, "day": day, **values}
+        for (dep, arr, day), values in counters.items()
+    ])
+
+
+def quarantine_values(response,
+                      payload: list,
+                      error: str,
+                      kind: str,
+                      stage: str,
+                      search_id: Optional[int] = None) -> dict:
+    """
+    Builds a quarantined_records row for fares of a response.
+
+    Args:
+        response: APIResponse the fares belong to
+        payload: Raw fares (API format) to keep for reprocessing
+        error: Why they were quarantined
+        kind: "fare" for single fares, "response" for a whole response
+        stage: "parse" or "save"
+        search_id: Search operation already recorded for the response, if any
+
+    Returns:
+        dict: Column values of the quarantined record
+    """
+    return {
+        "created_at": datetime.utcnow(),
+        "kind": kind,
+        "stage": stage,
+        "error_message": error,
+        "search_id": search_id,
+        "url": response.url,
+        "departure_airport": response.departure_airport,
+        "arrival_airport": response.arrival_airport,
+        "departure_date": response.departure_date,
+        "currency": response.currency,
+        "fetched_at": response.fetched_at,
+        "payload": json.dumps(payload, default=str),
+        "attempts": 0
+    }
+
+
+def quarantine_rejected(db: Session, responses: List, search_ids: List[Optional[int]]) -> None:
+    """
+    Quarantines the fares that failed to parse, one record per fare.
+    Runs in the transaction that saves the responses.
+
+    Args:
+        db: SQLAlchemy database session
+        responses: Saved API responses
+        search_ids: Their search operation ids, in the same order (None when not kept)
+    """
+    rows = [
+        quarantine_values(response, [rejected["payload"]], rejected["error"], "fare", "parse", search_id)
+        for response, search_id in zip(responses, search_ids)
+        for rejected in response.rejected
+    ]
+    if rows:
+        db.execute(insert(QuarantinedRecord), rows)
+        logger.warning(f"Quarantined {len(rows)} fares that could not be parsed")
+
+
+def quarantine_response(db: Session, response, error: str, search_id: Optional[int] = None) -> None:
+    """
+    Quarantines the fares of a response that could not be saved as one
+    record, and the fares that failed to parse as records of their own.
+    The caller commits.
+
+    Args:
+        db: SQLAlchemy database session (after rolling back the failed save)
+        response: APIResponse that could not be saved
+        error: Why saving failed
+        search_id: Search operation recorded for the response, if it was kept
+    """
+    payload = [fare.to_dict() for fare in response.data]
+    db.execute(insert(QuarantinedRecord), [quarantine_values(response, payload, error, "response", "save", search_id)])
+    quarantine_rejected(db, [response], [search_id])
+    logger.warning(f"Quarantined response {response.url} with {len(payload)} fares: {error}")
+
+
+class BulkIngestor:
+    """
+    High-throughput alternative to APIResponse.save_to_db for large volumes.
+
+    Responses are buffered and written in batches: search operations and
+    snapshots with multi-row INSERTs, flights resolved through an in-memory
+    id cache, and a single commit per batch instead of several per fare.
+
+    Usage:
+        with BulkIngestor(db) as ingestor:
+            for response in responses:
+                ingestor.add(response)
+    """
+
+    def __init__(self,
+                 db: Session,
+                 batch_size: int = 5000,
+                 on_flush: Optional[Callable[[Session, List], None]] = None):
+        """
+        Args:
+            db: SQLAlchemy database session
+            batch_size: Number of fares buffered before a flush
+            on_flush: Called with the session and the flushed responses right
+                before each commit, to write bookkeeping in the same transaction
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.responses_written = 0
+        self.snapshots_written = 0
+        self.commits = 0
+        self.quarantined = 0
+        self.detector = detector_for(db)
+
+        self._pending = []
+        self._pending_fares = 0
+        self._airline_id: Optional[int] = None
+        self._airport_ids: Dict[str, int] = {}
+        self._route_ids: Dict[Tuple[str, str], int] = {}
+        self._flight_ids: Dict[FlightKey, int] = {}
+
+    def __enter__(self) -> 'BulkIngestor':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.db.rollback()
+
+    def add(self, response) -> None:
+        """
+        Buffers an API response, flushing when the batch is full.
+
+        Args:
+            response: APIResponse to ingest
+        """
+        self._pending.append(response)
+        self._pending_fares += len(response.data) + 1
+        if self._pending_fares >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes all buffered responses and commits them in one transaction.
+
+        If the batch fails, it is retried one response at a time, each under
+        a savepoint: responses that fail again are quarantined and the rest
+        of the batch commits.
+        """
+        if not self._pending:
+            return
+
+        responses, self._pending, self._pending_fares = self._pending, [], 0
+        try:
+            with profiler.phase("db_write"):
+                try:
+                    snapshots = self._write(responses)
+                except Exception as e:
+                    logger.warning(f"Batch of {len(responses)} responses failed, saving one by one: {str(e)}")
+                    self.db.rollback()
+                    self._reset_ids()
+                    snapshots = self._write_each(responses)
+                if self.on_flush is not None:
+                    self.on_flush(self.db, responses)
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            self._reset_ids()
+            raise
+
+        query_cache.invalidate_fares(fare for response in responses
+                                     if response.is_successful for fare in response.data)
+        self.commits += 1
+        self.responses_written += len(responses)
+        self.snapshots_written += len(snapshots)
+        logger.debug(f"Ingested {len(responses)} responses, {len(snapshots)} snapshots")
+
+    def _write(self, responses: List) -> List[dict]:
+        """Writes responses and all derived rows in the current transaction, returning the snapshots."""
+        search_ids = self._insert_search_operations(responses)
+        snapshots = self._build_snapshots(responses, search_ids)
+        if snapshots:
+            self.db.execute(insert(PriceSnapshot), snapshots)
+        quarantine_rejected(self.db, responses, search_ids)
+        record_ingest_stats(self.db, responses, snapshots)
+        upsert_latest_prices(self.db, snapshots)
+        self.detector.observe(self.db, snapshots)
+        stamp_commit_sequence(self.db, search_ids)
+        return snapshots
+
+    def _write_each(self, responses: List) -> List[dict]:
+        """Writes responses under one savepoint each, quarantining those that fail."""
+        snapshots = []
+        for response in responses:
+            try:
+                with self.db.begin_nested():
+                    snapshots.extend(self._write([response]))
+            except Exception as e:
+                # Ids and flight routes may refer to the rolled back savepoint
+                self._reset_ids()
+                self.detector.reset()
+                quarantine_response(self.db, response, str(e))
+                self.quarantined += 1
+        return snapshots
+
+    def _reset_ids(self) -> None:
+        """Drops the cached ids, which may refer to rows that were rolled back."""
+        self._route_ids.clear()
+        self._airport_ids.clear()
+        self._flight_ids.clear()
+        self._airline_id = None
+
+    def _insert_search_operations(self, responses: List) -> List[int]:
+        """Inserts one search operation per response, returning their ids in order."""
+        now = datetime.utcnow()
+        rows = [search_operation_values(response, response.fetched_at or now) for response in responses]
+        result = self.db.execute(
+            insert(SearchOperation).returning(SearchOperation.id, sort_by_parameter_order=True),
+            rows
+        )
+        return [row.id for row in result]
+
+    def _build_snapshots(self, responses: List, search_ids: List[int]) -> List[dict]:
+        """Resolves flight ids for all fares and builds snapshot rows."""
+        fares_with_keys = []
+        for response, search_id in zip(responses, search_ids):
+            if not response.is_successful:
+                continue
+            observed_at = response.fetched_at or datetime.utcnow()
+            currency = response.currency or DEFAULT_CURRENCY
+            for fare in response.data:
+                route_id = self._route_id(fare.departure_airport, fare.arrival_airport)
+                key = (route_id, fare.flight_number, fare.departure_datetime)
+                fares_with_keys.append((key, fare, search_id, observed_at, currency))
+
+        self._resolve_flights([(key, fare) for key, fare, _, _, _ in fares_with_keys])
+
+        return [
+            {
+                "flight_id": self._flight_ids[key],
+                "search_id": search_id,
+                "timestamp": observed_at,
+                "outbound_price": fare.outbound_price,
+                "return_price": fare.return_price,
+                "currency": currency
+            }
+            for key, fare, search_id, observed_at, currency in fares_with_keys
+        ]
+
+    def _resolve_flights(self, keyed_fares: List) -> None:
+        """Makes sure every flight key has an id, loading or creating flights in bulk."""
+        missing = {key: fare for key, fare in keyed_fares if key not in self._flight_ids}
+        if not missing:
+            return
+
+        self._flight_ids.update(ensure_flight_ids(
+            self.db, {key: fare.arrival_datetime for key, fare in missing.items()}
+        ))
+
+    def _route_id(self, departure: str, arrival: str) -> int:
+        """Returns the id of a route, creating airports and route as needed."""
+        pair = (departure, arrival)
+        if pair in self._route_ids:
+            return self._route_ids[pair]
+
+        route_id = ensure_route_id(self.db, self._get_airline_id(),
+                                   self._airport_id(departure), self._airport_id(arrival))
+        route = self.db.get(Route, route_id)
+
+        # Fares on this pair prove that it is served
+        now = datetime.utcnow()
+        route.is_served = True
+        route.last_served_at = now
+        route.last_checked_at = now
+        route.empty_checks = 0
+        self.db.flush()
+
+        self._route_ids[pair] = route.id
+        return route.id
+
+    def _airport_id(self, iata_code: str) -> int:
+        """Returns the id of an airport, creating a placeholder if needed."""
+        if iata_code not in self._airport_ids:
+            self._airport_ids[iata_code] = ensure_airport_id(self.db, iata_code)
+        return self._airport_ids[iata_code]
+
+    def _get_airline_id(self) -> int:
+        """Returns the id of the EasyJet airline record, creating it if needed."""
+        if self._airline_id is None:
+            self._airline_id = ensure_airline_id(self.db)
+        return self._airline_id
@@ -0,0 +1,37 @@
+"""Change feed position of latest prices
+
+Revision ID: 0c4e8b2f6d13
+Revises: f2a7c4e9b815
+Create Date: 2026-10-19 21:41:09.372816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c4e8b2f6d13'
+down_revision: Union[str, None] = 'f2a7c4e9b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('latest_prices', sa.Column('changed_search_id', sa.Integer(), nullable=True))
+
+    # The search that observed the current price first
+    op.execute("""
+        UPDATE latest_prices SET changed_search_id = COALESCE(
+            (SELECT MIN(ps.search_id) FROM price_snapshots ps
+             WHERE ps.flight_id = latest_prices.flight_id AND ps.timestamp = latest_prices.changed_at),
+            latest_prices.search_id)
+    """)
+    op.alter_column('latest_prices', 'changed_search_id', nullable=False)
+    op.create_index('ix_latest_prices_changed_search', 'latest_prices', ['changed_search_id', 'flight_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_latest_prices_changed_search', table_name='latest_prices')
+    op.drop_column('latest_prices', 'changed_search_id')
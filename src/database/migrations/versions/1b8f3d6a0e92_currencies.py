@@ -0,0 +1,38 @@
+"""Snapshot currency and FX rates
+
+Revision ID: 1b8f3d6a0e92
+Revises: e7b9a1c3f604
+Create Date: 2026-10-19 17:41:09.226017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b8f3d6a0e92'
+down_revision: Union[str, None] = 'e7b9a1c3f604'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing snapshots were all fetched with the default EUR currency
+    op.add_column('price_snapshots', sa.Column('currency', sa.String(length=3), server_default='EUR', nullable=False))
+    op.create_table('fx_rates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('base_currency', sa.String(length=3), nullable=False),
+    sa.Column('quote_currency', sa.String(length=3), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_fx_rates_pair_time', 'fx_rates', ['base_currency', 'quote_currency', 'fetched_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fx_rates_pair_time', table_name='fx_rates')
+    op.drop_table('fx_rates')
+    op.drop_column('price_snapshots', 'currency')
@@ -0,0 +1,28 @@
+"""Index price history lookups
+
+Revision ID: 2e8b4d6f0a19
+Revises: 7c3e5a9f1d24
+Create Date: 2026-10-21 14:12:37.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e8b4d6f0a19'
+down_revision: Union[str, None] = '7c3e5a9f1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_flights_flight_number', 'flights', ['flight_number'])
+    op.create_index('ix_price_snapshots_flight_time', 'price_snapshots', ['flight_id', 'timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_snapshots_flight_time', table_name='price_snapshots')
+    op.drop_index('ix_flights_flight_number', table_name='flights')
@@ -0,0 +1,40 @@
+"""Route catalog
+
+Revision ID: 3f1c2a7d9b10
+Revises: 52d9ef342eb4
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9b10'
+down_revision: Union[str, None] = '52d9ef342eb4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('routes', sa.Column('is_served', sa.Boolean(), server_default=sa.true(), nullable=False))
+    op.add_column('routes', sa.Column('last_checked_at', sa.DateTime(), nullable=True))
+    op.add_column('routes', sa.Column('last_served_at', sa.DateTime(), nullable=True))
+    op.add_column('routes', sa.Column('empty_checks', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_routes_airports', 'routes', ['departure_airport_id', 'arrival_airport_id'])
+
+    # Routes that already have flights are known to be served
+    op.execute(
+        "UPDATE routes SET last_served_at = now(), last_checked_at = now() "
+        "WHERE id IN (SELECT DISTINCT route_id FROM flights)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_routes_airports', table_name='routes')
+    op.drop_column('routes', 'empty_checks')
+    op.drop_column('routes', 'last_served_at')
+    op.drop_column('routes', 'last_checked_at')
+    op.drop_column('routes', 'is_served')
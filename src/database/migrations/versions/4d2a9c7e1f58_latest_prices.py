@@ -0,0 +1,53 @@
+"""Latest price per flight
+
+Revision ID: 4d2a9c7e1f58
+Revises: 1b8f3d6a0e92
+Create Date: 2026-10-19 18:52:37.410382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d2a9c7e1f58'
+down_revision: Union[str, None] = '1b8f3d6a0e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('latest_prices',
+    sa.Column('flight_id', sa.Integer(), nullable=False),
+    sa.Column('search_id', sa.Integer(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.Column('outbound_price', sa.Float(), nullable=False),
+    sa.Column('return_price', sa.Float(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('previous_outbound_price', sa.Float(), nullable=True),
+    sa.Column('previous_return_price', sa.Float(), nullable=True),
+    sa.Column('outbound_delta', sa.Float(), nullable=True),
+    sa.Column('return_delta', sa.Float(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['flight_id'], ['flights.id'], ),
+    sa.ForeignKeyConstraint(['search_id'], ['search_operations.id'], ),
+    sa.PrimaryKeyConstraint('flight_id')
+    )
+    op.create_index('ix_latest_prices_changed_at', 'latest_prices', ['changed_at'])
+
+    # Seed from the most recent snapshot of every flight
+    op.execute("""
+        INSERT INTO latest_prices (flight_id, search_id, observed_at, outbound_price,
+                                   return_price, currency, changed_at)
+        SELECT DISTINCT ON (flight_id)
+               flight_id, search_id, timestamp, outbound_price, return_price, currency, timestamp
+        FROM price_snapshots
+        ORDER BY flight_id, timestamp DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_latest_prices_changed_at', table_name='latest_prices')
+    op.drop_table('latest_prices')
@@ -0,0 +1,38 @@
+"""Flight days
+
+Revision ID: 5e9c2a7d4b38
+Revises: d8f3a6c1e294
+Create Date: 2026-10-20 09:12:41.337204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9c2a7d4b38'
+down_revision: Union[str, None] = 'd8f3a6c1e294'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('flight_days',
+    sa.Column('flight_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['flight_id'], ['flights.id'], ),
+    sa.PrimaryKeyConstraint('flight_id', 'day')
+    )
+
+    # Seed from the existing history, matching the flights counted in ingest_stats
+    op.execute("""
+        INSERT INTO flight_days (flight_id, day)
+        SELECT DISTINCT flight_id, CAST(timestamp AS DATE)
+        FROM price_snapshots
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('flight_days')
@@ -0,0 +1,26 @@
+"""Index flights by departure time
+
+Revision ID: 6a1d9e3b5c70
+Revises: 0c4e8b2f6d13
+Create Date: 2026-10-19 22:07:55.284117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1d9e3b5c70'
+down_revision: Union[str, None] = '0c4e8b2f6d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_flights_departure_datetime', 'flights', ['departure_datetime'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_flights_departure_datetime', table_name='flights')
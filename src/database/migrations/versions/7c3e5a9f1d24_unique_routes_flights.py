@@ -0,0 +1,117 @@
+"""Unique routes and flights
+
+Revision ID: 7c3e5a9f1d24
+Revises: a4c7e1f9b352
+Create Date: 2026-10-21 08:41:09.164523
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a9f1d24'
+down_revision: Union[str, None] = 'a4c7e1f9b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent writers may already have created duplicates: merge each into
+    # the oldest row of its key before the keys can be made unique
+    op.execute("""
+        CREATE TEMPORARY TABLE route_merge AS
+        SELECT r.id AS old_id, k.keep_id
+        FROM routes r
+        JOIN (SELECT airline_id, departure_airport_id, arrival_airport_id, MIN(id) AS keep_id
+              FROM routes
+              GROUP BY airline_id, departure_airport_id, arrival_airport_id
+              HAVING COUNT(*) > 1) k
+          ON r.airline_id = k.airline_id
+         AND r.departure_airport_id = k.departure_airport_id
+         AND r.arrival_airport_id = k.arrival_airport_id
+        WHERE r.id <> k.keep_id
+    """)
+    op.execute("""
+        DELETE FROM poll_schedules
+        WHERE route_id IN (SELECT old_id FROM route_merge)
+          AND EXISTS (SELECT 1 FROM poll_schedules kept, route_merge m
+                      WHERE m.old_id = poll_schedules.route_id
+                        AND kept.route_id = m.keep_id
+                        AND kept.departure_date = poll_schedules.departure_date)
+    """)
+    op.execute("""
+        UPDATE poll_schedules SET route_id = (SELECT keep_id FROM route_merge WHERE old_id = route_id)
+        WHERE route_id IN (SELECT old_id FROM route_merge)
+    """)
+    op.execute("""
+        UPDATE flights SET route_id = (SELECT keep_id FROM route_merge WHERE old_id = route_id)
+        WHERE route_id IN (SELECT old_id FROM route_merge)
+    """)
+    # Statistics of merged subjects rebuild from the next observations
+    op.execute("DELETE FROM price_stats WHERE scope = 'route' AND subject_id IN (SELECT old_id FROM route_merge)")
+    op.execute("DELETE FROM routes WHERE id IN (SELECT old_id FROM route_merge)")
+
+    op.execute("""
+        CREATE TEMPORARY TABLE flight_merge AS
+        SELECT f.id AS old_id, k.keep_id
+        FROM flights f
+        JOIN (SELECT route_id, flight_number, departure_datetime, MIN(id) AS keep_id
+              FROM flights
+              GROUP BY route_id, flight_number, departure_datetime
+              HAVING COUNT(*) > 1) k
+          ON f.route_id = k.route_id
+         AND f.flight_number = k.flight_number
+         AND f.departure_datetime = k.departure_datetime
+        WHERE f.id <> k.keep_id
+    """)
+    for table in ("price_snapshots", "price_anomalies"):
+        op.execute(f"""
+            UPDATE {table} SET flight_id = (SELECT keep_id FROM flight_merge WHERE old_id = flight_id)
+            WHERE flight_id IN (SELECT old_id FROM flight_merge)
+        """)
+    op.execute("""
+        INSERT INTO flight_days (flight_id, day)
+        SELECT DISTINCT m.keep_id, d.day
+        FROM flight_days d JOIN flight_merge m ON d.flight_id = m.old_id
+        WHERE NOT EXISTS (SELECT 1 FROM flight_days kept WHERE kept.flight_id = m.keep_id AND kept.day = d.day)
+    """)
+    op.execute("DELETE FROM flight_days WHERE flight_id IN (SELECT old_id FROM flight_merge)")
+    # Of the latest prices of a merged group, keep the most recent observation
+    op.execute("""
+        CREATE TEMPORARY TABLE latest_merge AS
+        SELECT lp.flight_id, COALESCE(m.keep_id, lp.flight_id) AS keep_id,
+               ROW_NUMBER() OVER (PARTITION BY COALESCE(m.keep_id, lp.flight_id)
+                                  ORDER BY lp.observed_at DESC, lp.flight_id) AS recency
+        FROM latest_prices lp
+        LEFT JOIN flight_merge m ON lp.flight_id = m.old_id
+        WHERE lp.flight_id IN (SELECT old_id FROM flight_merge)
+           OR lp.flight_id IN (SELECT keep_id FROM flight_merge)
+    """)
+    op.execute("DELETE FROM latest_prices WHERE flight_id IN (SELECT flight_id FROM latest_merge WHERE recency > 1)")
+    op.execute("""
+        DELETE FROM latest_prices
+        WHERE flight_id IN (SELECT keep_id FROM latest_merge WHERE recency = 1 AND flight_id <> keep_id)
+    """)
+    op.execute("""
+        UPDATE latest_prices SET flight_id = (SELECT keep_id FROM flight_merge WHERE old_id = flight_id)
+        WHERE flight_id IN (SELECT old_id FROM flight_merge)
+    """)
+    op.execute("DELETE FROM price_stats WHERE scope = 'flight' AND subject_id IN (SELECT old_id FROM flight_merge)")
+    op.execute("DELETE FROM flights WHERE id IN (SELECT old_id FROM flight_merge)")
+
+    op.drop_table('latest_merge')
+    op.drop_table('flight_merge')
+    op.drop_table('route_merge')
+
+    op.create_unique_constraint('uq_routes_airline_airports', 'routes',
+                                ['airline_id', 'departure_airport_id', 'arrival_airport_id'])
+    op.create_unique_constraint('uq_flights_route_number_departure', 'flights',
+                                ['route_id', 'flight_number', 'departure_datetime'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_flights_route_number_departure', 'flights', type_='unique')
+    op.drop_constraint('uq_routes_airline_airports', 'routes', type_='unique')
@@ -0,0 +1,37 @@
+"""Poll schedules
+
+Revision ID: 8a4e6c0b2d57
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-19 11:03:17.552931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e6c0b2d57'
+down_revision: Union[str, None] = '3f1c2a7d9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('poll_schedules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('route_id', sa.Integer(), nullable=False),
+    sa.Column('departure_date', sa.Date(), nullable=False),
+    sa.Column('change_rate', sa.Float(), nullable=False),
+    sa.Column('interval_hours', sa.Float(), nullable=False),
+    sa.Column('last_polled_at', sa.DateTime(), nullable=True),
+    sa.Column('next_poll_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('route_id', 'departure_date', name='uq_poll_schedules_route_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('poll_schedules')
@@ -0,0 +1,51 @@
+"""Count new flights in ingest_stats
+
+Revision ID: 8d2f6b1e4c57
+Revises: 2e8b4d6f0a19
+Create Date: 2026-10-22 09:41:05.813620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6b1e4c57'
+down_revision: Union[str, None] = '2e8b4d6f0a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('flights', sa.Column('first_seen', sa.Date(), nullable=True))
+    op.add_column('ingest_stats', sa.Column('new_flights', sa.Integer(), server_default='0', nullable=False))
+
+    # Seed from flight_days, which holds every day a flight was observed
+    op.execute("""
+        UPDATE flights
+        SET first_seen = (SELECT MIN(fd.day) FROM flight_days fd WHERE fd.flight_id = flights.id)
+    """)
+    op.execute("""
+        UPDATE ingest_stats
+        SET new_flights = seen.flights
+        FROM (
+            SELECT dep.iata_code AS departure_airport, arr.iata_code AS arrival_airport,
+                   f.first_seen AS day, COUNT(*) AS flights
+            FROM flights f
+            JOIN routes r ON f.route_id = r.id
+            JOIN airports dep ON r.departure_airport_id = dep.id
+            JOIN airports arr ON r.arrival_airport_id = arr.id
+            WHERE f.first_seen IS NOT NULL
+            GROUP BY dep.iata_code, arr.iata_code, f.first_seen
+        ) AS seen
+        WHERE ingest_stats.departure_airport = seen.departure_airport
+          AND ingest_stats.arrival_airport = seen.arrival_airport
+          AND ingest_stats.day = seen.day
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('ingest_stats', 'new_flights')
+    op.drop_column('flights', 'first_seen')
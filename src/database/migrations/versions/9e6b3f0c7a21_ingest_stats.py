@@ -0,0 +1,62 @@
+"""Ingest statistics
+
+Revision ID: 9e6b3f0c7a21
+Revises: 4d2a9c7e1f58
+Create Date: 2026-10-19 19:36:12.804519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e6b3f0c7a21'
+down_revision: Union[str, None] = '4d2a9c7e1f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingest_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('departure_airport', sa.String(length=3), nullable=False),
+    sa.Column('arrival_airport', sa.String(length=3), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('searches', sa.Integer(), nullable=False),
+    sa.Column('successful_searches', sa.Integer(), nullable=False),
+    sa.Column('snapshots', sa.Integer(), nullable=False),
+    sa.Column('flights', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('departure_airport', 'arrival_airport', 'day', name='uq_ingest_stats_route_day')
+    )
+
+    # Seed the counters from the existing history, one scan per table
+    op.execute("""
+        INSERT INTO ingest_stats (departure_airport, arrival_airport, day, searches,
+                                  successful_searches, snapshots, flights)
+        SELECT dep.iata_code, arr.iata_code, CAST(ps.timestamp AS DATE),
+               COUNT(DISTINCT ps.search_id), COUNT(DISTINCT ps.search_id),
+               COUNT(ps.id), COUNT(DISTINCT ps.flight_id)
+        FROM price_snapshots ps
+        JOIN flights f ON ps.flight_id = f.id
+        JOIN routes r ON f.route_id = r.id
+        JOIN airports dep ON r.departure_airport_id = dep.id
+        JOIN airports arr ON r.arrival_airport_id = arr.id
+        GROUP BY dep.iata_code, arr.iata_code, CAST(ps.timestamp AS DATE)
+    """)
+    # Searches without snapshots have no known route
+    op.execute("""
+        INSERT INTO ingest_stats (departure_airport, arrival_airport, day, searches,
+                                  successful_searches, snapshots, flights)
+        SELECT '', '', CAST(so.timestamp AS DATE), COUNT(*),
+               SUM(CASE WHEN so.successful THEN 1 ELSE 0 END), 0, 0
+        FROM search_operations so
+        WHERE NOT EXISTS (SELECT 1 FROM price_snapshots ps WHERE ps.search_id = so.id)
+        GROUP BY CAST(so.timestamp AS DATE)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_stats')
@@ -0,0 +1,41 @@
+"""Commit sequence
+
+Revision ID: a4c7e1f9b352
+Revises: 5e9c2a7d4b38
+Create Date: 2026-10-20 10:03:27.551862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e1f9b352'
+down_revision: Union[str, None] = '5e9c2a7d4b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('commit_sequence',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('search_operations', sa.Column('commit_seq', sa.BigInteger(), nullable=True))
+
+    # Everything saved so far is committed: number it by id and continue after it
+    op.execute("UPDATE search_operations SET commit_seq = id")
+    op.execute("INSERT INTO commit_sequence (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM search_operations")
+
+    op.create_index('ix_search_operations_commit_seq', 'search_operations', ['commit_seq'])
+    op.create_index('ix_price_snapshots_search', 'price_snapshots', ['search_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_snapshots_search', table_name='price_snapshots')
+    op.drop_index('ix_search_operations_commit_seq', table_name='search_operations')
+    op.drop_column('search_operations', 'commit_seq')
+    op.drop_table('commit_sequence')
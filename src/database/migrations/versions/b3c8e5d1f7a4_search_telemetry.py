@@ -0,0 +1,48 @@
+"""Search operation telemetry
+
+Revision ID: b3c8e5d1f7a4
+Revises: 9e6b3f0c7a21
+Create Date: 2026-10-19 20:14:48.163920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c8e5d1f7a4'
+down_revision: Union[str, None] = '9e6b3f0c7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('search_operations', sa.Column('departure_airport', sa.String(length=3), nullable=True))
+    op.add_column('search_operations', sa.Column('arrival_airport', sa.String(length=3), nullable=True))
+    op.add_column('search_operations', sa.Column('departure_date', sa.Date(), nullable=True))
+    op.add_column('search_operations', sa.Column('currency', sa.String(length=3), nullable=True))
+    op.add_column('search_operations', sa.Column('status_code', sa.Integer(), nullable=True))
+    op.add_column('search_operations', sa.Column('latency_ms', sa.Float(), nullable=True))
+    op.add_column('search_operations', sa.Column('response_bytes', sa.Integer(), nullable=True))
+    op.add_column('search_operations', sa.Column('fare_count', sa.Integer(), nullable=True))
+    op.add_column('search_operations', sa.Column('retries', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('search_operations', sa.Column('parse_ms', sa.Float(), nullable=True))
+    op.add_column('search_operations', sa.Column('persist_ms', sa.Float(), nullable=True))
+    op.create_index('ix_search_operations_timestamp', 'search_operations', ['timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_operations_timestamp', table_name='search_operations')
+    op.drop_column('search_operations', 'persist_ms')
+    op.drop_column('search_operations', 'parse_ms')
+    op.drop_column('search_operations', 'retries')
+    op.drop_column('search_operations', 'fare_count')
+    op.drop_column('search_operations', 'response_bytes')
+    op.drop_column('search_operations', 'latency_ms')
+    op.drop_column('search_operations', 'status_code')
+    op.drop_column('search_operations', 'currency')
+    op.drop_column('search_operations', 'departure_date')
+    op.drop_column('search_operations', 'arrival_airport')
+    op.drop_column('search_operations', 'departure_airport')
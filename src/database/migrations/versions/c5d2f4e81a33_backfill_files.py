@@ -0,0 +1,38 @@
+"""Backfill files
+
+Revision ID: c5d2f4e81a33
+Revises: 8a4e6c0b2d57
+Create Date: 2026-10-19 14:26:08.104772
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2f4e81a33'
+down_revision: Union[str, None] = '8a4e6c0b2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('backfill_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('modified_at', sa.DateTime(), nullable=False),
+    sa.Column('responses_done', sa.Integer(), nullable=False),
+    sa.Column('snapshots_done', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('error_message', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_files')
@@ -0,0 +1,46 @@
+"""Quarantined records
+
+Revision ID: d8f3a6c1e294
+Revises: 6a1d9e3b5c70
+Create Date: 2026-10-19 22:48:16.905231
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3a6c1e294'
+down_revision: Union[str, None] = '6a1d9e3b5c70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('quarantined_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('stage', sa.String(), nullable=False),
+    sa.Column('error_message', sa.String(), nullable=False),
+    sa.Column('search_id', sa.Integer(), nullable=True),
+    sa.Column('url', sa.String(), nullable=True),
+    sa.Column('departure_airport', sa.String(length=3), nullable=True),
+    sa.Column('arrival_airport', sa.String(length=3), nullable=True),
+    sa.Column('departure_date', sa.Date(), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('reprocessed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['search_id'], ['search_operations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quarantined_records_pending', 'quarantined_records', ['reprocessed_at', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quarantined_records_pending', table_name='quarantined_records')
+    op.drop_table('quarantined_records')
@@ -0,0 +1,46 @@
+"""Crawl work queue
+
+Revision ID: e7b9a1c3f604
+Revises: c5d2f4e81a33
+Create Date: 2026-10-19 16:02:44.870391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b9a1c3f604'
+down_revision: Union[str, None] = 'c5d2f4e81a33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('crawl_work_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('departure_airport', sa.String(length=3), nullable=False),
+    sa.Column('arrival_airport', sa.String(length=3), nullable=False),
+    sa.Column('departure_date', sa.Date(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('lease_owner', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('search_id', sa.Integer(), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['search_id'], ['search_operations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('departure_airport', 'arrival_airport', 'departure_date', 'currency',
+                        name='uq_crawl_work_items_search')
+    )
+    op.create_index('ix_crawl_work_items_claim', 'crawl_work_items', ['status', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_crawl_work_items_claim', table_name='crawl_work_items')
+    op.drop_table('crawl_work_items')
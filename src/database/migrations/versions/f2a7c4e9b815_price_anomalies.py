@@ -0,0 +1,73 @@
+"""Price statistics and anomalies
+
+Revision ID: f2a7c4e9b815
+Revises: b3c8e5d1f7a4
+Create Date: 2026-10-19 21:02:37.519604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c4e9b815'
+down_revision: Union[str, None] = 'b3c8e5d1f7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('price_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('mean', sa.Float(), nullable=False),
+    sa.Column('variance', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'subject_id', 'currency', name='uq_price_stats_subject')
+    )
+    op.create_table('price_anomalies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('flight_id', sa.Integer(), nullable=False),
+    sa.Column('search_id', sa.Integer(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('baseline', sa.String(), nullable=False),
+    sa.Column('expected_price', sa.Float(), nullable=False),
+    sa.Column('stddev', sa.Float(), nullable=False),
+    sa.Column('z_score', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['flight_id'], ['flights.id'], ),
+    sa.ForeignKeyConstraint(['search_id'], ['search_operations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_price_anomalies_observed_at', 'price_anomalies', ['observed_at'])
+
+    # Seed the statistics from the existing history (plain mean and variance)
+    op.execute("""
+        INSERT INTO price_stats (scope, subject_id, currency, count, mean, variance, updated_at)
+        SELECT 'flight', ps.flight_id, ps.currency, COUNT(*), AVG(ps.outbound_price),
+               COALESCE(VAR_POP(ps.outbound_price), 0), NOW()
+        FROM price_snapshots ps
+        GROUP BY ps.flight_id, ps.currency
+    """)
+    op.execute("""
+        INSERT INTO price_stats (scope, subject_id, currency, count, mean, variance, updated_at)
+        SELECT 'route', f.route_id, ps.currency, COUNT(*), AVG(ps.outbound_price),
+               COALESCE(VAR_POP(ps.outbound_price), 0), NOW()
+        FROM price_snapshots ps
+        JOIN flights f ON ps.flight_id = f.id
+        GROUP BY f.route_id, ps.currency
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_anomalies_observed_at', table_name='price_anomalies')
+    op.drop_table('price_anomalies')
+    op.drop_table('price_stats')
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, BigInteger, Integer, String, Text, Float, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, true
 from sqlalchemy.orm import relationship
 from .connection import Base
 
@@ -42,12 +42,23 @@ class Route(Base):
     Links airports and airlines together.
     """
     __tablename__ = 'routes'
+    __table_args__ = (
+        Index('ix_routes_airports', 'departure_airport_id', 'arrival_airport_id'),
+        UniqueConstraint('airline_id', 'departure_airport_id', 'arrival_airport_id',
+                         name='uq_routes_airline_airports'),
+    )
 
     id = Column(Integer, primary_key=True)
     airline_id = Column(Integer, ForeignKey('airlines.id'), nullable=False)
     departure_airport_id = Column(Integer, ForeignKey('airports.id'), nullable=False)
     arrival_airport_id = Column(Integer, ForeignKey('airports.id'), nullable=False)
 
+    # Route catalog: learned from search results, including pairs without service
+    is_served = Column(Boolean, nullable=False, default=True, server_default=true())
+    last_checked_at = Column(DateTime, nullable=True)
+    last_served_at = Column(DateTime, nullable=True)
+    empty_checks = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     airline = relationship("Airline", back_populates="routes")
     departure_airport = relationship("Airport", foreign_keys=[departure_airport_id], back_populates="departures")
@@ -61,12 +72,19 @@ class Flight(Base):
     Contains flight details and schedule information.
     """
     __tablename__ = 'flights'
+    __table_args__ = (
+        Index('ix_flights_departure_datetime', 'departure_datetime'),
+        Index('ix_flights_flight_number', 'flight_number'),
+        UniqueConstraint('route_id', 'flight_number', 'departure_datetime',
+                         name='uq_flights_route_number_departure'),
+    )
 
     id = Column(Integer, primary_key=True)
     route_id = Column(Integer, ForeignKey('routes.id'), nullable=False)
     flight_number = Column(String, nullable=False)
     departure_datetime = Column(DateTime, nullable=False)
     arrival_datetime = Column(DateTime, nullable=False)
+    first_seen = Column(Date)  # Day of its first ingested snapshot, counted in ingest_stats.new_flights
 
     # Relationships
     route = relationship("Route", back_populates="flights")
@@ -79,12 +97,32 @@ class SearchOperation(Base):
     Helps track the bot's performance and reliability.
     """
     __tablename__ = 'search_operations'
+    __table_args__ = (
+        Index('ix_search_operations_timestamp', 'timestamp'),
+        Index('ix_search_operations_commit_seq', 'commit_seq'),
+    )
 
     id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
     successful = Column(Boolean, nullable=False)
     error_message = Column(String, nullable=True)
 
+    # Telemetry: what was searched and how the request went
+    departure_airport = Column(String(3), nullable=True)
+    arrival_airport = Column(String(3), nullable=True)
+    departure_date = Column(Date, nullable=True)
+    currency = Column(String(3), nullable=True)
+    status_code = Column(Integer, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    response_bytes = Column(Integer, nullable=True)
+    fare_count = Column(Integer, nullable=True)
+    retries = Column(Integer, nullable=False, default=0, server_default="0")
+    parse_ms = Column(Float, nullable=True)
+    persist_ms = Column(Float, nullable=True)
+
+    # Position in commit order of the transaction that saved its snapshots (see CommitSequence)
+    commit_seq = Column(BigInteger, nullable=True)
+
     # Relationships
     prices_found = relationship("PriceSnapshot", back_populates="search")
 
@@ -95,6 +133,10 @@ class PriceSnapshot(Base):
     Preserves complete price history instead of updating prices.
     """
     __tablename__ = 'price_snapshots'
+    __table_args__ = (
+        Index('ix_price_snapshots_search', 'search_id', 'id'),
+        Index('ix_price_snapshots_flight_time', 'flight_id', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True)
     flight_id = Column(Integer, ForeignKey('flights.id'), nullable=False)
@@ -102,7 +144,252 @@ class PriceSnapshot(Base):
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
     outbound_price = Column(Float, nullable=False)
     return_price = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False, default="EUR", server_default="EUR")
 
     # Relationships
     flight = relationship("Flight", back_populates="price_history")
-    search = relationship("SearchOperation", back_populates="prices_found")
\ No newline at end of file
+    search = relationship("SearchOperation", back_populates="prices_found")
+
+
+class CommitSequence(Base):
+    """
+    Single-row counter that numbers ingest transactions in commit order.
+    Each transaction takes the next value last, right before committing,
+    and the row stays locked until the commit, so a higher number is never
+    visible before a lower one (unlike ids, which are assigned at insert).
+    """
+    __tablename__ = 'commit_sequence'
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False)
+
+
+class PollSchedule(Base):
+    """
+    Adaptive polling state for one route and departure date.
+    Volatile or soon-departing dates are polled often, flat ones rarely.
+    """
+    __tablename__ = 'poll_schedules'
+    __table_args__ = (
+        UniqueConstraint('route_id', 'departure_date', name='uq_poll_schedules_route_date'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    route_id = Column(Integer, ForeignKey('routes.id'), nullable=False)
+    departure_date = Column(Date, nullable=False)
+    change_rate = Column(Float, nullable=False)  # Estimated price changes per hour
+    interval_hours = Column(Float, nullable=False)
+    last_polled_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=False)
+
+    # Relationships
+    route = relationship("Route")
+
+
+class BackfillFile(Base):
+    """
+    Tracks the import of a saved JSON result file into the database.
+    Progress is committed together with each imported batch, so an
+    interrupted backfill resumes exactly where it stopped.
+    """
+    __tablename__ = 'backfill_files'
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    modified_at = Column(DateTime, nullable=False)
+    responses_done = Column(Integer, nullable=False, default=0)
+    snapshots_done = Column(Integer, nullable=False, default=0)
+    completed = Column(Boolean, nullable=False, default=False)
+    error_message = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CrawlWorkItem(Base):
+    """
+    One (route, date, currency) search in the shared crawl queue.
+    Workers claim items with SELECT ... FOR UPDATE SKIP LOCKED and hold a
+    lease while fetching; expired leases are picked up by other workers.
+    """
+    __tablename__ = 'crawl_work_items'
+    __table_args__ = (
+        UniqueConstraint('departure_airport', 'arrival_airport', 'departure_date', 'currency',
+                         name='uq_crawl_work_items_search'),
+        Index('ix_crawl_work_items_claim', 'status', 'available_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    departure_airport = Column(String(3), nullable=False)
+    arrival_airport = Column(String(3), nullable=False)
+    departure_date = Column(Date, nullable=False)
+    currency = Column(String(3), nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, leased, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    search_id = Column(Integer, ForeignKey('search_operations.id'), nullable=True)
+    last_error = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    search = relationship("SearchOperation")
+
+
+class FxRate(Base):
+    """
+    Exchange rate observation: 1 unit of base_currency = rate quote_currency.
+    Kept as history so prices can be converted at the rate of their time;
+    fetched_at is the reference date the rate was published for.
+    """
+    __tablename__ = 'fx_rates'
+    __table_args__ = (
+        Index('ix_fx_rates_pair_time', 'base_currency', 'quote_currency', 'fetched_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    base_currency = Column(String(3), nullable=False)
+    quote_currency = Column(String(3), nullable=False)
+    rate = Column(Float, nullable=False)
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class LatestPrice(Base):
+    """
+    Current price of each flight, upserted together with every snapshot batch.
+    Keeps the price before the last change, so current prices and recent
+    changes are index lookups instead of scans over price_snapshots.
+    """
+    __tablename__ = 'latest_prices'
+    __table_args__ = (
+        Index('ix_latest_prices_changed_at', 'changed_at'),
+        Index('ix_latest_prices_changed_search', 'changed_search_id', 'flight_id'),
+    )
+
+    flight_id = Column(Integer, ForeignKey('flights.id'), primary_key=True)
+    search_id = Column(Integer, ForeignKey('search_operations.id'), nullable=False)
+    observed_at = Column(DateTime, nullable=False)
+    outbound_price = Column(Float, nullable=False)
+    return_price = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False)
+    previous_outbound_price = Column(Float, nullable=True)
+    previous_return_price = Column(Float, nullable=True)
+    outbound_delta = Column(Float, nullable=True)  # Null when the currency changed
+    return_delta = Column(Float, nullable=True)
+    changed_at = Column(DateTime, nullable=False)
+    changed_search_id = Column(Integer, nullable=False)  # Search of the last change, for the change feed
+
+    # Relationships
+    flight = relationship("Flight")
+
+
+class IngestStat(Base):
+    """
+    Ingest counters per searched route and day, incremented in the same
+    transaction as the snapshots, so summaries never scan the history.
+    Searches without a known route are counted under empty airport codes.
+    """
+    __tablename__ = 'ingest_stats'
+    __table_args__ = (
+        UniqueConstraint('departure_airport', 'arrival_airport', 'day', name='uq_ingest_stats_route_day'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    departure_airport = Column(String(3), nullable=False)
+    arrival_airport = Column(String(3), nullable=False)
+    day = Column(Date, nullable=False)
+    searches = Column(Integer, nullable=False, default=0)
+    successful_searches = Column(Integer, nullable=False, default=0)
+    snapshots = Column(Integer, nullable=False, default=0)
+    flights = Column(Integer, nullable=False, default=0)  # Distinct flights observed that day
+    new_flights = Column(Integer, nullable=False, default=0)  # Flights first seen that day
+
+
+class FlightDay(Base):
+    """
+    Days on which each flight was observed, so ingest_stats counts a flight
+    once per day even when older snapshots are ingested after newer ones.
+    """
+    __tablename__ = 'flight_days'
+
+    flight_id = Column(Integer, ForeignKey('flights.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+
+class PriceStat(Base):
+    """
+    Checkpoint of the online price statistics of a flight or a route
+    (exponentially weighted mean and variance of the outbound price per
+    currency), merged by the anomaly detector in each ingest transaction.
+    """
+    __tablename__ = 'price_stats'
+    __table_args__ = (
+        UniqueConstraint('scope', 'subject_id', 'currency', name='uq_price_stats_subject'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, nullable=False)  # flight or route
+    subject_id = Column(Integer, nullable=False)  # flights.id or routes.id
+    currency = Column(String(3), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    variance = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PriceAnomaly(Base):
+    """
+    An unusual price drop or spike, detected while the snapshot was ingested
+    by comparing it with the flight's statistics (or the route's, for flights
+    with too few observations).
+    """
+    __tablename__ = 'price_anomalies'
+    __table_args__ = (
+        Index('ix_price_anomalies_observed_at', 'observed_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    flight_id = Column(Integer, ForeignKey('flights.id'), nullable=False)
+    search_id = Column(Integer, ForeignKey('search_operations.id'), nullable=False)
+    observed_at = Column(DateTime, nullable=False)
+    price = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False)
+    kind = Column(String, nullable=False)  # drop or spike
+    baseline = Column(String, nullable=False)  # flight or route statistics
+    expected_price = Column(Float, nullable=False)
+    stddev = Column(Float, nullable=False)
+    z_score = Column(Float, nullable=False)
+
+    # Relationships
+    flight = relationship("Flight")
+
+
+class QuarantinedRecord(Base):
+    """
+    Fares or whole responses that could not be parsed or saved, kept with
+    their raw payload so the rest of a run commits and they can be
+    reprocessed later. The payload is a JSON list of fares in the API format.
+    """
+    __tablename__ = 'quarantined_records'
+    __table_args__ = (
+        Index('ix_quarantined_records_pending', 'reprocessed_at', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    kind = Column(String, nullable=False)  # fare or response
+    stage = Column(String, nullable=False)  # parse or save
+    error_message = Column(String, nullable=False)
+    search_id = Column(Integer, ForeignKey('search_operations.id'), nullable=True)
+    url = Column(String, nullable=True)
+    departure_airport = Column(String(3), nullable=True)
+    arrival_airport = Column(String(3), nullable=True)
+    departure_date = Column(Date, nullable=True)
+    currency = Column(String(3), nullable=True)
+    fetched_at = Column(DateTime, nullable=True)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    reprocessed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    search = relationship("SearchOperation")
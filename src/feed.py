@@ -0,0 +1,134 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from src.database.models import Flight, LatestPrice, PriceSnapshot, SearchOperation
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FeedCursor:
+    """
+    Position of a consumer in the change feed: the (commit_seq, snapshot id)
+    of the last snapshot read and the (commit_seq, flight_id) of the last
+    latest-price change read.
+    """
+    snapshot_seq: int = 0
+    snapshot_id: int = 0
+    change_seq: int = 0
+    change_flight_id: int = 0
+
+    def encode(self) -> str:
+        """Returns the opaque cursor string handed to consumers."""
+        return f"{self.snapshot_seq}.{self.snapshot_id}.{self.change_seq}.{self.change_flight_id}"
+
+    @classmethod
+    def decode(cls, cursor: Optional[str]) -> 'FeedCursor':
+        """
+        Parses a cursor string; an empty cursor starts at the beginning.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if not cursor:
+            return cls()
+        try:
+            snapshot_seq, snapshot_id, change_seq, change_flight_id = (int(part) for part in cursor.split("."))
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return cls(snapshot_seq, snapshot_id, change_seq, change_flight_id)
+
+
+def read_changes(db: Session, cursor: FeedCursor, limit: int = 1000) -> dict:
+    """
+    Reads the next page of the change feed: snapshots saved, and flights
+    whose latest price changed, in transactions committed after the cursor.
+
+    Both are ordered by the commit sequence of the saving transaction rather
+    than by id: ids are assigned when rows are inserted, so with several
+    writers a lower id can commit after a consumer has read past it, while
+    commit sequence numbers become visible strictly in order. Both reads are
+    keyset scans on indexes, so a page costs the same however far the
+    consumer has read.
+
+    A flight that changed price several times since the cursor appears
+    once, with its current price. Reprocessed quarantine records are saved
+    under their original search operation, whose snapshots are then
+    delivered again with the new ones.
+
+    Args:
+        db: SQLAlchemy database session
+        cursor: Position after the previous page
+        limit: Maximum snapshots and maximum price changes per page
+
+    Returns:
+        dict: "snapshots", "price_changes", the "cursor" to pass next and
+            "has_more" when either list was cut at the limit
+    """
+    snapshot_rows = db.execute(
+        select(SearchOperation.commit_seq, PriceSnapshot.id, PriceSnapshot.flight_id, PriceSnapshot.search_id,
+               PriceSnapshot.timestamp, PriceSnapshot.outbound_price, PriceSnapshot.return_price,
+               PriceSnapshot.currency)
+        .join(SearchOperation, PriceSnapshot.search_id == SearchOperation.id)
+        .where(SearchOperation.commit_seq >= cursor.snapshot_seq,
+               tuple_(SearchOperation.commit_seq, PriceSnapshot.id)
+               > tuple_(cursor.snapshot_seq, cursor.snapshot_id))
+        .order_by(SearchOperation.commit_seq, PriceSnapshot.id)
+        .limit(limit)
+    ).all()
+
+    change_rows = db.execute(
+        select(LatestPrice, SearchOperation.commit_seq, Flight.flight_number, Flight.departure_datetime)
+        .join(SearchOperation, LatestPrice.changed_search_id == SearchOperation.id)
+        .join(Flight, LatestPrice.flight_id == Flight.id)
+        .where(SearchOperation.commit_seq >= cursor.change_seq,
+               tuple_(SearchOperation.commit_seq, LatestPrice.flight_id)
+               > tuple_(cursor.change_seq, cursor.change_flight_id))
+        .order_by(SearchOperation.commit_seq, LatestPrice.flight_id)
+        .limit(limit)
+    ).all()
+
+    snapshots = [
+        {
+            "id": snapshot_id,
+            "flight_id": flight_id,
+            "search_id": search_id,
+            "timestamp": timestamp,
+            "outbound_price": outbound_price,
+            "return_price": return_price,
+            "currency": currency
+        }
+        for _, snapshot_id, flight_id, search_id, timestamp, outbound_price, return_price, currency in snapshot_rows
+    ]
+    price_changes = [
+        {
+            "flight_id": latest.flight_id,
+            "flight_number": flight_number,
+            "departure_datetime": departure_datetime,
+            "search_id": latest.changed_search_id,
+            "changed_at": latest.changed_at,
+            "outbound_price": latest.outbound_price,
+            "return_price": latest.return_price,
+            "previous_outbound_price": latest.previous_outbound_price,
+            "previous_return_price": latest.previous_return_price,
+            "currency": latest.currency
+        }
+        for latest, _, flight_number, departure_datetime in change_rows
+    ]
+
+    next_cursor = FeedCursor(
+        snapshot_rows[-1][0] if snapshot_rows else cursor.snapshot_seq,
+        snapshot_rows[-1][1] if snapshot_rows else cursor.snapshot_id,
+        change_rows[-1][1] if change_rows else cursor.change_seq,
+        change_rows[-1][0].flight_id if change_rows else cursor.change_flight_id
+    )
+    return {
+        "snapshots": snapshots,
+        "price_changes": price_changes,
+        "cursor": next_cursor.encode(),
+        "has_more": len(snapshots) == limit or len(price_changes) == limit
+    }
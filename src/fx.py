@@ -0,0 +1,183 @@
+import logging
+import xml.etree.ElementTree as ElementTree
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.config import DEFAULT_CURRENCY
+from src.database.models import FxRate
+
+logger = logging.getLogger(__name__)
+
+# Daily euro reference rates published by the European Central Bank
+ECB_DAILY_URL = "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml"
+ECB_NAMESPACE = "{http://www.ecb.int/vocabulary/2002-08-01/eurofxref}"
+
+
+class FxRateTable:
+    """
+    Locally cached exchange rates, used to convert prices at read time.
+
+    Rates are stored in fx_rates as EUR -> X observations with the ECB
+    reference date they apply from, refreshed from the ECB at most once per
+    max_age. Lookups use the last rate known at a given time, so historical
+    prices can be converted at the rate of their day, and cross rates are
+    derived through EUR.
+    """
+
+    def __init__(self,
+                 max_age: timedelta = timedelta(hours=24),
+                 source_url: str = ECB_DAILY_URL,
+                 timeout: float = 10.0):
+        """
+        Args:
+            max_age: Age after which refresh() downloads new rates
+            source_url: ECB daily reference rates XML
+            timeout: Download timeout in seconds
+        """
+        self.max_age = max_age
+        self.source_url = source_url
+        self.timeout = timeout
+        self.loaded_at: Optional[datetime] = None
+        # Quote currency -> (fetch times, rates), both sorted by time
+        self._rates: Dict[str, Tuple[List[datetime], List[float]]] = {}
+
+    def refresh(self, db: Session, force: bool = False) -> int:
+        """
+        Downloads current rates unless the stored ones are recent enough.
+        Rates of a reference date that is already stored are not added again.
+
+        Args:
+            db: SQLAlchemy database session
+            force: Download even if the stored rates are recent
+
+        Returns:
+            int: Number of rates stored (0 if the cache was still fresh or
+                already had the published rates)
+        """
+        latest = db.query(func.max(FxRate.fetched_at)).scalar()
+        if not force and latest is not None and datetime.utcnow() - latest < self.max_age:
+            logger.info(f"FX rates from {latest} are still fresh")
+            return 0
+
+        response = requests.get(self.source_url, timeout=self.timeout)
+        response.raise_for_status()
+        rate_date, rates = self._parse_ecb(response.content)
+        if latest is not None and rate_date <= latest:
+            logger.info(f"FX rates of {rate_date.date()} are already stored")
+            return 0
+
+        db.add_all(
+            FxRate(base_currency=DEFAULT_CURRENCY, quote_currency=quote, rate=rate, fetched_at=rate_date)
+            for quote, rate in rates.items()
+        )
+        db.commit()
+        logger.info(f"Stored {len(rates)} FX rates of {rate_date.date()}")
+        return len(rates)
+
+    @staticmethod
+    def _parse_ecb(body: bytes) -> Tuple[datetime, Dict[str, float]]:
+        """Extracts the reference date and currency -> rate pairs from the ECB XML feed."""
+        root = ElementTree.fromstring(body)
+        dated = next(cube for cube in root.iter(f"{ECB_NAMESPACE}Cube") if "time" in cube.attrib)
+        rates = {
+            cube.attrib["currency"]: float(cube.attrib["rate"])
+            for cube in dated
+            if "currency" in cube.attrib
+        }
+        return datetime.strptime(dated.attrib["time"], "%Y-%m-%d"), rates
+
+    def load(self, db: Session) -> 'FxRateTable':
+        """Loads the stored rate history into memory."""
+        rates: Dict[str, Tuple[List[datetime], List[float]]] = {}
+        rows = (
+            db.query(FxRate.quote_currency, FxRate.fetched_at, FxRate.rate)
+            .filter(FxRate.base_currency == DEFAULT_CURRENCY)
+            .order_by(FxRate.quote_currency, FxRate.fetched_at)
+            .all()
+        )
+        for quote, fetched_at, rate in rows:
+            times, values = rates.setdefault(quote, ([], []))
+            times.append(fetched_at)
+            values.append(rate)
+
+        self._rates = rates
+        self.loaded_at = datetime.utcnow()
+        return self
+
+    @property
+    def latest_rate_at(self) -> Optional[datetime]:
+        """Reference date of the newest loaded rate, which changes the rate of recent prices."""
+        return max((times[-1] for times, _ in self._rates.values()), default=None)
+
+    @property
+    def currencies(self) -> List[str]:
+        """Currencies that can be converted."""
+        return sorted(set(self._rates) | {DEFAULT_CURRENCY})
+
+    def _euro_rate(self, currency: str, at: Optional[datetime]) -> float:
+        """Units of currency per euro at a given time (latest if at is None)."""
+        if currency == DEFAULT_CURRENCY:
+            return 1.0
+        if currency not in self._rates:
+            raise ValueError(f"No FX rate available for {currency}")
+
+        times, values = self._rates[currency]
+        if at is None:
+            return values[-1]
+        # Last rate known at that time, or the oldest one for earlier times
+        return values[max(bisect_right(times, at) - 1, 0)]
+
+    def _euro_rates(self, currency: str, at: np.ndarray) -> np.ndarray:
+        """Vectorized _euro_rate for an array of Unix times in seconds."""
+        if currency == DEFAULT_CURRENCY:
+            return np.ones(len(at))
+        if currency not in self._rates:
+            raise ValueError(f"No FX rate available for {currency}")
+
+        times, values = self._rates[currency]
+        times = np.array(times, dtype="datetime64[s]").astype(np.int64)
+        return np.array(values)[np.maximum(np.searchsorted(times, at, side="right") - 1, 0)]
+
+    def rates(self, from_currency: str, to_currency: str, at: np.ndarray) -> np.ndarray:
+        """
+        Exchange rates from one currency to another at many times, with one
+        binary search over the rate dates per time instead of a Python call.
+
+        Args:
+            from_currency: Currency of the amounts
+            to_currency: Requested currency
+            at: Times of the rates as Unix seconds
+
+        Returns:
+            np.ndarray: Units of to_currency per unit of from_currency, one per time
+        """
+        if from_currency == to_currency:
+            return np.ones(len(at))
+        return self._euro_rates(to_currency, at) / self._euro_rates(from_currency, at)
+
+    def rate(self, from_currency: str, to_currency: str, at: Optional[datetime] = None) -> float:
+        """
+        Exchange rate from one currency to another.
+
+        Args:
+            from_currency: Currency of the amount
+            to_currency: Requested currency
+            at: Time of the rate (latest if None)
+
+        Returns:
+            float: Units of to_currency per unit of from_currency
+        """
+        if from_currency == to_currency:
+            return 1.0
+        return self._euro_rate(to_currency, at) / self._euro_rate(from_currency, at)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str,
+                at: Optional[datetime] = None) -> float:
+        """Converts an amount, rounded to cents."""
+        return round(amount * self.rate(from_currency, to_currency, at), 2)
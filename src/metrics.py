@@ -0,0 +1,123 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.database.models import SearchOperation
+
+logger = logging.getLogger(__name__)
+
+# (name, help) of the exported gauges, in output order
+METRICS = [
+    ("easyjet_searches", "Searches in the window, by route and outcome"),
+    ("easyjet_search_fares", "Fares returned in the window"),
+    ("easyjet_search_response_bytes", "Response bytes received in the window"),
+    ("easyjet_search_retries", "Extra (hedged) requests sent in the window"),
+    ("easyjet_search_latency_ms_avg", "Average HTTP latency in milliseconds"),
+    ("easyjet_search_latency_ms_max", "Maximum HTTP latency in milliseconds"),
+    ("easyjet_search_parse_ms_avg", "Average JSON and fare parsing time in milliseconds"),
+    ("easyjet_search_persist_ms_avg", "Average database save time in milliseconds"),
+    ("easyjet_metrics_window_seconds", "Length of the aggregation window"),
+    ("easyjet_searches_per_second", "Search throughput over the window"),
+    ("easyjet_fares_per_second", "Fare throughput over the window"),
+]
+
+
+def _escape(value: str) -> str:
+    """Escapes a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    """Formats Prometheus labels."""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def collect_search_metrics(db: Session, window: timedelta = timedelta(hours=1)) -> List[Tuple[str, str, float]]:
+    """
+    Aggregates the telemetry of recent search operations per route.
+
+    Args:
+        db: SQLAlchemy database session
+        window: How far back to aggregate
+
+    Returns:
+        List[tuple]: (metric name, labels, value) samples
+    """
+    since = datetime.utcnow() - window
+    rows = (
+        db.query(
+            SearchOperation.departure_airport,
+            SearchOperation.arrival_airport,
+            SearchOperation.successful,
+            func.count(SearchOperation.id),
+            func.sum(SearchOperation.fare_count),
+            func.sum(SearchOperation.response_bytes),
+            func.sum(SearchOperation.retries),
+            func.avg(SearchOperation.latency_ms),
+            func.max(SearchOperation.latency_ms),
+            func.avg(SearchOperation.parse_ms),
+            func.avg(SearchOperation.persist_ms)
+        )
+        .filter(SearchOperation.timestamp >= since)
+        .group_by(SearchOperation.departure_airport, SearchOperation.arrival_airport, SearchOperation.successful)
+        .all()
+    )
+
+    samples = []
+    totals: Dict[str, float] = {"fares": 0, "searches": 0}
+    for dep, arr, successful, searches, fares, size, retries, latency, latency_max, parse, persist in rows:
+        route = {"departure": dep or "", "arrival": arr or ""}
+        outcome = "success" if successful else "failure"
+        labels = _labels(**route, outcome=outcome)
+        totals["searches"] += searches
+        totals["fares"] += fares or 0
+
+        for name, value in (
+            ("easyjet_searches", searches),
+            ("easyjet_search_fares", fares),
+            ("easyjet_search_response_bytes", size),
+            ("easyjet_search_retries", retries),
+            ("easyjet_search_latency_ms_avg", latency),
+            ("easyjet_search_latency_ms_max", latency_max),
+            ("easyjet_search_parse_ms_avg", parse),
+            ("easyjet_search_persist_ms_avg", persist),
+        ):
+            if value is not None:
+                samples.append((name, labels, float(value)))
+
+    seconds = window.total_seconds()
+    samples.append(("easyjet_metrics_window_seconds", "", seconds))
+    samples.append(("easyjet_searches_per_second", "", totals["searches"] / seconds))
+    samples.append(("easyjet_fares_per_second", "", totals["fares"] / seconds))
+    return samples
+
+
+def render_prometheus(db: Session, window: timedelta = timedelta(hours=1)) -> str:
+    """
+    Renders the search telemetry of the last window in the Prometheus text
+    exposition format. All metrics are gauges over the window, so rates and
+    regressions can be read directly without a counter reset history.
+
+    Args:
+        db: SQLAlchemy database session
+        window: How far back to aggregate
+
+    Returns:
+        str: Metrics text, ready to serve on /metrics or to write for the
+            node_exporter textfile collector
+    """
+    samples = collect_search_metrics(db, window)
+
+    lines = []
+    for name, help_text in METRICS:
+        metric_samples = [(labels, value) for sample_name, labels, value in samples if sample_name == name]
+        if not metric_samples:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        # Shortest exact form: :g keeps 6 significant digits, too few for byte and row counts
+        lines.extend(f"{name}{labels} {float(value)!r}" for labels, value in metric_samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,182 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PhaseStats:
+    """Accumulated measurements of one stage of a run."""
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    peak_memory_bytes: Optional[int] = None
+
+
+class Profiler:
+    """
+    Phase timers for the stages of a run (network, JSON parsing, fare
+    parsing, database writes, file writes), with optional cProfile and
+    tracemalloc capture.
+
+    Timers are no-ops until the profiler is started, so the phase hooks can
+    stay in the code paths permanently. Phases may be entered from several
+    threads; memory peaks are process-wide and therefore approximate when
+    stages overlap.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.phases: Dict[str, PhaseStats] = {}
+        self.started_at: Optional[datetime] = None
+        self._start = 0.0
+        self._wall_seconds = 0.0
+        self._trace_memory = False
+        self._cpu_profile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self, cpu: bool = False, memory: bool = False) -> None:
+        """
+        Starts collecting phase measurements.
+
+        Args:
+            cpu: Also run cProfile on the calling thread
+            memory: Also trace allocations to report peak memory per phase
+        """
+        self.phases = {}
+        self.enabled = True
+        self.started_at = datetime.utcnow()
+        self._trace_memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cpu:
+            self._cpu_profile = cProfile.Profile()
+            self._cpu_profile.enable()
+        self._start = perf_counter()
+
+    def stop(self) -> None:
+        """Stops collecting measurements."""
+        if not self.enabled:
+            return
+        self._wall_seconds = perf_counter() - self._start
+        self.enabled = False
+        if self._cpu_profile is not None:
+            self._cpu_profile.disable()
+        if self._trace_memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times the enclosed block as one call of the named phase.
+
+        Args:
+            name: Phase name, e.g. "network" or "db_write"
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        tracing = self._trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the enclosing phase's peak before resetting it for this one
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            stack.append([current, current])
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            peak_memory = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                base, inner_peak = stack.pop()
+                peak_memory = max(peak, inner_peak) - base
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+            self._record(name, elapsed, peak_memory)
+
+    def _record(self, name: str, elapsed: float, peak_memory: Optional[int]) -> None:
+        with self._lock:
+            stats = self.phases.setdefault(name, PhaseStats())
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            if peak_memory is not None:
+                stats.peak_memory_bytes = max(stats.peak_memory_bytes or 0, peak_memory)
+
+    def cpu_hotspots(self, limit: int = 20) -> List[dict]:
+        """Returns the functions with the highest cumulative time from cProfile."""
+        if self._cpu_profile is None:
+            return []
+
+        stats = pstats.Stats(self._cpu_profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "own_seconds": own,
+                "cumulative_seconds": cumulative
+            })
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[:limit]
+
+    def report(self) -> dict:
+        """Returns the measurements as a JSON-serializable dictionary."""
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "wall_seconds": self._wall_seconds,
+            "phases": {name: asdict(stats) for name, stats in sorted(self.phases.items())},
+            "cpu_hotspots": self.cpu_hotspots()
+        }
+
+    def summary(self) -> str:
+        """Formats the phase measurements as a table."""
+        lines = [f"Run profile ({self._wall_seconds:.2f}s wall time)",
+                 f"{'phase':<16}{'calls':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'peak MiB':>10}"]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total_seconds):
+            mean_ms = stats.total_seconds / stats.calls * 1000
+            peak = f"{stats.peak_memory_bytes / 2 ** 20:.1f}" if stats.peak_memory_bytes is not None else "-"
+            lines.append(f"{name:<16}{stats.calls:>8}{stats.total_seconds:>10.3f}"
+                         f"{mean_ms:>10.1f}{stats.max_seconds * 1000:>10.1f}{peak:>10}")
+        for row in self.cpu_hotspots(10):
+            lines.append(f"  {row['cumulative_seconds']:8.3f}s  {row['function']}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the report as JSON, for comparing runs.
+
+        Args:
+            path: Output file path
+        """
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        logger.info(f"Profile report written to {output}")
+
+
+# Shared by the phase hooks of the client, parser and data manager
+profiler = Profiler()
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Tag = Tuple[str, ...]
+
+
+def flight_tag(flight_number: str) -> Tag:
+    """Tag of the cached reads of a flight number."""
+    return ("flight", flight_number)
+
+
+def route_tag(departure: str, arrival: str) -> Tag:
+    """Tag of the cached reads of a route."""
+    return ("route", departure, arrival)
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of query results, invalidated per flight and route.
+
+    Every entry carries tags (flight numbers, routes) of the data it was
+    built from. Saving fares invalidates exactly the entries tagged with
+    their flights and routes. Each tag has a generation counter: a result is
+    only stored if none of its tags was invalidated while it was computed,
+    so a read racing a write never caches the old data.
+
+    Writes in other processes are not seen, so entries also expire after
+    max_age seconds. Cached results are shared and must not be modified.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_age: Optional[float] = 60.0):
+        """
+        Args:
+            max_entries: Maximum number of cached results
+            max_age: Seconds after which an entry expires (None: only on invalidation)
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Tuple[Tag, ...]]]" = OrderedDict()
+        self._keys_by_tag: Dict[Tag, Set[Hashable]] = defaultdict(set)
+        self._generations: Dict[Tag, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached result of a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.max_age is not None and time.monotonic() - entry[0] > self.max_age:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def token(self, tags: Iterable[Tag]) -> Tuple[int, ...]:
+        """Returns the current generations of tags, to pass to put()."""
+        with self._lock:
+            return tuple(self._generations[tag] for tag in tags)
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[Tag], token: Tuple[int, ...]) -> None:
+        """
+        Stores a result, unless one of its tags was invalidated since token() was taken.
+
+        Args:
+            key: Cache key of the query
+            value: Query result
+            tags: Tags of the data the result was built from
+            token: Generations returned by token() before the query ran
+        """
+        tags = tuple(tags)
+        with self._lock:
+            if tuple(self._generations[tag] for tag in tags) != token:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), value, tags)
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[Tag]) -> None:
+        """Drops all entries carrying any of the tags."""
+        with self._lock:
+            for tag in set(tags):
+                self._generations[tag] += 1
+                for key in list(self._keys_by_tag.pop(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def invalidate_fares(self, fares: Iterable) -> None:
+        """Drops the entries of the flights and routes of saved fares."""
+        tags = set()
+        for fare in fares:
+            tags.add(flight_tag(fare.flight_number))
+            tags.add(route_tag(fare.departure_airport, fare.arrival_airport))
+        if tags:
+            self.invalidate(tags)
+
+    def clear(self) -> None:
+        """Drops all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        """Removes an entry and its tag references; the lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def stats(self) -> dict:
+        """Returns the size, hit and miss counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,291 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+
+from src.database.models import Airport, Flight, PollSchedule, PriceSnapshot, Route
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PollDecision:
+    """Whether one route/date is due for polling, and when it is due next."""
+    departure_date: date
+    due: bool
+    next_poll_at: datetime
+    interval: timedelta
+
+
+@dataclass
+class BudgetReport:
+    """
+    Request budget of an adaptive run compared to polling every date
+    at the fixed cadence.
+    """
+    scheduled: int = 0
+    fetched: int = 0
+    skipped: int = 0
+    adaptive_per_day: float = 0.0
+    fixed_per_day: float = 0.0
+    decisions: List[PollDecision] = field(default_factory=list)
+
+    @property
+    def saved_per_day(self) -> float:
+        """Requests per day saved against the fixed cadence."""
+        return self.fixed_per_day - self.adaptive_per_day
+
+    @property
+    def saved_ratio(self) -> float:
+        """Share of the fixed-cadence budget that is saved."""
+        return self.saved_per_day / self.fixed_per_day if self.fixed_per_day else 0.0
+
+    def summary(self) -> str:
+        """Human readable one-line summary."""
+        return (f"Fetched {self.fetched}/{self.scheduled} dates, skipped {self.skipped}. "
+                f"Projected {self.adaptive_per_day:.1f} requests/day vs "
+                f"{self.fixed_per_day:.1f} at fixed cadence "
+                f"(saving {self.saved_per_day:.1f}/day, {self.saved_ratio:.0%})")
+
+
+class AdaptivePollScheduler:
+    """
+    Schedules polls per route and departure date from observed price changes.
+
+    The change rate of a date is the number of price changes seen across its
+    flights divided by the observed time span, smoothed towards one change per
+    fixed interval so dates with little history start at the fixed cadence.
+    A date is then polled twice per expected change, never less often than a
+    fraction of the time left before departure, and within [min, max] interval.
+    """
+
+    def __init__(self,
+                 fixed_interval: timedelta = timedelta(hours=6),
+                 min_interval: timedelta = timedelta(hours=1),
+                 max_interval: timedelta = timedelta(days=7),
+                 polls_per_change: float = 2.0,
+                 horizon_fraction: float = 0.1):
+        """
+        Args:
+            fixed_interval: Cadence used without history, and as the budget reference
+            min_interval: Shortest interval between polls of the same date
+            max_interval: Longest interval between polls of the same date
+            polls_per_change: Polls per expected price change
+            horizon_fraction: Maximum interval as a fraction of time left before departure
+        """
+        self.fixed_interval = fixed_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.polls_per_change = polls_per_change
+        self.horizon_fraction = horizon_fraction
+
+    def change_rates(self,
+                     db: Session,
+                     route_id: int,
+                     dates: List[date]) -> Dict[date, float]:
+        """
+        Estimates price changes per hour for each departure date of a route.
+
+        Args:
+            db: SQLAlchemy database session
+            route_id: Route to analyze
+            dates: Departure dates of interest
+
+        Returns:
+            dict: Departure date to smoothed change rate (changes per hour)
+        """
+        if not dates:
+            return {}
+
+        previous_price = func.lag(PriceSnapshot.outbound_price).over(
+            partition_by=PriceSnapshot.flight_id,
+            order_by=PriceSnapshot.timestamp
+        )
+        rows = (
+            db.query(
+                Flight.departure_datetime,
+                PriceSnapshot.timestamp,
+                PriceSnapshot.outbound_price,
+                previous_price
+            )
+            .join(PriceSnapshot, PriceSnapshot.flight_id == Flight.id)
+            .filter(
+                Flight.route_id == route_id,
+                Flight.departure_datetime >= datetime.combine(min(dates), datetime.min.time()),
+                Flight.departure_datetime < datetime.combine(max(dates) + timedelta(days=1), datetime.min.time())
+            )
+            .all()
+        )
+
+        changes: Dict[date, int] = defaultdict(int)
+        spans: Dict[date, Tuple[datetime, datetime]] = {}
+        for departure, observed, price, previous in rows:
+            day = departure.date()
+            if previous is not None and previous != price:
+                changes[day] += 1
+            first, last = spans.get(day, (observed, observed))
+            spans[day] = (min(first, observed), max(last, observed))
+
+        prior_hours = self.fixed_interval.total_seconds() / 3600 * self.polls_per_change
+        rates = {}
+        for day in dates:
+            first, last = spans.get(day, (None, None))
+            span_hours = (last - first).total_seconds() / 3600 if first else 0.0
+            rates[day] = (changes[day] + 1) / (span_hours + prior_hours)
+        return rates
+
+    def interval_for(self, change_rate: float, departure_date: date, now: datetime) -> timedelta:
+        """
+        Computes the polling interval for a date.
+
+        Args:
+            change_rate: Estimated price changes per hour
+            departure_date: Departure date being polled
+            now: Current time
+
+        Returns:
+            timedelta: Time until the next poll
+        """
+        interval = timedelta(hours=1 / (change_rate * self.polls_per_change))
+
+        time_left = datetime.combine(departure_date, datetime.min.time()) - now
+        interval = min(interval, time_left * self.horizon_fraction)
+
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def plan(self,
+             db: Session,
+             departure: str,
+             arrival: str,
+             dates: List[date],
+             now: Optional[datetime] = None) -> List[PollDecision]:
+        """
+        Decides which dates of a route are due for polling.
+        Dates without a schedule, or on an unknown route, are always due.
+
+        Args:
+            db: SQLAlchemy database session
+            departure: Departure airport IATA code
+            arrival: Arrival airport IATA code
+            dates: Candidate departure dates
+            now: Current time (defaults to utcnow)
+
+        Returns:
+            List[PollDecision]: One decision per date, in input order
+        """
+        now = now or datetime.utcnow()
+        route = self._find_route(db, departure, arrival)
+        schedules = self._load_schedules(db, route.id, dates) if route else {}
+
+        decisions = []
+        for day in dates:
+            schedule = schedules.get(day)
+            if schedule is None:
+                decisions.append(PollDecision(day, True, now, self.fixed_interval))
+            else:
+                decisions.append(PollDecision(
+                    departure_date=day,
+                    due=schedule.next_poll_at <= now,
+                    next_poll_at=schedule.next_poll_at,
+                    interval=timedelta(hours=schedule.interval_hours)
+                ))
+        return decisions
+
+    def update(self,
+               db: Session,
+               departure: str,
+               arrival: str,
+               polled_dates: List[date],
+               now: Optional[datetime] = None) -> None:
+        """
+        Recomputes the schedule of dates that were just polled and commits it.
+
+        Args:
+            db: SQLAlchemy database session
+            departure: Departure airport IATA code
+            arrival: Arrival airport IATA code
+            polled_dates: Dates fetched in this run
+            now: Current time (defaults to utcnow)
+        """
+        now = now or datetime.utcnow()
+        route = self._find_route(db, departure, arrival)
+        if route is None or not polled_dates:
+            return
+
+        rates = self.change_rates(db, route.id, polled_dates)
+        schedules = self._load_schedules(db, route.id, polled_dates)
+
+        for day in polled_dates:
+            interval = self.interval_for(rates[day], day, now)
+            schedule = schedules.get(day)
+            if schedule is None:
+                schedule = PollSchedule(route_id=route.id, departure_date=day)
+                db.add(schedule)
+            schedule.change_rate = rates[day]
+            schedule.interval_hours = interval.total_seconds() / 3600
+            schedule.last_polled_at = now
+            schedule.next_poll_at = now + interval
+
+        db.commit()
+
+    def budget_report(self,
+                      db: Session,
+                      departure: str,
+                      arrival: str,
+                      decisions: List[PollDecision]) -> BudgetReport:
+        """
+        Compares the request budget of the current schedule with the fixed cadence.
+
+        Args:
+            db: SQLAlchemy database session
+            departure: Departure airport IATA code
+            arrival: Arrival airport IATA code
+            decisions: Decisions made for this run
+
+        Returns:
+            BudgetReport: Requests made, skipped and projected per day
+        """
+        route = self._find_route(db, departure, arrival)
+        dates = [decision.departure_date for decision in decisions]
+        schedules = self._load_schedules(db, route.id, dates) if route else {}
+
+        fixed_hours = self.fixed_interval.total_seconds() / 3600
+        adaptive_per_day = sum(
+            24 / schedules[day].interval_hours if day in schedules else 24 / fixed_hours
+            for day in dates
+        )
+        fetched = sum(1 for decision in decisions if decision.due)
+
+        return BudgetReport(
+            scheduled=len(decisions),
+            fetched=fetched,
+            skipped=len(decisions) - fetched,
+            adaptive_per_day=adaptive_per_day,
+            fixed_per_day=len(dates) * 24 / fixed_hours,
+            decisions=decisions
+        )
+
+    def _find_route(self, db: Session, departure: str, arrival: str) -> Optional[Route]:
+        """Looks up the route between two airport codes."""
+        dep_airport = aliased(Airport)
+        arr_airport = aliased(Airport)
+        return (
+            db.query(Route)
+            .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+            .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+            .filter(dep_airport.iata_code == departure, arr_airport.iata_code == arrival)
+            .first()
+        )
+
+    def _load_schedules(self, db: Session, route_id: int, dates: List[date]) -> Dict[date, PollSchedule]:
+        """Loads existing schedules of a route for the given dates."""
+        schedules = (
+            db.query(PollSchedule)
+            .filter(PollSchedule.route_id == route_id, PollSchedule.departure_date.in_(dates))
+            .all()
+        )
+        return {schedule.departure_date: schedule for schedule in schedules}
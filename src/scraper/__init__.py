@@ -1,4 +1,5 @@
 from .api_client import EasyJetAPIClient
-from .models import FlightFare, APIResponse
+from .archive import RawResponseArchive
+from .models import FlightFare, APIResponse, parse_fares
 
-__all__ = ['EasyJetAPIClient', 'FlightFare', 'APIResponse']
\ No newline at end of file
+__all__ = ['EasyJetAPIClient', 'FlightFare', 'APIResponse', 'RawResponseArchive', 'parse_fares']
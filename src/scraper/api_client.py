@@ -1,25 +1,122 @@
 import logging
+import math
+import socket
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from random import uniform
-from time import sleep
-from typing import Optional
+from time import monotonic, sleep
+from typing import Dict, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
 from src.config import APIConfig
-from .models import APIResponse, FlightFare
+from src.profiling import profiler
+from .archive import RawResponseArchive
+from .models import APIResponse, parse_fares
 from src.database.models import SearchOperation
 logger = logging.getLogger(__name__)
 
 
+class _AbortableAdapter(HTTPAdapter):
+    """
+    Transport adapter whose in-flight requests can be aborted from another
+    thread: it remembers the connections it opens, and abort() shuts their
+    sockets down, so a blocked request fails at once instead of holding its
+    connection until it times out. Connections opened after abort() are
+    shut down as soon as they connect.
+    """
+
+    def __init__(self):
+        self.aborted = False
+        self._connections = weakref.WeakSet()
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        def tracked(pool_class):
+            class TrackedConnection(pool_class.ConnectionCls):
+                def connect(self):
+                    super().connect()
+                    # Registered before the check, so either abort() sees the
+                    # connection or the connection sees the abort
+                    adapter._connections.add(self)
+                    if adapter.aborted:
+                        _shutdown(self)
+
+            class TrackedPool(pool_class):
+                ConnectionCls = TrackedConnection
+            return TrackedPool
+
+        # Replaced, not mutated: the default mapping is shared by all pool managers
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: tracked(pool_class)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        if self.aborted:
+            raise requests.ConnectionError("Request aborted", request=request)
+        return super().send(request, **kwargs)
+
+    def abort(self) -> None:
+        """Shuts down the connections opened by this adapter, and any opened later."""
+        self.aborted = True
+        for connection in list(self._connections):
+            _shutdown(connection)
+
+
+def _shutdown(connection) -> None:
+    """Shuts down the socket of a connection, making blocked reads on it fail."""
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
 class EasyJetAPIClient:
-    """Client for interacting with the EasyJet API."""
+    """
+    Client for interacting with the EasyJet API.
+    Call close() (or use it as a context manager) once done, so the threads
+    of hedged requests are shut down.
+    """
 
-    def __init__(self, config: APIConfig):
+    def __init__(self, config: APIConfig, archive: Optional[RawResponseArchive] = None):
         self.config = config
+        self.archive = archive
         self.min_delay = config.min_delay
         self.max_delay = config.max_delay
+        self.deadline = monotonic() + config.crawl_deadline if config.crawl_deadline else None
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=200)
+        # Guards the latencies, the hedge counters and the hedge executor, used from fan-out threads
+        self._stats_lock = threading.Lock()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
         self._setup_logging()
 
+    def __enter__(self) -> 'EasyJetAPIClient':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shuts down the hedge threads without waiting: a losing attempt still
+        running is aborted by the request that started it.
+        """
+        with self._stats_lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
     def _setup_logging(self):
         """
         Configura un logger semplice ma efficace per il client API.
@@ -57,24 +154,151 @@ class EasyJetAPIClient:
         self.logger.debug(f"Random delay: waiting {delay:.2f} sec")
         sleep(delay)
 
+    @property
+    def deadline_exceeded(self) -> bool:
+        """Whether the crawl deadline has passed."""
+        return self.deadline is not None and monotonic() >= self.deadline
+
+    def _timeout(self) -> tuple:
+        """Returns the (connect, read) timeouts, capped by the remaining crawl budget."""
+        connect, read = self.config.connect_timeout, self.config.read_timeout
+        if self.deadline is not None:
+            remaining = max(self.deadline - monotonic(), 0.001)
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    def _hedge_threshold(self) -> Optional[float]:
+        """
+        Returns the latency after which a request is hedged: the configured
+        percentile of recent latencies, or None while hedging is off.
+        """
+        if self.config.hedge_percentile is None:
+            return None
+        with self._stats_lock:
+            if len(self._latencies) < self.config.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        rank = math.ceil(self.config.hedge_percentile / 100 * len(latencies))
+        return latencies[max(rank - 1, 0)]
+
+    def _timed_get(self,
+                   params: Dict[str, str],
+                   timeout: tuple,
+                   session: Optional[requests.Session] = None) -> requests.Response:
+        """Performs the GET request, in the given session if any, and records its latency."""
+        start = monotonic()
+        response = (session or requests).get(
+            self.config.base_url,
+            headers=self.config.headers,
+            params=params,
+            timeout=timeout
+        )
+        response.raise_for_status()
+        with self._stats_lock:
+            self._latencies.append(monotonic() - start)
+        return response
+
+    def _abortable_session(self) -> requests.Session:
+        """Creates a session for one hedged attempt, so the losing attempt can be aborted."""
+        session = requests.Session()
+        adapter = _AbortableAdapter()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get(self, params: Dict[str, str]) -> Tuple[requests.Response, int]:
+        """
+        Performs the request, hedged with a duplicate when the first attempt
+        is slower than the hedge threshold. The first successful answer wins;
+        the connection of the slower request is shut down, so it does not
+        hold a connection until it times out.
+
+        Returns:
+            tuple: (response, number of extra requests sent)
+        """
+        timeout = self._timeout()
+        threshold = self._hedge_threshold()
+        if threshold is None:
+            return self._timed_get(params, timeout), 0
+
+        with self._stats_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+            executor = self._hedge_executor
+        sessions = {}
+        try:
+            primary_session = self._abortable_session()
+            primary = executor.submit(self._timed_get, params, timeout, primary_session)
+            sessions[primary] = primary_session
+            done, _ = wait([primary], timeout=threshold)
+            if done:
+                return primary.result(), 0
+
+            with self._stats_lock:
+                self.hedged_requests += 1
+            logger.info(f"Request slower than {threshold:.2f}s, sending a hedged duplicate")
+            hedge_session = self._abortable_session()
+            hedge = executor.submit(self._timed_get, params, self._timeout(), hedge_session)
+            sessions[hedge] = hedge_session
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            with self._stats_lock:
+                                self.hedge_wins += 1
+                        return future.result(), 1
+                    error = future.exception()
+            raise error
+        finally:
+            # Responses are read in full, so only the losing request still uses its session
+            for future, session in sessions.items():
+                if not future.done():
+                    session.get_adapter(self.config.base_url).abort()
+                session.close()
+
     def fetch_fares_for_date(
             self,
             date: str,
             departure: Optional[str] = None,
-            arrival: Optional[str] = None
+            arrival: Optional[str] = None,
+            date_to: Optional[str] = None
     ) -> APIResponse:
         """
-        Fetch fares from the API for a specific date.
+        Fetch fares from the API for a specific date, or for the date range
+        from date to date_to (inclusive) in a single request.
         """
-        self._random_delay()
+        with profiler.phase("delay"):
+            self._random_delay()
+        fetched_at = datetime.utcnow()
+        departure = departure or self.config.default_departure
+        arrival = arrival or self.config.default_arrival
+        departure_date = datetime.strptime(date, "%Y-%m-%d").date()
+        request_start = None
+
+        if self.deadline_exceeded:
+            logger.warning(f"Crawl deadline exceeded, skipping {departure}-{arrival} on {date}")
+            return APIResponse(
+                url=self.config.base_url,
+                status_code=None,
+                data=[],
+                error="Crawl deadline exceeded",
+                departure_airport=departure,
+                arrival_airport=arrival,
+                fetched_at=fetched_at,
+                currency=self.config.currency,
+                departure_date=departure_date
+            )
 
         try:
             querystring = {
-                "departureAirport": departure or self.config.default_departure,
-                "arrivalAirport": arrival or self.config.default_arrival,
+                "departureAirport": departure,
+                "arrivalAirport": arrival,
                 "currency": self.config.currency,
                 "departureDateFrom": date,
-                "departureDateTo": date
+                "departureDateTo": date_to or date
             }
 
             # Log the complete request details
@@ -83,19 +307,36 @@ class EasyJetAPIClient:
             logger.info(f"Headers: {self.config.headers}")
             logger.info(f"Query parameters: {querystring}")
 
-            response = requests.get(
-                self.config.base_url,
-                headers=self.config.headers,
-                params=querystring
-            )
-            response.raise_for_status()
+            with profiler.phase("network"):
+                request_start = monotonic()
+                response, retries = self._get(querystring)
+                latency_ms = (monotonic() - request_start) * 1000
 
             # Log the raw response
             raw_response = response.text
             logger.info(f"Raw API response: {raw_response}")
 
+            # Keep the raw body so it can be reprocessed without refetching
+            if self.archive is not None:
+                try:
+                    with profiler.phase("archive"):
+                        self.archive.store(
+                            response.content,
+                            departure_airport=departure,
+                            arrival_airport=arrival,
+                            departure_date=date,
+                            currency=self.config.currency,
+                            fetched_at=fetched_at,
+                            status_code=response.status_code,
+                            url=response.url
+                        )
+                except OSError as e:
+                    logger.error(f"Failed to archive raw response: {str(e)}")
+
             # Parse the JSON response
-            json_data = response.json()
+            parse_start = monotonic()
+            with profiler.phase("json_parse"):
+                json_data = response.json()
             logger.info(f"Parsed JSON data: {json_data}")
 
             # If we get here, we have valid JSON. Let's examine its structure
@@ -107,25 +348,27 @@ class EasyJetAPIClient:
                 logger.info(f"Response is of type: {type(json_data)}")
 
             # Convert raw API data to FlightFare objects
-            fares = []
-            for fare in json_data:
-                try:
-                    fare_obj = FlightFare.from_api_response(fare)
-                    fares.append(fare_obj)
-                    logger.info(f"Successfully processed fare: {fare}")
-                except KeyError as e:
-                    logger.error(f"Missing key in fare data: {e}")
-                    logger.error(f"Problematic fare data: {fare}")
-                except Exception as e:
-                    logger.error(f"Error processing fare: {str(e)}")
-                    logger.error(f"Problematic fare data: {fare}")
+            rejected = []
+            with profiler.phase("fare_parse"):
+                fares = parse_fares(json_data, rejected)
+            parse_ms = (monotonic() - parse_start) * 1000
 
             logger.info(f"Processed {len(fares)} fares")
 
             return APIResponse(
                 url=response.url,
                 status_code=response.status_code,
-                data=fares
+                data=fares,
+                departure_airport=departure,
+                arrival_airport=arrival,
+                fetched_at=fetched_at,
+                currency=self.config.currency,
+                departure_date=departure_date,
+                latency_ms=latency_ms,
+                response_bytes=len(response.content),
+                retries=retries,
+                parse_ms=parse_ms,
+                rejected=rejected
             )
 
         except requests.RequestException as e:
@@ -134,5 +377,11 @@ class EasyJetAPIClient:
                 url=self.config.base_url,
                 status_code=getattr(e.response, 'status_code', None),
                 data=[],
-                error=str(e)
+                error=str(e),
+                departure_airport=departure,
+                arrival_airport=arrival,
+                fetched_at=fetched_at,
+                currency=self.config.currency,
+                departure_date=departure_date,
+                latency_ms=(monotonic() - request_start) * 1000 if request_start is not None else None
             )
\ No newline at end of file
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArchiveEntry:
+    """Index record of one archived API response."""
+    digest: str
+    departure_airport: str
+    arrival_airport: str
+    departure_date: str
+    currency: str
+    fetched_at: str
+    status_code: int
+    url: str
+
+    @property
+    def fetched_datetime(self) -> datetime:
+        return datetime.fromisoformat(self.fetched_at)
+
+
+class RawResponseArchive:
+    """
+    Content-addressed store of raw API response bodies.
+
+    Bodies are gzip-compressed and stored once under their SHA-256 digest, so
+    identical payloads (very common for unchanged prices) take no extra space.
+    Every fetch is appended to an index keyed by route, date and fetch time,
+    which makes it possible to rebuild parsed data without refetching.
+
+    Layout:
+        <root>/objects/ab/abcdef....json.gz
+        <root>/index.jsonl
+    """
+
+    def __init__(self, root: str = "data/archive"):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    def store(self,
+              body: bytes,
+              departure_airport: str,
+              arrival_airport: str,
+              departure_date: str,
+              currency: str,
+              fetched_at: datetime,
+              status_code: int,
+              url: str) -> ArchiveEntry:
+        """
+        Archives a response body and records the fetch in the index.
+
+        Args:
+            body: Raw response body
+            departure_airport: Departure airport code of the search
+            arrival_airport: Arrival airport code of the search
+            departure_date: Searched date (YYYY-MM-DD)
+            currency: Currency of the search
+            fetched_at: Time of the request
+            status_code: HTTP status code
+            url: Request URL
+
+        Returns:
+            ArchiveEntry: The index record written
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(body)
+            tmp_path.replace(path)
+
+        entry = ArchiveEntry(
+            digest=digest,
+            departure_airport=departure_airport,
+            arrival_airport=arrival_airport,
+            departure_date=departure_date,
+            currency=currency,
+            fetched_at=fetched_at.isoformat(),
+            status_code=status_code,
+            url=url
+        )
+        line = json.dumps(asdict(entry)) + "\n"
+        with self._lock:
+            with self.index_path.open("a", encoding="utf-8") as f:
+                f.write(line)
+        return entry
+
+    def load(self, digest: str) -> bytes:
+        """Returns the raw body stored under a digest."""
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read()
+
+    def entries(self,
+                departure_airport: Optional[str] = None,
+                arrival_airport: Optional[str] = None,
+                date_from: Optional[str] = None,
+                date_to: Optional[str] = None) -> Iterator[ArchiveEntry]:
+        """
+        Iterates index records in fetch order, optionally filtered.
+
+        Args:
+            departure_airport: Only this departure airport
+            arrival_airport: Only this arrival airport
+            date_from: Earliest searched date (YYYY-MM-DD, inclusive)
+            date_to: Latest searched date (YYYY-MM-DD, inclusive)
+
+        Yields:
+            ArchiveEntry: Matching index records
+        """
+        if not self.index_path.exists():
+            return
+
+        with self.index_path.open(encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    entry = ArchiveEntry(**json.loads(line))
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Skipping corrupt archive index line {line_number}: {str(e)}")
+                    continue
+                if departure_airport and entry.departure_airport != departure_airport:
+                    continue
+                if arrival_airport and entry.arrival_airport != arrival_airport:
+                    continue
+                if date_from and entry.departure_date < date_from:
+                    continue
+                if date_to and entry.departure_date > date_to:
+                    continue
+                yield entry
@@ -1,13 +1,30 @@
-from dataclasses import dataclass
-from datetime import datetime
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from time import perf_counter
 from typing import Optional, List
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from src.anomalies import detector_for
+from src.config import DEFAULT_CURRENCY
 from src.database.models  import Flight as DBFlight
 from src.database.models  import Route as DBRoute
 from src.database.models  import Airport as DBAirport
 from src.database.models  import Airline as DBAirline
 from src.database.models  import PriceSnapshot as DBPriceSnapshot
 from src.database.models  import SearchOperation as DBSearchOperation
+from src.database.models  import QuarantinedRecord as DBQuarantinedRecord
+from src.database.ingest import (ensure_airline_id, ensure_airport_id, ensure_flight_id, ensure_route_id,
+                                 quarantine_rejected, quarantine_response, quarantine_values,
+                                 record_ingest_stats, search_operation_values, stamp_commit_sequence,
+                                 upsert_latest_prices)
+from src.profiling import profiler
+from src.query_cache import query_cache
+from .route_catalog import RouteCatalog
+
+logger = logging.getLogger(__name__)
+
+route_catalog = RouteCatalog()
 
 
 @dataclass
@@ -39,6 +56,20 @@ class FlightFare:
             arrival_datetime=datetime.fromisoformat(data['arrivalDateTime'])
         )
 
+    def to_dict(self) -> dict:
+        """Converts this fare to the raw API format, as written to the JSON files."""
+        return {
+            "flightNumber": self.flight_number,
+            "departureAirport": self.departure_airport,
+            "arrivalAirport": self.arrival_airport,
+            "arrivalCountry": self.arrival_country,
+            "outboundPrice": self.outbound_price,
+            "returnPrice": self.return_price,
+            "departureDateTime": self.departure_datetime.isoformat(),
+            "arrivalDateTime": self.arrival_datetime.isoformat(),
+            "flightDuration": round(self.calculate_flight_duration(), 2)
+        }
+
     def to_db_models(self, db: Session) -> tuple[DBFlight, DBPriceSnapshot]:
         """
         Converts this FlightFare instance to database models.
@@ -70,27 +101,18 @@ class FlightFare:
         airport = db.query(DBAirport).filter(DBAirport.iata_code == iata_code).first()
         if not airport:
             # Note: In a real application, you'd want to look up actual city/country data
-            airport = DBAirport(
-                iata_code=iata_code,
-                city=f"{iata_code} City",  # Placeholder
-                country=f"{iata_code} Country"  # Placeholder
-            )
-            db.add(airport)
+            airport_id = ensure_airport_id(db, iata_code)
             db.commit()
-            db.refresh(airport)
+            airport = db.get(DBAirport, airport_id)
         return airport
 
     def _get_or_create_airline(self, db: Session) -> DBAirline:
         """Helper method to get or create the EasyJet airline record."""
         airline = db.query(DBAirline).filter(DBAirline.code == "EZY").first()
         if not airline:
-            airline = DBAirline(
-                name="EasyJet",
-                code="EZY"
-            )
-            db.add(airline)
+            airline_id = ensure_airline_id(db)
             db.commit()
-            db.refresh(airline)
+            airline = db.get(DBAirline, airline_id)
         return airline
 
     def _get_or_create_route(self, db: Session, airline_id: int,
@@ -103,14 +125,9 @@ class FlightFare:
         ).first()
 
         if not route:
-            route = DBRoute(
-                airline_id=airline_id,
-                departure_airport_id=dep_airport_id,
-                arrival_airport_id=arr_airport_id
-            )
-            db.add(route)
+            route_id = ensure_route_id(db, airline_id, dep_airport_id, arr_airport_id)
             db.commit()
-            db.refresh(route)
+            route = db.get(DBRoute, route_id)
         return route
 
     def _get_or_create_flight(self, db: Session, route_id: int) -> DBFlight:
@@ -122,15 +139,10 @@ class FlightFare:
         ).first()
 
         if not flight:
-            flight = DBFlight(
-                route_id=route_id,
-                flight_number=self.flight_number,
-                departure_datetime=self.departure_datetime,
-                arrival_datetime=self.arrival_datetime
-            )
-            db.add(flight)
+            flight_id = ensure_flight_id(db, route_id, self.flight_number,
+                                         self.departure_datetime, self.arrival_datetime)
             db.commit()
-            db.refresh(flight)
+            flight = db.get(DBFlight, flight_id)
         return flight
 
     def calculate_flight_duration(self) -> float:
@@ -139,6 +151,38 @@ class FlightFare:
         return duration.total_seconds() / 3600
 
 
+def parse_fares(json_data: list, rejected: Optional[List[dict]] = None) -> List[FlightFare]:
+    """
+    Converts the decoded body of a GetAllFaresByDate response to FlightFare objects.
+    Malformed fares are logged and skipped.
+
+    Args:
+        json_data: Decoded JSON list of raw fares
+        rejected: Collects the skipped fares as {"payload": raw fare, "error": reason},
+            so they can be quarantined instead of lost
+
+    Returns:
+        List[FlightFare]: Fares that could be parsed
+    """
+    fares = []
+    for fare in json_data:
+        try:
+            fare_obj = FlightFare.from_api_response(fare)
+            fares.append(fare_obj)
+            logger.info(f"Successfully processed fare: {fare}")
+        except KeyError as e:
+            logger.error(f"Missing key in fare data: {e}")
+            logger.error(f"Problematic fare data: {fare}")
+            if rejected is not None:
+                rejected.append({"payload": fare, "error": f"Missing key: {e}"})
+        except Exception as e:
+            logger.error(f"Error processing fare: {str(e)}")
+            logger.error(f"Problematic fare data: {fare}")
+            if rejected is not None:
+                rejected.append({"payload": fare, "error": str(e)})
+    return fares
+
+
 @dataclass
 class APIResponse:
     """
@@ -149,46 +193,122 @@ class APIResponse:
     status_code: int
     data: List[FlightFare]
     error: Optional[str] = None
+    departure_airport: Optional[str] = None
+    arrival_airport: Optional[str] = None
+    fetched_at: Optional[datetime] = None
+    currency: Optional[str] = None
+
+    # Telemetry recorded with the search operation
+    departure_date: Optional[date] = None
+    latency_ms: Optional[float] = None
+    response_bytes: Optional[int] = None
+    retries: int = 0
+    parse_ms: Optional[float] = None
+
+    # Raw fares that could not be parsed, quarantined when the response is saved
+    rejected: List[dict] = field(default_factory=list)
 
     @property
     def is_successful(self) -> bool:
         """Checks if the API call was successful."""
         return self.status_code == 200 and self.error is None
 
-    def save_to_db(self, db: Session) -> DBSearchOperation:
+    def save_to_db(self, db: Session, search_op: Optional[DBSearchOperation] = None) -> DBSearchOperation:
         """
         Saves this API response and its data to the database.
 
+        Fares that cannot be saved are quarantined. If saving fails once the
+        search operation is recorded, the operation is marked failed and the
+        response is quarantined with a link to it, so reprocessing completes
+        that operation instead of recording the fetch twice.
+
         Args:
             db: SQLAlchemy database session
+            search_op: Search operation already recorded for this response,
+                to attach reprocessed fares to instead of creating one
 
         Returns:
-            SearchOperation: The created search operation record
+            SearchOperation: The search operation record
         """
-        # Create search operation record
-        search_op = DBSearchOperation(
-            successful=self.is_successful,
-            error_message=self.error
-        )
-        db.add(search_op)
-        db.commit()
-        db.refresh(search_op)
+        persist_start = perf_counter()
+        fetched_at = self.fetched_at or datetime.utcnow()
+        reprocessing = search_op is not None
+        if search_op is None:
+            # Create search operation record
+            search_op = DBSearchOperation(**search_operation_values(self, fetched_at))
+            db.add(search_op)
+            db.commit()
+            db.refresh(search_op)
+        search_id = search_op.id
+        # A search counts in the stats once, when its save first succeeds
+        counted = [] if reprocessing and search_op.successful else [self]
 
-        # If successful, save all flight fares
+        try:
+            search_op = self._save_fares(db, search_op, fetched_at, counted)
+            # Learn route availability from the result
+            if not reprocessing:
+                route_catalog.record_response(db, self)
+            search_op.persist_ms = (perf_counter() - persist_start) * 1000
+            stamp_commit_sequence(db, [search_id])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving response {self.url}: {str(e)}")
+            search_op = db.get(DBSearchOperation, search_id)
+            if counted:
+                search_op.successful = False
+                search_op.error_message = f"Save failed: {str(e)}"
+            quarantine_response(db, self, str(e), search_id)
+            db.commit()
+            return search_op
+
+        if self.data:
+            query_cache.invalidate_fares(self.data)
+        return search_op
+
+    def _save_fares(self,
+                    db: Session,
+                    search_op: DBSearchOperation,
+                    fetched_at: datetime,
+                    counted: List['APIResponse']) -> DBSearchOperation:
+        """Writes the snapshots and derived rows of the fares, without committing the last transaction."""
+        search_id = search_op.id
+        snapshots = []
+        failed = []
         if self.is_successful:
             for fare in self.data:
-                # Get or create flight record
-                flight = fare.to_db_models(db)
+                # Get or create flight record; a fare that fails is quarantined, not fatal
+                try:
+                    with profiler.phase("orm_lookup"):
+                        flight = fare.to_db_models(db)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Error saving fare {fare.flight_number}: {str(e)}")
+                    failed.append(quarantine_values(self, [fare.to_dict()], str(e), "fare", "save", search_id))
+                    continue
 
                 # Create price snapshot
-                price_snapshot = DBPriceSnapshot(
-                    flight_id=flight.id,
-                    search_id=search_op.id,
-                    outbound_price=fare.outbound_price,
-                    return_price=fare.return_price
-                )
-                db.add(price_snapshot)
+                snapshots.append({
+                    "flight_id": flight.id,
+                    "search_id": search_id,
+                    "timestamp": fetched_at,
+                    "outbound_price": fare.outbound_price,
+                    "return_price": fare.return_price,
+                    "currency": self.currency or DEFAULT_CURRENCY
+                })
+            db.add_all(DBPriceSnapshot(**snapshot) for snapshot in snapshots)
 
-            db.commit()
+        # The fare helpers commit, which expires the search operation
+        search_op = db.get(DBSearchOperation, search_id)
+        if counted:
+            search_op.successful = self.is_successful
+            search_op.error_message = self.error
 
-        return search_op
\ No newline at end of file
+        # Counters, current prices, anomalies and quarantined fares are written in the same transaction
+        quarantine_rejected(db, [self], [search_id])
+        if failed:
+            db.execute(insert(DBQuarantinedRecord), failed)
+        record_ingest_stats(db, counted, snapshots)
+        upsert_latest_prices(db, snapshots)
+        detector_for(db).observe(db, snapshots)
+        return search_op
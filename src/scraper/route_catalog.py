@@ -0,0 +1,156 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, aliased
+
+from src.database.ingest import ensure_airline_id, ensure_airport_id, ensure_route_id
+from src.database.models import Airport, Route
+
+logger = logging.getLogger(__name__)
+
+
+class RouteCatalog:
+    """
+    Learns which airport pairs have service from search results.
+    Pairs that keep returning no fares are cached as empty so they are not
+    queried again until the negative cache entry expires.
+    """
+
+    def __init__(self,
+                 negative_ttl: timedelta = timedelta(days=7),
+                 empty_threshold: int = 30):
+        """
+        Args:
+            negative_ttl: How long an empty pair is skipped before it is probed again
+            empty_threshold: Consecutive empty searches after which a previously
+                served route is considered discontinued
+        """
+        self.negative_ttl = negative_ttl
+        self.empty_threshold = empty_threshold
+
+    def record_response(self, db: Session, response) -> Optional[Route]:
+        """
+        Updates the catalog entry for the pair searched by an API response.
+        Failed requests are ignored, since they say nothing about service.
+        The caller is responsible for committing.
+
+        Args:
+            db: SQLAlchemy database session
+            response: APIResponse carrying departure and arrival airport codes
+
+        Returns:
+            Route: The updated route record, or None if nothing was learned
+        """
+        if not response.is_successful:
+            return None
+        if not response.departure_airport or not response.arrival_airport:
+            return None
+
+        now = datetime.utcnow()
+        route = self._get_or_create_route(db, response.departure_airport, response.arrival_airport)
+        route.last_checked_at = now
+
+        if response.data:
+            route.is_served = True
+            route.last_served_at = now
+            route.empty_checks = 0
+        else:
+            route.empty_checks = (route.empty_checks or 0) + 1
+            # An empty date on a served route is normal; only give up on it
+            # after a long streak. Pairs never seen with service are empty at once.
+            if route.last_served_at is None or route.empty_checks >= self.empty_threshold:
+                route.is_served = False
+
+        return route
+
+    def served_destinations(self, db: Session, origin: str) -> List[str]:
+        """
+        Lists destinations with known service from an airport.
+
+        Args:
+            db: SQLAlchemy database session
+            origin: Departure airport IATA code
+
+        Returns:
+            List[str]: Arrival airport IATA codes, sorted
+        """
+        dep_airport = aliased(Airport)
+        arr_airport = aliased(Airport)
+
+        rows = (
+            db.query(arr_airport.iata_code)
+            .select_from(Route)
+            .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+            .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+            .filter(dep_airport.iata_code == origin, Route.is_served.is_(True))
+            .distinct()
+            .all()
+        )
+        return sorted(code for (code,) in rows)
+
+    def pairs_to_probe(self, db: Session, origin: str, candidates: List[str]) -> List[str]:
+        """
+        Filters candidate destinations down to the ones worth a discovery request:
+        not already known to be served and not negatively cached.
+
+        Args:
+            db: SQLAlchemy database session
+            origin: Departure airport IATA code
+            candidates: Candidate arrival airport IATA codes
+
+        Returns:
+            List[str]: Candidate codes that should be probed
+        """
+        cutoff = datetime.utcnow() - self.negative_ttl
+        arr_airport = aliased(Airport)
+        dep_airport = aliased(Airport)
+
+        known = {
+            code: (is_served, checked)
+            for code, is_served, checked in (
+                db.query(arr_airport.iata_code, Route.is_served, Route.last_checked_at)
+                .select_from(Route)
+                .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+                .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+                .filter(dep_airport.iata_code == origin)
+                .all()
+            )
+        }
+
+        to_probe = []
+        for code in candidates:
+            if code == origin:
+                continue
+            if code in known:
+                is_served, checked = known[code]
+                if is_served or (checked is not None and checked >= cutoff):
+                    continue
+            to_probe.append(code)
+        return to_probe
+
+    def _get_or_create_route(self, db: Session, departure: str, arrival: str) -> Route:
+        """Helper method to get or create the route between two airport codes."""
+        dep_airport = self._get_or_create_airport(db, departure)
+        arr_airport = self._get_or_create_airport(db, arrival)
+
+        airline_id = ensure_airline_id(db)
+
+        route = db.query(Route).filter(
+            Route.airline_id == airline_id,
+            Route.departure_airport_id == dep_airport.id,
+            Route.arrival_airport_id == arr_airport.id
+        ).first()
+
+        if not route:
+            route_id = ensure_route_id(db, airline_id, dep_airport.id, arr_airport.id,
+                                       is_served=False, empty_checks=0)
+            route = db.get(Route, route_id)
+        return route
+
+    def _get_or_create_airport(self, db: Session, iata_code: str) -> Airport:
+        """Helper method to get or create an airport record."""
+        airport = db.query(Airport).filter(Airport.iata_code == iata_code).first()
+        if not airport:
+            airport = db.get(Airport, ensure_airport_id(db, iata_code))
+        return airport
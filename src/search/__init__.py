@@ -0,0 +1,9 @@
+from .roundtrip import RoundTrip, find_round_trips, search_round_trips
+from .fanout import FanOutResult, search_anywhere, discover_routes
+from .connections import ConnectionGraph, ConnectionSearch, Itinerary
+
+__all__ = [
+    'RoundTrip', 'find_round_trips', 'search_round_trips',
+    'FanOutResult', 'search_anywhere', 'discover_routes',
+    'ConnectionGraph', 'ConnectionSearch', 'Itinerary'
+]
@@ -0,0 +1,370 @@
+import heapq
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session, aliased
+
+from src.config import DEFAULT_CURRENCY
+from src.fx import FxRateTable
+from src.scraper.models import FlightFare
+from src.database.models import Airport, Flight, LatestPrice, Route, SearchOperation
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Itinerary:
+    """
+    A trip of one or more flights, each leg priced with its outbound fare.
+    Connections are self-transfers between separately booked flights.
+    """
+    legs: List[FlightFare]
+
+    @property
+    def total_price(self) -> float:
+        """Sum of the leg prices."""
+        return sum(leg.outbound_price for leg in self.legs)
+
+    @property
+    def departure_datetime(self) -> datetime:
+        return self.legs[0].departure_datetime
+
+    @property
+    def arrival_datetime(self) -> datetime:
+        return self.legs[-1].arrival_datetime
+
+    @property
+    def duration(self) -> timedelta:
+        """Time from the first departure to the last arrival."""
+        return self.arrival_datetime - self.departure_datetime
+
+    @property
+    def via(self) -> List[str]:
+        """Airports where the trip connects."""
+        return [leg.arrival_airport for leg in self.legs[:-1]]
+
+
+class ConnectionGraph:
+    """
+    Time-expanded graph of the stored flights: every flight with a latest
+    price is a node, with edges to the flights leaving its arrival airport
+    within the allowed connection times.
+
+    Departures are indexed per airport and sorted by time, so the successors
+    of a flight are one binary search away. The cheapest direct fare between
+    each airport pair is kept as well, to bound the remaining cost of a
+    partial itinerary.
+    """
+
+    def __init__(self, fares: List[FlightFare]):
+        """
+        Args:
+            fares: Flights with their (comparable) latest prices
+        """
+        self.fares = sorted(fares, key=lambda fare: fare.departure_datetime)
+        self.departures: Dict[str, List[int]] = defaultdict(list)
+        for index, fare in enumerate(self.fares):
+            self.departures[fare.departure_airport].append(index)
+        self.departure_times: Dict[str, List[datetime]] = {
+            airport: [self.fares[index].departure_datetime for index in indices]
+            for airport, indices in self.departures.items()
+        }
+
+        self.cheapest_leg: Dict[Tuple[str, str], float] = {}
+        for fare in self.fares:
+            pair = (fare.departure_airport, fare.arrival_airport)
+            if fare.outbound_price < self.cheapest_leg.get(pair, float("inf")):
+                self.cheapest_leg[pair] = fare.outbound_price
+
+    def __len__(self) -> int:
+        return len(self.fares)
+
+    def departures_between(self, airport: str, earliest: datetime, latest: datetime) -> List[int]:
+        """Indices of the flights leaving an airport in [earliest, latest]."""
+        times = self.departure_times.get(airport)
+        if not times:
+            return []
+        indices = self.departures[airport]
+        return indices[bisect_left(times, earliest):bisect_right(times, latest)]
+
+    def cost_bounds(self, destination: str) -> Dict[str, float]:
+        """
+        Cheapest possible cost from every airport to the destination,
+        ignoring schedules (Dijkstra over the airport graph in reverse).
+        Airports missing from the result cannot reach the destination.
+        """
+        incoming: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for (departure, arrival), price in self.cheapest_leg.items():
+            incoming[arrival].append((departure, price))
+
+        bounds = {destination: 0.0}
+        heap = [(0.0, destination)]
+        while heap:
+            cost, airport = heapq.heappop(heap)
+            if cost > bounds[airport]:
+                continue
+            for departure, price in incoming[airport]:
+                if cost + price < bounds.get(departure, float("inf")):
+                    bounds[departure] = cost + price
+                    heapq.heappush(heap, (cost + price, departure))
+        return bounds
+
+    def search(self,
+               origin: str,
+               destination: str,
+               depart_from: datetime,
+               depart_to: datetime,
+               k: int = 10,
+               max_legs: int = 3,
+               min_connection: timedelta = timedelta(hours=2),
+               max_connection: timedelta = timedelta(hours=24),
+               max_duration: Optional[timedelta] = None) -> List[Itinerary]:
+        """
+        Finds the k cheapest itineraries from origin to destination.
+
+        Partial itineraries are expanded cheapest-first by their cost plus the
+        cheapest possible remainder (A*), so complete itineraries come out in
+        price order and the search stops after k. Airports that cannot reach
+        the destination are never entered. A partial itinerary is dropped
+        when k cheaper ones already extended the same flight with the same
+        number of legs, each at least as free to continue: a first departure
+        no earlier (so no earlier arrival deadline) and no airport visited
+        that it has not visited too. Every continuation of the dropped one is
+        then open to those k at no higher cost.
+
+        Args:
+            origin: Departure airport IATA code
+            destination: Arrival airport IATA code
+            depart_from: Earliest first departure (inclusive)
+            depart_to: Latest first departure (exclusive)
+            k: Maximum number of itineraries to return
+            max_legs: Maximum number of flights per itinerary
+            min_connection: Minimum time between arrival and the next departure
+            max_connection: Maximum time between arrival and the next departure
+            max_duration: Maximum time from first departure to last arrival
+
+        Returns:
+            List[Itinerary]: Up to k itineraries, cheapest first
+        """
+        if k <= 0 or origin == destination:
+            return []
+
+        bounds = self.cost_bounds(destination)
+        if origin not in bounds:
+            return []
+
+        # Labels: (estimated total, cost so far, tie breaker, flight index, previous label, legs)
+        heap: List[tuple] = []
+        counter = 0
+
+        def push(cost: float, index: int, previous: Optional[tuple], legs: int) -> None:
+            nonlocal counter
+            bound = bounds.get(self.fares[index].arrival_airport)
+            if bound is None:
+                return
+            counter += 1
+            heapq.heappush(heap, (cost + bound, cost, counter, index, previous, legs))
+
+        for index in self.departures_between(origin, depart_from, depart_to - timedelta(microseconds=1)):
+            fare = self.fares[index]
+            if max_duration is None or fare.arrival_datetime - fare.departure_datetime <= max_duration:
+                push(fare.outbound_price, index, None, 1)
+
+        itineraries: List[Itinerary] = []
+        # Per (flight, legs): first departure and visited airports of the extended prefixes
+        expanded: Dict[Tuple[int, int], List[Tuple[datetime, FrozenSet[str]]]] = defaultdict(list)
+        while heap and len(itineraries) < k:
+            label = heapq.heappop(heap)
+            _, cost, _, index, _, legs = label
+            fare = self.fares[index]
+
+            path = self._path(label)
+            if fare.arrival_airport == destination:
+                itineraries.append(Itinerary(legs=path))
+                continue
+            if legs >= max_legs:
+                continue
+
+            first_departure = path[0].departure_datetime
+            visited = frozenset(leg.departure_airport for leg in path)
+            # Labels leave the heap cheapest-first, so every earlier prefix cost no more
+            prefixes = expanded[(index, legs)]
+            dominating = sum(1 for departure, airports in prefixes
+                             if (max_duration is None or departure >= first_departure) and airports <= visited)
+            if dominating >= k:
+                continue
+            prefixes.append((first_departure, visited))
+
+            arrive_by = first_departure + max_duration if max_duration is not None else None
+            for next_index in self.departures_between(fare.arrival_airport,
+                                                      fare.arrival_datetime + min_connection,
+                                                      fare.arrival_datetime + max_connection):
+                next_fare = self.fares[next_index]
+                if next_fare.arrival_airport in visited:
+                    continue
+                if arrive_by is not None and next_fare.arrival_datetime > arrive_by:
+                    continue
+                push(cost + next_fare.outbound_price, next_index, label, legs + 1)
+
+        return itineraries
+
+    def _path(self, label: tuple) -> List[FlightFare]:
+        """Follows the previous labels back to the first flight."""
+        path = []
+        while label is not None:
+            path.append(self.fares[label[3]])
+            label = label[4]
+        path.reverse()
+        return path
+
+
+def load_network_fares(db: Session,
+                       date_from: datetime,
+                       date_to: datetime,
+                       currency: str = DEFAULT_CURRENCY,
+                       fx_rates: Optional[FxRateTable] = None) -> List[FlightFare]:
+    """
+    Loads every stored flight departing in a window with its latest price.
+
+    Args:
+        db: SQLAlchemy database session
+        date_from: Earliest departure datetime (inclusive)
+        date_to: Latest departure datetime (exclusive)
+        currency: Convert prices to this currency at the latest rate
+        fx_rates: Loaded FX rate table, required when a price was fetched
+            in another currency
+
+    Returns:
+        List[FlightFare]: One fare per flight, carrying its latest prices
+
+    Raises:
+        ValueError: If prices must be converted without FX rates
+    """
+    dep_airport = aliased(Airport)
+    arr_airport = aliased(Airport)
+    rows = db.execute(
+        select(Flight.flight_number, Flight.departure_datetime, Flight.arrival_datetime,
+               dep_airport.iata_code, arr_airport.iata_code, arr_airport.country,
+               LatestPrice.outbound_price, LatestPrice.return_price, LatestPrice.currency)
+        .join(LatestPrice, LatestPrice.flight_id == Flight.id)
+        .join(Route, Flight.route_id == Route.id)
+        .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+        .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+        .where(Flight.departure_datetime >= date_from, Flight.departure_datetime < date_to)
+    )
+
+    fares = []
+    for (flight_number, departure_datetime, arrival_datetime, departure, arrival, country,
+         outbound_price, return_price, fare_currency) in rows:
+        if fare_currency != currency:
+            if fx_rates is None:
+                raise ValueError(f"FX rates are needed to convert {fare_currency} prices to {currency}")
+            outbound_price = fx_rates.convert(outbound_price, fare_currency, currency)
+            return_price = fx_rates.convert(return_price, fare_currency, currency)
+        fares.append(FlightFare(
+            flight_number=flight_number,
+            departure_airport=departure,
+            arrival_airport=arrival,
+            arrival_country=country,
+            outbound_price=outbound_price,
+            return_price=return_price,
+            departure_datetime=departure_datetime,
+            arrival_datetime=arrival_datetime
+        ))
+    return fares
+
+
+class ConnectionSearch:
+    """
+    Connection search over the whole network with cached graphs.
+
+    Building the graph is the expensive part of a query, so graphs are kept
+    per (window, currency, date of the latest FX rate) and reused until a
+    latest price changes or a new flight is stored: either commits a change
+    with a newer commit sequence number than the graph's.
+    """
+
+    def __init__(self, max_graphs: int = 4):
+        """
+        Args:
+            max_graphs: Maximum number of cached graphs
+        """
+        self.max_graphs = max_graphs
+        self._graphs: "OrderedDict[tuple, Tuple[Optional[int], ConnectionGraph]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def graph(self,
+              db: Session,
+              date_from: datetime,
+              date_to: datetime,
+              currency: str = DEFAULT_CURRENCY,
+              fx_rates: Optional[FxRateTable] = None) -> ConnectionGraph:
+        """Returns the graph of the flights departing in a window, building it if needed."""
+        key = (date_from, date_to, currency, fx_rates.latest_rate_at if fx_rates is not None else None)
+        # Newest committed search that changed a latest price, walking the commit order index
+        version = db.execute(
+            select(SearchOperation.commit_seq)
+            .where(SearchOperation.commit_seq.isnot(None),
+                   exists().where(LatestPrice.changed_search_id == SearchOperation.id))
+            .order_by(SearchOperation.commit_seq.desc())
+            .limit(1)
+        ).scalar()
+        with self._lock:
+            cached = self._graphs.get(key)
+            if cached is not None and cached[0] == version:
+                self._graphs.move_to_end(key)
+                return cached[1]
+
+        graph = ConnectionGraph(load_network_fares(db, date_from, date_to, currency, fx_rates))
+        logger.info(f"Built connection graph of {len(graph)} flights from {date_from} to {date_to}")
+        with self._lock:
+            self._graphs[key] = (version, graph)
+            self._graphs.move_to_end(key)
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        return graph
+
+    def find(self,
+             db: Session,
+             origin: str,
+             destination: str,
+             date_from: datetime,
+             date_to: datetime,
+             k: int = 10,
+             max_legs: int = 3,
+             min_connection: timedelta = timedelta(hours=2),
+             max_connection: timedelta = timedelta(hours=24),
+             max_duration: timedelta = timedelta(days=2),
+             currency: str = DEFAULT_CURRENCY,
+             fx_rates: Optional[FxRateTable] = None) -> List[Itinerary]:
+        """
+        Finds the k cheapest itineraries with up to max_legs flights.
+
+        Args:
+            db: SQLAlchemy database session
+            origin: Departure airport IATA code
+            destination: Arrival airport IATA code
+            date_from: Earliest first departure (inclusive)
+            date_to: Latest first departure (exclusive)
+            k: Maximum number of itineraries to return
+            max_legs: Maximum number of flights per itinerary
+            min_connection: Minimum connection time
+            max_connection: Maximum connection time
+            max_duration: Maximum time from first departure to last arrival
+            currency: Compare and return prices in this currency
+            fx_rates: Loaded FX rate table, required when a price was fetched
+                in another currency
+
+        Returns:
+            List[Itinerary]: Up to k itineraries, cheapest first
+        """
+        graph = self.graph(db, date_from, date_to + max_duration, currency, fx_rates)
+        return graph.search(origin, destination, date_from, date_to, k=k, max_legs=max_legs,
+                            min_connection=min_connection, max_connection=max_connection,
+                            max_duration=max_duration)
@@ -0,0 +1,111 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.database.models import Airport
+from src.scraper.api_client import EasyJetAPIClient
+from src.scraper.models import APIResponse, FlightFare
+from src.scraper.route_catalog import RouteCatalog
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+    """
+    Merged result of searching several destinations from one airport.
+    Keeps the raw responses so they can be persisted like any other search.
+    """
+    responses: List[APIResponse] = field(default_factory=list)
+    fares: List[FlightFare] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[APIResponse]:
+        """Responses whose request did not succeed."""
+        return [response for response in self.responses if not response.is_successful]
+
+
+def _fetch_all(api_client: EasyJetAPIClient,
+               origin: str,
+               destinations: List[str],
+               date: str,
+               max_workers: int) -> FanOutResult:
+    """Fetches one date for several destinations concurrently and merges the fares."""
+    result = FanOutResult()
+    if not destinations:
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        responses = executor.map(
+            lambda destination: api_client.fetch_fares_for_date(date, origin, destination),
+            destinations
+        )
+        for response in responses:
+            result.responses.append(response)
+            result.fares.extend(response.data)
+
+    result.fares.sort(key=lambda fare: (fare.outbound_price, fare.departure_datetime))
+    return result
+
+
+def search_anywhere(api_client: EasyJetAPIClient,
+                    db: Session,
+                    origin: str,
+                    date: str,
+                    catalog: Optional[RouteCatalog] = None,
+                    max_workers: int = 4) -> FanOutResult:
+    """
+    Searches every destination with known service from an airport on one date.
+    Only routes recorded as served in the catalog are queried.
+
+    Args:
+        api_client: Client used to fetch fares
+        db: SQLAlchemy database session used to read the route catalog
+        origin: Departure airport IATA code
+        date: Departure date (YYYY-MM-DD)
+        catalog: Route catalog (defaults to a catalog with default settings)
+        max_workers: Maximum number of concurrent requests
+
+    Returns:
+        FanOutResult: Responses and all fares merged, cheapest first
+    """
+    catalog = catalog or RouteCatalog()
+    destinations = catalog.served_destinations(db, origin)
+    logger.info(f"Searching {len(destinations)} known destinations from {origin} on {date}")
+    return _fetch_all(api_client, origin, destinations, date, max_workers)
+
+
+def discover_routes(api_client: EasyJetAPIClient,
+                    db: Session,
+                    origin: str,
+                    date: str,
+                    candidates: Optional[List[str]] = None,
+                    catalog: Optional[RouteCatalog] = None,
+                    max_workers: int = 4) -> FanOutResult:
+    """
+    Probes candidate destinations that the catalog has no current answer for.
+    Pairs known to be served or recently found empty are skipped. The caller
+    should persist the returned responses so the catalog learns from them.
+
+    Args:
+        api_client: Client used to fetch fares
+        db: SQLAlchemy database session used to read the route catalog
+        origin: Departure airport IATA code
+        date: Departure date (YYYY-MM-DD)
+        candidates: Destinations to consider (defaults to every known airport)
+        catalog: Route catalog (defaults to a catalog with default settings)
+        max_workers: Maximum number of concurrent requests
+
+    Returns:
+        FanOutResult: Responses of the probes and the fares they found
+    """
+    catalog = catalog or RouteCatalog()
+    if candidates is None:
+        candidates = [code for (code,) in db.query(Airport.iata_code).all()]
+
+    destinations = catalog.pairs_to_probe(db, origin, candidates)
+    logger.info(f"Probing {len(destinations)} candidate destinations from {origin} on {date}")
+    return _fetch_all(api_client, origin, destinations, date, max_workers)
@@ -0,0 +1,219 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session, aliased
+
+from src.fx import FxRateTable
+from src.scraper.models import FlightFare
+from src.database.models import Airport, Flight, LatestPrice, Route
+
+
+@dataclass
+class RoundTrip:
+    """
+    Represents an outbound flight combined with a return on the reverse route.
+    The return leg is priced with its return fare, as quoted by the API.
+    """
+    outbound: FlightFare
+    inbound: FlightFare
+
+    @property
+    def total_price(self) -> float:
+        """Total price of the trip (outbound fare + return fare)."""
+        return self.outbound.outbound_price + self.inbound.return_price
+
+    @property
+    def stay(self) -> timedelta:
+        """Time spent at destination, from outbound arrival to return departure."""
+        return self.inbound.departure_datetime - self.outbound.arrival_datetime
+
+
+class _RangeMin:
+    """
+    Sparse table answering "index of the cheapest element in [lo, hi]" in O(1)
+    after an O(n log n) build.
+    """
+
+    def __init__(self, values: List[float]):
+        self.values = values
+        self.table = [list(range(len(values)))]
+        span = 1
+        while 2 * span <= len(values):
+            prev = self.table[-1]
+            row = []
+            for i in range(len(values) - 2 * span + 1):
+                a, b = prev[i], prev[i + span]
+                row.append(a if values[a] <= values[b] else b)
+            self.table.append(row)
+            span *= 2
+
+    def argmin(self, lo: int, hi: int) -> int:
+        """Returns the index of the minimum value in the inclusive range [lo, hi]."""
+        level = (hi - lo + 1).bit_length() - 1
+        a = self.table[level][lo]
+        b = self.table[level][hi - (1 << level) + 1]
+        return a if self.values[a] <= self.values[b] else b
+
+
+def find_round_trips(outbound: List[FlightFare],
+                     inbound: List[FlightFare],
+                     k: int = 10,
+                     min_stay: timedelta = timedelta(days=1),
+                     max_stay: timedelta = timedelta(days=14)) -> List[RoundTrip]:
+    """
+    Finds the k cheapest outbound + return combinations within the stay limits.
+
+    Return flights are sorted once by departure time, so the valid returns for
+    any outbound flight form a contiguous window found by binary search. Each
+    window is pushed on a heap keyed by its cheapest combination; popping a
+    window yields that combination and splits the window around it. This
+    enumerates results in price order in O((n + k) log n) instead of pairing
+    every outbound with every return.
+
+    Args:
+        outbound: Fares on the outbound route (priced by outbound_price)
+        inbound: Fares on the reverse route (priced by return_price)
+        k: Maximum number of combinations to return
+        min_stay: Minimum time between outbound arrival and return departure
+        max_stay: Maximum time between outbound arrival and return departure
+
+    Returns:
+        List[RoundTrip]: Up to k combinations, cheapest first
+    """
+    if k <= 0 or not outbound or not inbound:
+        return []
+
+    returns = sorted(inbound, key=lambda fare: fare.departure_datetime)
+    departures = [fare.departure_datetime for fare in returns]
+    cheapest = _RangeMin([fare.return_price for fare in returns])
+
+    heap: List[Tuple[float, int, int, int, int]] = []
+
+    def push(out_index: int, lo: int, hi: int) -> None:
+        if lo > hi:
+            return
+        best = cheapest.argmin(lo, hi)
+        price = outbound[out_index].outbound_price + returns[best].return_price
+        heapq.heappush(heap, (price, out_index, lo, hi, best))
+
+    for i, fare in enumerate(outbound):
+        lo = bisect_left(departures, fare.arrival_datetime + min_stay)
+        hi = bisect_right(departures, fare.arrival_datetime + max_stay) - 1
+        push(i, lo, hi)
+
+    trips = []
+    while heap and len(trips) < k:
+        _, out_index, lo, hi, best = heapq.heappop(heap)
+        trips.append(RoundTrip(outbound=outbound[out_index], inbound=returns[best]))
+        push(out_index, lo, best - 1)
+        push(out_index, best + 1, hi)
+
+    return trips
+
+
+def load_latest_fares(db: Session,
+                      departure: str,
+                      arrival: str,
+                      date_from: datetime,
+                      date_to: datetime,
+                      currency: Optional[str] = None,
+                      fx_rates: Optional[FxRateTable] = None) -> List[FlightFare]:
+    """
+    Loads stored flights on a route with their most recent observed prices.
+
+    Args:
+        db: SQLAlchemy database session
+        departure: Departure airport IATA code
+        arrival: Arrival airport IATA code
+        date_from: Earliest departure datetime (inclusive)
+        date_to: Latest departure datetime (exclusive)
+        currency: Convert prices to this currency at the latest rate
+        fx_rates: Loaded FX rate table, required when currency is given
+
+    Returns:
+        List[FlightFare]: One fare per flight, carrying its latest prices
+    """
+    dep_airport = aliased(Airport)
+    arr_airport = aliased(Airport)
+
+    rows = (
+        db.query(Flight, LatestPrice, arr_airport.country)
+        .join(Route, Flight.route_id == Route.id)
+        .join(dep_airport, Route.departure_airport_id == dep_airport.id)
+        .join(arr_airport, Route.arrival_airport_id == arr_airport.id)
+        .join(LatestPrice, LatestPrice.flight_id == Flight.id)
+        .filter(
+            dep_airport.iata_code == departure,
+            arr_airport.iata_code == arrival,
+            Flight.departure_datetime >= date_from,
+            Flight.departure_datetime < date_to
+        )
+        .all()
+    )
+
+    fares = []
+    for flight, latest, country in rows:
+        outbound_price, return_price = latest.outbound_price, latest.return_price
+        if currency and latest.currency != currency:
+            outbound_price = fx_rates.convert(outbound_price, latest.currency, currency)
+            return_price = fx_rates.convert(return_price, latest.currency, currency)
+
+        fares.append(FlightFare(
+            flight_number=flight.flight_number,
+            departure_airport=departure,
+            arrival_airport=arrival,
+            arrival_country=country,
+            outbound_price=outbound_price,
+            return_price=return_price,
+            departure_datetime=flight.departure_datetime,
+            arrival_datetime=flight.arrival_datetime
+        ))
+    return fares
+
+
+def search_round_trips(db: Session,
+                       origin: str,
+                       destinations: List[str],
+                       date_from: datetime,
+                       date_to: datetime,
+                       k: int = 10,
+                       min_stay: timedelta = timedelta(days=1),
+                       max_stay: timedelta = timedelta(days=14),
+                       return_by: Optional[datetime] = None,
+                       currency: Optional[str] = None,
+                       fx_rates: Optional[FxRateTable] = None) -> List[RoundTrip]:
+    """
+    Finds the k cheapest round trips from an origin to any of the destinations,
+    using the latest stored prices.
+
+    Args:
+        db: SQLAlchemy database session
+        origin: Departure airport IATA code
+        destinations: Candidate destination airport IATA codes
+        date_from: Earliest outbound departure (inclusive)
+        date_to: Latest outbound departure (exclusive)
+        k: Maximum number of combinations to return
+        min_stay: Minimum stay at destination
+        max_stay: Maximum stay at destination
+        return_by: Latest return departure (defaults to date_to + max_stay)
+        currency: Compare prices in this currency (required if routes were
+            fetched in different currencies)
+        fx_rates: Loaded FX rate table, required when currency is given
+
+    Returns:
+        List[RoundTrip]: Up to k combinations across all destinations, cheapest first
+    """
+    return_by = return_by or date_to + max_stay
+
+    candidates: List[RoundTrip] = []
+    for destination in destinations:
+        outbound = load_latest_fares(db, origin, destination, date_from, date_to, currency, fx_rates)
+        if not outbound:
+            continue
+        inbound = load_latest_fares(db, destination, origin, date_from, return_by, currency, fx_rates)
+        candidates.extend(find_round_trips(outbound, inbound, k, min_stay, max_stay))
+
+    return heapq.nsmallest(k, candidates, key=lambda trip: trip.total_price)
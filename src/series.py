@@ -0,0 +1,256 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config import DEFAULT_CURRENCY
+from src.database.models import Flight, PriceSnapshot, SearchOperation
+from src.fx import FxRateTable
+
+logger = logging.getLogger(__name__)
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+# Largest resolution a series can be requested at
+MAX_SERIES_POINTS = 5000
+
+# Timestamps are naive UTC datetimes; x values are seconds since this epoch
+_EPOCH = datetime(1970, 1, 1)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, from each of points - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Peaks and
+    troughs survive, flat stretches collapse.
+
+    Args:
+        x: Sorted x values (e.g. Unix timestamps)
+        y: Values at x
+        points: Maximum number of points to keep
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.array([0, n - 1][:max(points, 0)], dtype=np.int64)
+
+    # Bucket boundaries over the inner points 1 .. n-2
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    ends[-1] = n - 1
+
+    # Average of each bucket, vectorized with cumulative sums
+    cx = np.concatenate([[0.0], np.cumsum(x, dtype=np.float64)])
+    cy = np.concatenate([[0.0], np.cumsum(y, dtype=np.float64)])
+    sizes = ends - starts
+    avg_x = (cx[ends] - cx[starts]) / sizes
+    avg_y = (cy[ends] - cy[starts]) / sizes
+    # The bucket after the last one is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bx, by = x[start:end], y[start:end]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[previous] - next_x[bucket]) * (by - y[previous])
+                      - (x[previous] - bx) * (next_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def minmax(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Min/max bucket downsampling: splits the series into points // 2 equal
+    buckets and keeps the lowest and highest point of each, so every price
+    extreme is preserved.
+
+    Args:
+        x: Sorted x values
+        y: Values at x
+        points: Maximum number of points to keep
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    if points < 2:
+        # A bucket keeps two points: fall back to the first point alone
+        return np.arange(max(points, 0), dtype=np.int64)
+
+    buckets = points // 2
+    bucket_ids = np.arange(n) * buckets // n
+    # Within each bucket, order by value: the first is the min, the last the max
+    order = np.lexsort((y, bucket_ids))
+    sorted_ids = bucket_ids[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    lasts = np.r_[firsts[1:] - 1, n - 1]
+    return np.unique(np.concatenate([order[firsts], order[lasts]]))
+
+
+class PriceSeries:
+    """
+    Bounded-size price series of a flight for charting.
+
+    Raw snapshots are converted to one currency at the FX rate of their
+    time, then downsampled with LTTB or min/max buckets, separately for the
+    outbound and return price. Results are cached per (flight, window,
+    resolution, method, currency) and reused until a transaction commits
+    snapshots of the flight (including late or backfilled ones, by commit
+    sequence), newer FX rates are loaded, or the window, which moves with
+    time, no longer covers the oldest observation of the cached series.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached series
+        """
+        self.max_entries = max_entries
+        # Key -> (version, oldest observation, series)
+        self._cache: "OrderedDict[tuple, Tuple[tuple, Optional[datetime], List[dict]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _flight_filter(self, flight_number: str, departure_date: Optional[date]) -> list:
+        conditions = [Flight.flight_number == flight_number]
+        if departure_date is not None:
+            day = datetime.combine(departure_date, datetime.min.time())
+            conditions += [Flight.departure_datetime >= day,
+                           Flight.departure_datetime < day + timedelta(days=1)]
+        return conditions
+
+    def _version(self, db: Session, flight_number: str, departure_date: Optional[date]) -> Optional[int]:
+        """Last commit sequence of the matching flights' snapshots, in commit (not id) order."""
+        return db.execute(
+            select(func.max(SearchOperation.commit_seq))
+            .join(PriceSnapshot, PriceSnapshot.search_id == SearchOperation.id)
+            .join(Flight, PriceSnapshot.flight_id == Flight.id)
+            .where(*self._flight_filter(flight_number, departure_date))
+        ).scalar()
+
+    def get(self,
+            db: Session,
+            flight_number: str,
+            departure_date: Optional[date] = None,
+            days: int = 90,
+            points: int = 200,
+            method: str = "lttb",
+            currency: str = DEFAULT_CURRENCY,
+            fx_rates: Optional[FxRateTable] = None) -> List[dict]:
+        """
+        Returns the downsampled price series of a flight.
+
+        Args:
+            db: SQLAlchemy database session
+            flight_number: Flight number
+            departure_date: Departure day, to pick one flight of a recurring number
+            days: Window of observations, counted back from now
+            points: Maximum points per price series
+            method: "lttb" or "minmax"
+            currency: Currency of the returned prices
+            fx_rates: Rates to convert snapshots fetched in other currencies
+
+        Returns:
+            List[dict]: One series per flight: departure, number of raw points,
+                currency, and the outbound and return series as [timestamp, price] pairs
+        """
+        if method not in DOWNSAMPLING_METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+
+        key = (flight_number, departure_date, days, points, method, currency)
+        since = datetime.utcnow() - timedelta(days=days)
+        version = (self._version(db, flight_number, departure_date),
+                   fx_rates.latest_rate_at if fx_rates is not None else None)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version and (cached[1] is None or cached[1] >= since):
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        oldest, series = self._compute(db, flight_number, departure_date, since, points, method,
+                                       currency, fx_rates)
+        with self._lock:
+            self._cache[key] = (version, oldest, series)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return series
+
+    def _compute(self,
+                 db: Session,
+                 flight_number: str,
+                 departure_date: Optional[date],
+                 since: datetime,
+                 points: int,
+                 method: str,
+                 currency: str,
+                 fx_rates: Optional[FxRateTable]) -> Tuple[Optional[datetime], List[dict]]:
+        """
+        Loads the raw snapshots observed since the given time, converts them
+        to the currency and downsamples each flight. Returns the oldest
+        observation used and the series.
+        """
+        rows = db.execute(
+            select(Flight.id, Flight.departure_datetime, PriceSnapshot.timestamp,
+                   PriceSnapshot.outbound_price, PriceSnapshot.return_price, PriceSnapshot.currency)
+            .join(Flight, PriceSnapshot.flight_id == Flight.id)
+            .where(*self._flight_filter(flight_number, departure_date), PriceSnapshot.timestamp >= since)
+            .order_by(Flight.id, PriceSnapshot.timestamp)
+        ).all()
+        if not rows:
+            return None, []
+
+        flight_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        timestamps = np.fromiter(((row[2] - _EPOCH).total_seconds() for row in rows),
+                                 dtype=np.float64, count=len(rows))
+        outbound = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        inbound = np.fromiter((row[4] for row in rows), dtype=np.float64, count=len(rows))
+        departures: Dict[int, datetime] = {row[0]: row[1] for row in rows}
+
+        currencies = np.array([row[5] for row in rows])
+        for source in np.unique(currencies[currencies != currency]):
+            if fx_rates is None:
+                raise ValueError(f"No FX rates to convert {source} prices to {currency}")
+            foreign = currencies == source
+            factors = fx_rates.rates(str(source), currency, timestamps[foreign])
+            outbound[foreign] = np.round(outbound[foreign] * factors, 2)
+            inbound[foreign] = np.round(inbound[foreign] * factors, 2)
+
+        downsample = lttb if method == "lttb" else minmax
+        boundaries = np.flatnonzero(np.r_[True, flight_ids[1:] != flight_ids[:-1], True])
+        series = []
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            x = timestamps[start:end]
+            result = {
+                "departure_datetime": departures[int(flight_ids[start])],
+                "raw_points": int(end - start),
+                "currency": currency
+            }
+            for name, values in (("outbound", outbound[start:end]), ("return", inbound[start:end])):
+                kept = downsample(x, values, points)
+                result[name] = [
+                    [_EPOCH + timedelta(seconds=float(x[i])), float(values[i])] for i in kept
+                ]
+            series.append(result)
+        return min(row[2] for row in rows), series
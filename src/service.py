@@ -0,0 +1,381 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from aiohttp import web
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.cli import parse_date
+from src.data_manager import DataManager
+from src.database.connection import make_read_sessionmaker
+from src.database.models import SearchOperation
+from src.feed import FeedCursor
+from src.metrics import render_prometheus
+from src.query_cache import QueryCache
+from src.search.connections import Itinerary
+from src.series import DOWNSAMPLING_METHODS, MAX_SERIES_POINTS
+
+
+def _json_default(value):
+    """Serializes the datetimes found in query results."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _itinerary_to_dict(itinerary: Itinerary) -> dict:
+    """Serializes a connection search result."""
+    return {
+        "total_price": itinerary.total_price,
+        "departure_datetime": itinerary.departure_datetime,
+        "arrival_datetime": itinerary.arrival_datetime,
+        "duration_minutes": itinerary.duration.total_seconds() / 60,
+        "via": itinerary.via,
+        "legs": [
+            {
+                "flight_number": leg.flight_number,
+                "departure_airport": leg.departure_airport,
+                "arrival_airport": leg.arrival_airport,
+                "departure_datetime": leg.departure_datetime,
+                "arrival_datetime": leg.arrival_datetime,
+                "price": leg.outbound_price
+            }
+            for leg in itinerary.legs
+        ]
+    }
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized responses, keyed by path and query string.
+    Each entry stores the body together with its ETag. The generation counts
+    the clears, so a result computed before a clear is not stored after it.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """Returns (etag, body) for a key, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    @staticmethod
+    def entry(body: bytes) -> Tuple[str, bytes]:
+        """Returns the (etag, body) entry of a body."""
+        return f'"{hashlib.sha256(body).hexdigest()}"', body
+
+    def put(self, key: str, body: bytes, generation: int) -> Tuple[str, bytes]:
+        """
+        Returns the (etag, body) entry of a body, storing it unless the cache
+        was cleared since `generation` was read.
+        """
+        entry = self.entry(body)
+        if generation != self.generation:
+            return entry
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        """Drops all entries."""
+        self._entries.clear()
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryService:
+    """
+    Read-only HTTP API over the stored fares.
+
+    Queries run on a thread pool sized like the read connection pool, so
+    the event loop never blocks on the database. Responses are cached and
+    served with ETags; the cache is cleared whenever a new search operation
+    is recorded.
+    """
+
+    def __init__(self,
+                 session_factory: Callable[[], Session],
+                 pool_size: int = 10,
+                 cache_size: int = 256,
+                 refresh_interval: float = 5.0):
+        """
+        Args:
+            session_factory: Creates (read-only) database sessions
+            pool_size: Number of concurrent queries, matching the connection pool
+            cache_size: Maximum number of cached responses
+            refresh_interval: Seconds between checks for new search operations
+        """
+        self.session_factory = session_factory
+        # The crawler saves in another process, so the query cache would never
+        # be invalidated here: the response cache, cleared on new searches, is
+        # the only cache of results (series and graphs check the database)
+        self.data_manager = DataManager(session_factory=session_factory, cache=QueryCache(max_entries=0),
+                                        raise_errors=True)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="query")
+        self.cache = ResponseCache(cache_size)
+        self.refresh_interval = refresh_interval
+        self.last_commit_seq: Optional[int] = None
+        self.logger = logging.getLogger(__name__)
+
+    def make_app(self) -> web.Application:
+        """Builds the aiohttp application with the query routes."""
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/routes", self.routes)
+        app.router.add_get("/flights/{flight_number}/history", self.price_history)
+        app.router.add_get("/flights/{flight_number}/series", self.price_series)
+        app.router.add_get("/latest", self.latest_fares)
+        app.router.add_get("/anomalies", self.price_anomalies)
+        app.router.add_get("/changes", self.changes)
+        app.router.add_get("/connections", self.connections)
+        app.router.add_get("/metrics", self.metrics)
+        app.on_startup.append(self._start_refresh)
+        app.on_cleanup.append(self._stop_refresh)
+        return app
+
+    async def _run(self, function, *args):
+        """Runs a blocking query on the query thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def _query(self, function, *args):
+        """Runs a query like _run, answering 503 if the database fails."""
+        try:
+            return await self._run(function, *args)
+        except Exception as e:
+            self.logger.error(f"Query failed: {str(e)}")
+            raise web.HTTPServiceUnavailable(text="Database query failed")
+
+    async def _cached(self, request: web.Request, query: Callable[[], object], store: bool = True) -> web.Response:
+        """
+        Serves a query result from the cache, honoring If-None-Match. Failures
+        are never cached; results that expire by themselves are not stored.
+        """
+        key = request.path_qs
+        entry = self.cache.get(key) if store else None
+        if entry is None:
+            generation = self.cache.generation
+            result = await self._query(query)
+            body = json.dumps(result, default=_json_default).encode("utf-8")
+            entry = self.cache.put(key, body, generation) if store else ResponseCache.entry(body)
+
+        etag, body = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def _latest_commit_seq(self) -> Optional[int]:
+        """
+        Returns the commit sequence of the most recent saved search. Unlike the
+        search id, it changes only once the search's snapshots are committed.
+        """
+        db = self.session_factory()
+        try:
+            return db.query(func.max(SearchOperation.commit_seq)).scalar()
+        finally:
+            db.close()
+
+    async def _refresh_loop(self) -> None:
+        """Clears the cache whenever new searches are saved."""
+        while True:
+            try:
+                commit_seq = await self._run(self._latest_commit_seq)
+                if commit_seq != self.last_commit_seq:
+                    if self.last_commit_seq is not None:
+                        self.logger.info(f"New searches saved (commit {commit_seq}), "
+                                         f"clearing {len(self.cache)} cached responses")
+                    self.cache.clear()
+                    self.last_commit_seq = commit_seq
+            except Exception as e:
+                self.logger.error(f"Failed to check for new searches: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def _start_refresh(self, app: web.Application) -> None:
+        app["refresh_task"] = asyncio.create_task(self._refresh_loop())
+
+    async def _stop_refresh(self, app: web.Application) -> None:
+        app["refresh_task"].cancel()
+        self.executor.shutdown(wait=False)
+
+    async def health(self, request: web.Request) -> web.Response:
+        """GET /health"""
+        return web.json_response({
+            "status": "ok",
+            "last_commit_seq": self.last_commit_seq,
+            "cached_responses": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses
+        })
+
+    def _render_metrics(self, window: timedelta) -> str:
+        """Renders the search telemetry in the Prometheus text format."""
+        db = self.session_factory()
+        try:
+            return render_prometheus(db, window)
+        finally:
+            db.close()
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        """GET /metrics?window_minutes=60 (not cached, scraped periodically)"""
+        try:
+            window = timedelta(minutes=float(request.query.get("window_minutes", "60")))
+        except (ValueError, OverflowError):
+            raise web.HTTPBadRequest(text="window_minutes must be a number")
+        if window <= timedelta(0):
+            raise web.HTTPBadRequest(text="window_minutes must be positive")
+        text = await self._query(self._render_metrics, window)
+        return web.Response(text=text, content_type="text/plain", headers={"Cache-Control": "no-store"})
+
+    async def routes(self, request: web.Request) -> web.Response:
+        """GET /routes?departure=ZRH"""
+        departure = request.query.get("departure")
+        return await self._cached(request, lambda: self.data_manager.get_routes(departure))
+
+    async def price_history(self, request: web.Request) -> web.Response:
+        """GET /flights/{flight_number}/history?days=30&currency=CHF"""
+        flight_number = request.match_info["flight_number"]
+        try:
+            days = int(request.query.get("days", "30"))
+        except ValueError:
+            raise web.HTTPBadRequest(text="days must be an integer")
+        currency = request.query.get("currency")
+        return await self._cached(
+            request, lambda: self.data_manager.get_price_history(flight_number, days, currency=currency)
+        )
+
+    async def price_series(self, request: web.Request) -> web.Response:
+        """GET /flights/{flight_number}/series?days=90&points=200&method=lttb&departure_date=2026-11-01&currency=CHF"""
+        flight_number = request.match_info["flight_number"]
+        try:
+            days = int(request.query.get("days", "90"))
+            # A series needs at least its two ends
+            points = min(max(int(request.query.get("points", "200")), 2), MAX_SERIES_POINTS)
+            departure_date = request.query.get("departure_date")
+            departure_date = parse_date(departure_date).date() if departure_date else None
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        method = request.query.get("method", "lttb")
+        if method not in DOWNSAMPLING_METHODS:
+            raise web.HTTPBadRequest(text=f"method must be one of {', '.join(DOWNSAMPLING_METHODS)}")
+        currency = request.query.get("currency")
+        # Not stored: the window moves with time, PriceSeries keeps its own checked cache
+        return await self._cached(
+            request,
+            lambda: self.data_manager.get_price_series(flight_number, departure_date, days, points, method,
+                                                       currency=currency),
+            store=False
+        )
+
+    async def latest_fares(self, request: web.Request) -> web.Response:
+        """GET /latest?departure=ZRH&arrival=FCO&date_from=2026-11-01&date_to=2026-11-30&currency=CHF"""
+        try:
+            departure = request.query["departure"]
+            arrival = request.query["arrival"]
+            date_from = parse_date(request.query["date_from"])
+            date_to = parse_date(request.query["date_to"]) + timedelta(days=1)
+        except KeyError as e:
+            raise web.HTTPBadRequest(text=f"Missing parameter: {e.args[0]}")
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        currency = request.query.get("currency")
+        return await self._cached(
+            request,
+            lambda: self.data_manager.get_latest_fares(departure, arrival, date_from, date_to, currency=currency)
+        )
+
+    async def price_anomalies(self, request: web.Request) -> web.Response:
+        """GET /anomalies?hours=24&kind=drop"""
+        try:
+            since = datetime.utcnow() - timedelta(hours=float(request.query.get("hours", "24")))
+        except (ValueError, OverflowError):
+            raise web.HTTPBadRequest(text="hours must be a finite number")
+        kind = request.query.get("kind")
+        if kind not in (None, "drop", "spike"):
+            raise web.HTTPBadRequest(text="kind must be drop or spike")
+        # Not stored: the window moves with time, so a stored page would keep old anomalies
+        return await self._cached(request, lambda: self.data_manager.get_price_anomalies(since, kind),
+                                  store=False)
+
+    async def changes(self, request: web.Request) -> web.Response:
+        """GET /changes?cursor=...&limit=1000 (not cached, the tail of the feed moves)"""
+        try:
+            limit = min(int(request.query.get("limit", "1000")), 10000)
+            cursor = FeedCursor.decode(request.query.get("cursor"))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if limit < 1:
+            raise web.HTTPBadRequest(text="limit must be positive")
+        page = await self._query(self.data_manager.get_changes, cursor.encode(), limit)
+        return web.Response(text=json.dumps(page, default=_json_default),
+                            content_type="application/json", headers={"Cache-Control": "no-store"})
+
+    async def connections(self, request: web.Request) -> web.Response:
+        """GET /connections?origin=BSL&destination=LIS&date_from=2026-11-01&date_to=2026-11-03&k=10&max_legs=3"""
+        try:
+            origin = request.query["origin"]
+            destination = request.query["destination"]
+            date_from = parse_date(request.query["date_from"])
+            date_to = parse_date(request.query["date_to"]) + timedelta(days=1)
+            k = int(request.query.get("k", "10"))
+            max_legs = int(request.query.get("max_legs", "3"))
+            min_connection = timedelta(minutes=float(request.query.get("min_connection_minutes", "120")))
+            max_connection = timedelta(hours=float(request.query.get("max_connection_hours", "24")))
+        except KeyError as e:
+            raise web.HTTPBadRequest(text=f"Missing parameter: {e.args[0]}")
+        except (ValueError, OverflowError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if min_connection < timedelta(0):
+            raise web.HTTPBadRequest(text="min_connection_minutes must not be negative")
+        if max_connection < min_connection:
+            raise web.HTTPBadRequest(text="max_connection_hours must not be shorter than min_connection_minutes")
+        currency = request.query.get("currency")
+        return await self._cached(
+            request,
+            lambda: [
+                _itinerary_to_dict(itinerary)
+                for itinerary in self.data_manager.find_connections(
+                    origin, destination, date_from, date_to, k=k, max_legs=max_legs,
+                    min_connection=min_connection, max_connection=max_connection, currency=currency)
+            ]
+        )
+
+
+def main():
+    """Runs the query service."""
+    parser = argparse.ArgumentParser(description="Read-only query API over stored fares")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--pool-size", type=int, default=10, help="Read connections and query threads")
+    parser.add_argument("--cache-size", type=int, default=256, help="Maximum number of cached responses")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+
+    service = QueryService(make_read_sessionmaker(pool_size=args.pool_size),
+                           pool_size=args.pool_size, cache_size=args.cache_size)
+    web.run_app(service.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
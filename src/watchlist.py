@@ -0,0 +1,217 @@
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from src.config import APIConfig, DEFAULT_CURRENCY
+from src.fx import FxRateTable
+from src.scraper.api_client import EasyJetAPIClient
+from src.scraper.models import APIResponse, FlightFare
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Subscription:
+    """A subscriber watching a route over a range of departure dates (inclusive)."""
+    subscriber: str
+    departure_airport: str
+    arrival_airport: str
+    date_from: date
+    date_to: date
+    currency: str = DEFAULT_CURRENCY
+
+    @property
+    def search_key(self) -> Tuple[str, str]:
+        """Route the subscription is fetched with; every currency shares one fetch."""
+        return self.departure_airport, self.arrival_airport
+
+    @property
+    def days(self) -> int:
+        return (self.date_to - self.date_from).days + 1
+
+
+@dataclass
+class FetchWindow:
+    """One request of the fetch plan: a route and a range of dates (inclusive)."""
+    departure_airport: str
+    arrival_airport: str
+    date_from: date
+    date_to: date
+    subscribers: List[str] = field(default_factory=list)
+
+    @property
+    def days(self) -> int:
+        return (self.date_to - self.date_from).days + 1
+
+
+def load_subscriptions(path: str) -> List[Subscription]:
+    """
+    Reads subscriptions from a JSON file, e.g.:
+
+        [{"subscriber": "alice", "departure_airport": "ZRH", "arrival_airport": "FCO",
+          "start_date": "2025-08-01", "days": 14, "currency": "EUR"}]
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        List[Subscription]: The parsed subscriptions
+    """
+    with Path(path).open(encoding="utf-8") as f:
+        entries = json.load(f)
+
+    subscriptions = []
+    for entry in entries:
+        date_from = date.fromisoformat(entry["start_date"])
+        subscriptions.append(Subscription(
+            subscriber=entry["subscriber"],
+            departure_airport=entry["departure_airport"],
+            arrival_airport=entry["arrival_airport"],
+            date_from=date_from,
+            date_to=date_from + timedelta(days=int(entry.get("days", 1)) - 1),
+            currency=entry.get("currency", DEFAULT_CURRENCY)
+        ))
+    return subscriptions
+
+
+class WatchlistPlanner:
+    """
+    Merges overlapping watchlist subscriptions into a minimal fetch plan.
+
+    Subscriptions on the same route are unioned into disjoint date
+    intervals, whatever their currency, which are cut into windows of at
+    most max_window_days, each fetched with a single date-range request in
+    DEFAULT_CURRENCY. Fares are then fanned out to every subscriber whose
+    dates they fall in, converted to the subscriber's currency.
+    """
+
+    def __init__(self, max_window_days: int = 7):
+        """
+        Args:
+            max_window_days: Longest date range requested at once
+                (1 fetches every date separately, still without duplicates)
+
+        Raises:
+            ValueError: If max_window_days is less than 1
+        """
+        if max_window_days < 1:
+            raise ValueError(f"max_window_days must be at least 1, got {max_window_days}")
+        self.max_window_days = max_window_days
+
+    def plan(self, subscriptions: List[Subscription]) -> List[FetchWindow]:
+        """
+        Builds the deduplicated set of requests covering all subscriptions.
+
+        Args:
+            subscriptions: All watchlist subscriptions
+
+        Returns:
+            List[FetchWindow]: Requests ordered by route and date
+        """
+        by_search: Dict[Tuple[str, str], List[Subscription]] = defaultdict(list)
+        for subscription in subscriptions:
+            by_search[subscription.search_key].append(subscription)
+
+        windows = []
+        for (departure, arrival), group in sorted(by_search.items()):
+            for date_from, date_to in self._merge_intervals(group):
+                start = date_from
+                while start <= date_to:
+                    end = min(start + timedelta(days=self.max_window_days - 1), date_to)
+                    subscribers = sorted({
+                        subscription.subscriber for subscription in group
+                        if subscription.date_from <= end and subscription.date_to >= start
+                    })
+                    windows.append(FetchWindow(departure, arrival, start, end, subscribers))
+                    start = end + timedelta(days=1)
+
+        logger.info(f"Planned {len(windows)} requests for {len(subscriptions)} subscriptions")
+        return windows
+
+    @staticmethod
+    def _merge_intervals(subscriptions: List[Subscription]) -> List[Tuple[date, date]]:
+        """Unions the date ranges of subscriptions into disjoint, non-adjacent intervals."""
+        intervals = []
+        for subscription in sorted(subscriptions, key=lambda s: s.date_from):
+            if intervals and subscription.date_from <= intervals[-1][1] + timedelta(days=1):
+                intervals[-1][1] = max(intervals[-1][1], subscription.date_to)
+            else:
+                intervals.append([subscription.date_from, subscription.date_to])
+        return [(start, end) for start, end in intervals]
+
+    def fetch(self, windows: List[FetchWindow], config: APIConfig) -> Iterator[APIResponse]:
+        """
+        Executes the plan, one request per window.
+
+        Args:
+            windows: Fetch plan from plan()
+            config: API configuration (fares are fetched in DEFAULT_CURRENCY)
+
+        Yields:
+            APIResponse: One response per window, in plan order; the client is
+                closed once the plan is done or the generator is closed
+        """
+        with EasyJetAPIClient(replace(config, currency=DEFAULT_CURRENCY)) as client:
+            for window in windows:
+                yield client.fetch_fares_for_date(
+                    window.date_from.strftime("%Y-%m-%d"),
+                    window.departure_airport,
+                    window.arrival_airport,
+                    date_to=window.date_to.strftime("%Y-%m-%d")
+                )
+
+    @staticmethod
+    def fan_out(subscriptions: List[Subscription],
+                response: APIResponse,
+                results: Dict[str, List[FlightFare]],
+                fx_rates: Optional[FxRateTable] = None) -> None:
+        """
+        Adds the fares of a response to every subscriber watching them, in the
+        subscription's currency. A subscriber gets each fare once per currency,
+        even through overlapping subscriptions.
+
+        Args:
+            subscriptions: All watchlist subscriptions
+            response: A response of the fetch plan
+            results: Fares per subscriber, updated in place
+            fx_rates: Loaded FX rate table, required when a subscription's
+                currency differs from the response's
+
+        Raises:
+            ValueError: If fares must be converted without FX rates
+        """
+        fetched_in = response.currency or DEFAULT_CURRENCY
+        watched: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        for subscription in subscriptions:
+            if subscription.search_key != (response.departure_airport, response.arrival_airport):
+                continue
+            watched[(subscription.subscriber, subscription.currency)].update(
+                index for index, fare in enumerate(response.data)
+                if subscription.date_from <= fare.departure_datetime.date() <= subscription.date_to
+            )
+        for (subscriber, currency), indices in watched.items():
+            fares = [response.data[index] for index in sorted(indices)]
+            if fares and currency != fetched_in:
+                if fx_rates is None:
+                    raise ValueError(f"FX rates are needed to convert {fetched_in} fares to {currency}")
+                fares = [
+                    replace(fare,
+                            outbound_price=fx_rates.convert(fare.outbound_price, fetched_in, currency,
+                                                            response.fetched_at),
+                            return_price=fx_rates.convert(fare.return_price, fetched_in, currency,
+                                                          response.fetched_at))
+                    for fare in fares
+                ]
+            results[subscriber].extend(fares)
+
+    @staticmethod
+    def savings(subscriptions: List[Subscription], windows: List[FetchWindow]) -> str:
+        """Summarizes the requests saved against running every subscription separately."""
+        separate = sum(subscription.days for subscription in subscriptions)
+        return (f"{len(subscriptions)} subscriptions need {separate} per-date requests when run "
+                f"separately; the merged plan makes {len(windows)} requests covering "
+                f"{sum(window.days for window in windows)} distinct route-dates")
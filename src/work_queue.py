@@ -0,0 +1,345 @@
+import logging
+import os
+import socket
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from src.config import APIConfig
+from src.database.connection import dialect_insert
+from src.database.models import CrawlWorkItem
+from src.scraper.api_client import EasyJetAPIClient
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlQueue:
+    """
+    Postgres-backed queue of (route, date, currency) searches shared by any
+    number of crawl workers, on one host or many.
+
+    Items are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never claim the same item, and held under a time-limited lease.
+    A worker that dies simply lets its lease expire; the item is then claimed
+    again, unless it has used max_attempts, in which case it is marked failed.
+    Failed items are retried with exponential backoff up to max_attempts. Only
+    the worker holding an item's lease can complete or fail it.
+    """
+
+    def __init__(self,
+                 lease: timedelta = timedelta(minutes=5),
+                 max_attempts: int = 5,
+                 retry_backoff: timedelta = timedelta(seconds=30)):
+        """
+        Args:
+            lease: How long a claimed item is reserved for its worker
+            max_attempts: Attempts after which an item is marked failed
+            retry_backoff: Delay before the first retry, doubled on each attempt
+        """
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def enqueue(self,
+                db: Session,
+                departure: str,
+                arrival: str,
+                dates: List[date],
+                currency: str = "EUR") -> int:
+        """
+        Adds searches to the queue. Searches already queued are made pending
+        again (a new crawl round), unless they are currently leased.
+
+        Args:
+            db: SQLAlchemy database session
+            departure: Departure airport IATA code
+            arrival: Arrival airport IATA code
+            dates: Departure dates to search
+            currency: Currency of the search
+
+        Returns:
+            int: Number of items inserted or re-queued
+        """
+        if not dates:
+            return 0
+
+        now = datetime.utcnow()
+        statement = dialect_insert(db, CrawlWorkItem).values([
+            {
+                "departure_airport": departure,
+                "arrival_airport": arrival,
+                "departure_date": day,
+                "currency": currency,
+                "status": "pending",
+                "attempts": 0,
+                "available_at": now,
+                "updated_at": now
+            }
+            for day in dates
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=["departure_airport", "arrival_airport", "departure_date", "currency"],
+            set_={
+                "status": "pending",
+                "attempts": 0,
+                "available_at": now,
+                "last_error": None,
+                "updated_at": now
+            },
+            where=CrawlWorkItem.status != "leased"
+        )
+        result = db.execute(statement)
+        db.commit()
+        return result.rowcount
+
+    def claim(self, db: Session, worker_id: str, limit: int = 10) -> List[CrawlWorkItem]:
+        """
+        Claims up to limit available items for a worker.
+        Available means pending and due, or leased with an expired lease.
+        Expired leases of items that used all their attempts (their workers
+        kept dying) are marked failed instead of being claimed again.
+
+        Args:
+            db: SQLAlchemy database session
+            worker_id: Identifier of the claiming worker
+            limit: Maximum number of items to claim
+
+        Returns:
+            List[CrawlWorkItem]: Claimed items, earliest departure first
+        """
+        now = datetime.utcnow()
+        expired = and_(CrawlWorkItem.status == "leased", CrawlWorkItem.lease_expires_at < now)
+        abandoned = (
+            db.query(CrawlWorkItem)
+            .filter(expired, CrawlWorkItem.attempts >= self.max_attempts)
+            .update({
+                CrawlWorkItem.status: "failed",
+                CrawlWorkItem.lease_owner: None,
+                CrawlWorkItem.lease_expires_at: None,
+                CrawlWorkItem.last_error: "Lease expired on the last attempt",
+                CrawlWorkItem.updated_at: now
+            }, synchronize_session=False)
+        )
+        if abandoned:
+            logger.warning(f"Marked {abandoned} work items failed after their last lease expired")
+
+        items = (
+            db.query(CrawlWorkItem)
+            .filter(or_(
+                and_(CrawlWorkItem.status == "pending", CrawlWorkItem.available_at <= now),
+                and_(expired, CrawlWorkItem.attempts < self.max_attempts)
+            ))
+            .order_by(CrawlWorkItem.departure_date, CrawlWorkItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for item in items:
+            item.status = "leased"
+            item.lease_owner = worker_id
+            item.lease_expires_at = now + self.lease
+            item.attempts += 1
+            item.updated_at = now
+        db.commit()
+        return items
+
+    def renew(self, db: Session, item: CrawlWorkItem, worker_id: str) -> bool:
+        """
+        Extends the lease of an item before working on it.
+
+        Returns:
+            bool: False if the lease expired and the item was claimed by another worker
+        """
+        now = datetime.utcnow()
+        renewed = (
+            db.query(CrawlWorkItem)
+            .filter(
+                CrawlWorkItem.id == item.id,
+                CrawlWorkItem.status == "leased",
+                CrawlWorkItem.lease_owner == worker_id
+            )
+            .update({
+                CrawlWorkItem.lease_expires_at: now + self.lease,
+                CrawlWorkItem.updated_at: now
+            }, synchronize_session=False)
+        )
+        db.commit()
+        return renewed == 1
+
+    def _release(self, db: Session, item: CrawlWorkItem, worker_id: str, values: dict) -> bool:
+        """Updates a leased item and ends its lease, if the worker still holds it."""
+        released = (
+            db.query(CrawlWorkItem)
+            .filter(
+                CrawlWorkItem.id == item.id,
+                CrawlWorkItem.status == "leased",
+                CrawlWorkItem.lease_owner == worker_id
+            )
+            .update({
+                **values,
+                CrawlWorkItem.lease_owner: None,
+                CrawlWorkItem.lease_expires_at: None,
+                CrawlWorkItem.updated_at: datetime.utcnow()
+            }, synchronize_session=False)
+        )
+        db.commit()
+        return released == 1
+
+    def complete(self, db: Session, item: CrawlWorkItem, worker_id: str, search_id: int) -> bool:
+        """
+        Marks an item done and links it to the search operation that fetched it.
+
+        Returns:
+            bool: False if the lease expired and the item was claimed by another worker
+        """
+        return self._release(db, item, worker_id, {
+            CrawlWorkItem.status: "done",
+            CrawlWorkItem.search_id: search_id,
+            CrawlWorkItem.last_error: None
+        })
+
+    def fail(self,
+             db: Session,
+             item: CrawlWorkItem,
+             worker_id: str,
+             error: str,
+             search_id: Optional[int] = None) -> bool:
+        """
+        Schedules a retry with backoff, or marks the item failed after max_attempts.
+
+        Returns:
+            bool: False if the lease expired and the item was claimed by another worker
+        """
+        # The attempt count only changes when the item is claimed, so it is
+        # current for as long as the lease is held
+        if item.attempts >= self.max_attempts:
+            values = {CrawlWorkItem.status: "failed"}
+        else:
+            values = {
+                CrawlWorkItem.status: "pending",
+                CrawlWorkItem.available_at: datetime.utcnow() + self.retry_backoff * (2 ** (item.attempts - 1))
+            }
+        return self._release(db, item, worker_id, {
+            **values,
+            CrawlWorkItem.search_id: search_id,
+            CrawlWorkItem.last_error: error[:1000]
+        })
+
+    def status(self, db: Session) -> Dict[str, int]:
+        """Counts items per status."""
+        rows = db.query(CrawlWorkItem.status, func.count(CrawlWorkItem.id)).group_by(CrawlWorkItem.status).all()
+        return {status: count for status, count in rows}
+
+
+class CrawlWorker:
+    """
+    Claims searches from the crawl queue and fetches them with EasyJetAPIClient.
+    Each fetch is saved as a SearchOperation with its snapshots, and the work
+    item is linked to it.
+    """
+
+    def __init__(self,
+                 queue: CrawlQueue,
+                 config: APIConfig,
+                 worker_id: Optional[str] = None,
+                 batch_size: int = 10):
+        """
+        Args:
+            queue: The shared crawl queue
+            config: Base API configuration (the currency is taken from each item)
+            worker_id: Identifier of this worker (default: host:pid)
+            batch_size: Items claimed at a time
+        """
+        self.queue = queue
+        self.config = config
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self._clients: Dict[str, EasyJetAPIClient] = {}
+
+    def close(self) -> None:
+        """Closes the API clients; new ones are created if the worker runs again."""
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+
+    def _client_for(self, currency: str) -> EasyJetAPIClient:
+        """Returns an API client for a currency, creating it on first use."""
+        if currency not in self._clients:
+            self._clients[currency] = EasyJetAPIClient(replace(self.config, currency=currency))
+        return self._clients[currency]
+
+    def process(self, db: Session, item: CrawlWorkItem) -> bool:
+        """
+        Fetches and saves one claimed item.
+
+        Returns:
+            bool: Whether the search succeeded
+        """
+        client = self._client_for(item.currency)
+        response = client.fetch_fares_for_date(
+            item.departure_date.strftime("%Y-%m-%d"),
+            item.departure_airport,
+            item.arrival_airport
+        )
+        try:
+            search_op = response.save_to_db(db)
+        except Exception as e:
+            db.rollback()
+            released = self.queue.fail(db, item, self.worker_id, f"Failed to save response: {str(e)}")
+            succeeded = False
+        else:
+            if response.is_successful:
+                released = self.queue.complete(db, item, self.worker_id, search_op.id)
+            else:
+                released = self.queue.fail(db, item, self.worker_id,
+                                           response.error or f"HTTP {response.status_code}", search_op.id)
+            succeeded = response.is_successful
+
+        if not released:
+            logger.warning(f"Lost lease on work item {item.id} while processing it; left to its new owner")
+        return succeeded
+
+    def run(self, db: Session, idle_sleep: float = 5.0, exit_when_empty: bool = False) -> Dict[str, int]:
+        """
+        Processes items until the queue is empty (if exit_when_empty) or forever.
+        The API clients are closed when it returns.
+
+        Args:
+            db: SQLAlchemy database session
+            idle_sleep: Seconds to wait when no item is available
+            exit_when_empty: Stop as soon as no item can be claimed
+
+        Returns:
+            dict: Number of items that succeeded and failed
+        """
+        counts = {"succeeded": 0, "failed": 0}
+        logger.info(f"Crawl worker {self.worker_id} started")
+
+        try:
+            while True:
+                items = self.queue.claim(db, self.worker_id, self.batch_size)
+                if not items:
+                    if exit_when_empty:
+                        break
+                    time.sleep(idle_sleep)
+                    continue
+
+                for item in items:
+                    # Items late in a batch may have outlived their original lease
+                    if not self.queue.renew(db, item, self.worker_id):
+                        logger.warning(f"Lost lease on work item {item.id}, skipping")
+                        continue
+                    if self.process(db, item):
+                        counts["succeeded"] += 1
+                    else:
+                        counts["failed"] += 1
+        finally:
+            self.close()
+
+        logger.info(f"Crawl worker {self.worker_id} stopped: {counts}")
+        return counts
@@ -34,21 +34,21 @@ def analyze_flight_data():
                   f"€{row.return_price:.2f} | "
                   f"{row.price_snapshot_time}")
 
-        # Also show a summary
+        # Also show a summary, from the counters maintained during ingest
         summary_query = text("""
             SELECT 
-                COUNT(DISTINCT so.id) as search_count,
-                COUNT(DISTINCT f.flight_number) as tracked_flights,
-                COUNT(ps.id) as total_price_records
-            FROM search_operations so
-            LEFT JOIN price_snapshots ps ON ps.search_id = so.id
-            LEFT JOIN flights f ON ps.flight_id = f.id
+                COALESCE(SUM(searches), 0) as search_count,
+                COALESCE(SUM(successful_searches), 0) as successful_searches,
+                COALESCE(SUM(snapshots), 0) as total_price_records,
+                COALESCE(SUM(new_flights), 0) as tracked_flights
+            FROM ingest_stats
         """)
 
         summary = db.execute(summary_query).fetchone()
         print("\nDatabase Summary:")
         print(f"Total searches conducted: {summary.search_count}")
-        print(f"Unique flights tracked: {summary.tracked_flights}")
+        print(f"Successful searches: {summary.successful_searches}")
+        print(f"Flights tracked: {summary.tracked_flights}")
         print(f"Total price records: {summary.total_price_records}")
 
         db.close()